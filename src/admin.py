@@ -40,9 +40,12 @@ __license__ = "GNU General Public License (GPL), Version 3"
 import re
 import os
 import sys
+import json
 import shutil
-import zipfile
+import hashlib
 
+import colony.libs.zip_util
+import colony.libs.size_util
 import colony.libs.string_util
 
 DEFAULT_TARGET = "colony"
@@ -65,6 +68,15 @@ EXTENSIONS = {
 """ The map associating the various types of
 colony packages with the associated extension """
 
+BUILD_CACHE_FILE = ".colony_build.json"
+""" The name of the file (in the current directory) that
+holds the build cache, mapping the name of each of the
+built packages with the key of its last build """
+
+DESCRIPTOR_REGEX = re.compile(".*_(plugin|bundle)\.json$")
+""" The regular expression used to match the (underscore
+converted) names of the descriptor files in a tree build """
+
 REMOVALS = (
     "colony.egg-info",
     "EGG-INFO"
@@ -191,10 +203,21 @@ def build():
     # a runtime error
     if len(sys.argv) < 3: raise RuntimeError("no descriptor provided")
 
-    # retrieves the target file from the arguments and
-    # uses it to run the build structure
+    # retrieves the target from the arguments and loads
+    # the build cache so that unchanged packages are skipped
     target = sys.argv[2]
-    _build(target)
+    cache = _load_cache()
+
+    try:
+        # in case the target is a directory the complete tree
+        # is built, otherwise the target is used as the single
+        # descriptor file for the build
+        if os.path.isdir(target): _build_tree(target, cache = cache)
+        else: _build(target, cache = cache)
+    finally:
+        # saves the build cache, even in case of failure, so
+        # that the already built packages are not rebuilt
+        _save_cache(cache)
 
 def deploy():
     pass
@@ -249,7 +272,11 @@ def _cleanup_files(path, extension):
     if os.listdir(path): return
     os.rmdir(path)
 
-def _pack(path):
+def _pack(
+    path,
+    level = colony.libs.zip_util.DEFAULT_LEVEL,
+    workers = colony.libs.zip_util.DEFAULT_WORKERS
+):
     # runs the cleanup process for the provided path
     # in order to prepare the current structure for
     # the packing of the files
@@ -260,22 +287,30 @@ def _pack(path):
     _path = os.path.join(path, "..")
     archive_path = os.path.join(_path, PACK_FILE)
 
-    # opens the archive path as a zip file for writing and
-    # then writes the current "instance" directory into the zip
-    file = zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED)
-    try: _zip_directory(path, "/", file)
-    finally: file.close()
-
-def _build(path, short_name = False):
-    # imports the json module so that it's possible
-    # to parse the colony descriptor file
-    import json
-
+    # creates the (parallel) packer for the archive path and
+    # then adds the current "instance" directory to it and
+    # writes the archive, compressing the files in parallel
+    packer = colony.libs.zip_util.ParallelZip(archive_path, level = level, workers = workers)
+    packer.add_directory(path, "/")
+    packer.write()
+
+    # prints a small report on the packing operation so that
+    # the throughput of the operation is visible to the user
+    _report(archive_path, packer)
+
+def _build(
+    path,
+    short_name = False,
+    level = colony.libs.zip_util.DEFAULT_LEVEL,
+    workers = colony.libs.zip_util.DEFAULT_WORKERS,
+    cache = None
+):
     # opens the descriptor file to be read in the binary
     # format and loads its json contents to be used
     file = open(path, "rb")
-    try: descriptor = json.load(file, "utf-8")
+    try: contents = file.read()
     finally: file.close()
+    descriptor = json.loads(contents, "utf-8")
 
     # retrieves the various attributes from the descriptor
     # file and uses them to infer in some properties
@@ -296,49 +331,124 @@ def _build(path, short_name = False):
     resources_directory = os.path.dirname(path)
     name = plugin_name + extension if short_name else id + extension
 
-    # opens the target zip file to be used in write
-    # mode (it's going to receive the data)
-    file = zipfile.ZipFile(name, "w", zipfile.ZIP_DEFLATED)
-
-    try:
-        # iterates over all the resources to be written
-        # in the packing file to zip them
-        for resource in resources:
-            # creates the full path to the resource from the
-            # resources directory and the re-calculates the
-            # the resources path with a prefix and writes
-            # the resource into the target file
-            _resource = os.path.join(resources_directory, resource)
-            _relative = "resources/" + resource
-            file.write(_resource, _relative)
-
-        # writes the specification file into the packing file
-        # to be used as meta data information
-        file.write(path, "specification.json")
-    finally:
-        # closes the file to avoid any leak of file
-        # descriptors and to flush the pending data
-        file.close()
-
-def _zip_directory(path, relative, file):
-    # retrieves the list of entries for the path to
-    # be compressed into the zip
-    entries = os.listdir(path)
-
-    # iterates over the list of entries to zip them
-    # or enter in a new recursion level
-    for entry in entries:
-        # create the fill entry path by joining the entry
-        # name to the (base) path of the directory and
-        # then creates also the relative path
-        _path = os.path.join(path, entry)
-        _relative = os.path.join(relative, entry)
+    # calculates the key for the current build (descriptor and
+    # resources contents) and in case it's the same as the one
+    # from the previous build (and the file exists) skips it
+    key = _build_key(contents, resources_directory, resources, level)
+    if not cache == None and cache.get(name) == key and os.path.exists(name): return False
+
+    # creates the (parallel) packer for the target file, it's
+    # going to be used to compress the various resources, the
+    # packer is deterministic so that builds are reproducible
+    packer = colony.libs.zip_util.ParallelZip(
+        name,
+        level = level,
+        workers = workers,
+        deterministic = True
+    )
+
+    # iterates over all the resources to be written
+    # in the packing file to zip them
+    for resource in resources:
+        # creates the full path to the resource from the
+        # resources directory and the re-calculates the
+        # the resources path with a prefix and adds the
+        # resource to the packer
+        _resource = os.path.join(resources_directory, resource)
+        _relative = "resources/" + resource
+        packer.add(_resource, _relative)
+
+    # adds the specification file into the packing file
+    # to be used as meta data information and then writes
+    # the complete set of entries into the target file
+    packer.add(path, "specification.json")
+    packer.write()
+
+    # updates the build cache with the key of the current build
+    # and returns valid indicating that the package was built
+    if not cache == None: cache[name] = key
+    return True
+
+def _build_tree(path, cache = None):
+    # starts the counters for both the built and the
+    # skipped packages (to be used in the report)
+    built = 0
+    skipped = 0
+
+    # walks the directory tree (in sorted order) searching
+    # for the descriptor files to be built
+    for directory_path, directories, file_names in os.walk(path):
+        directories.sort()
+        for file_name in sorted(file_names):
+            # converts the file name into the underscore notation
+            # and checks if it's a descriptor, skipping otherwise
+            _file_name = colony.libs.string_util.to_underscore(file_name)
+            if not DESCRIPTOR_REGEX.match(_file_name): continue
+
+            # builds the descriptor file and updates the
+            # appropriate counter with the result
+            _path = os.path.join(directory_path, file_name)
+            if _build(_path, cache = cache): built += 1
+            else: skipped += 1
+
+    # prints a small report on the build of the tree
+    print "built %d packages (%d unchanged)" % (built, skipped)
+
+def _build_key(contents, resources_directory, resources, level):
+    # creates the hash object and updates it with the
+    # level and the contents of the descriptor file
+    hash = hashlib.sha1()
+    hash.update(str(level) + "\0")
+    hash.update(contents)
+
+    # iterates over all the resources (in sorted order) to
+    # update the hash with their names and contents
+    for resource in sorted(resources):
+        _resource = os.path.join(resources_directory, resource)
+        hash.update(resource.encode("utf-8") + "\0")
+        file = open(_resource, "rb")
+        try:
+            while True:
+                data = file.read(colony.libs.zip_util.BUFFER_SIZE)
+                if not data: break
+                hash.update(data)
+        finally:
+            file.close()
+        hash.update("\0")
+
+    # returns the hexadecimal digest of the
+    # hash as the key for the build
+    return hash.hexdigest()
+
+def _load_cache():
+    # in case the build cache file does not exist
+    # returns an empty cache (nothing built)
+    if not os.path.exists(BUILD_CACHE_FILE): return {}
+
+    # opens the build cache file and loads its contents,
+    # in case the contents are invalid an empty cache
+    # is returned (forces the rebuild)
+    file = open(BUILD_CACHE_FILE, "rb")
+    try: contents = file.read()
+    finally: file.close()
+    try: return json.loads(contents)
+    except ValueError: return {}
+
+def _save_cache(cache):
+    # opens the build cache file for writing and dumps
+    # the cache map into it (sorted for stable output)
+    file = open(BUILD_CACHE_FILE, "wb")
+    try: json.dump(cache, file, sort_keys = True, indent = 4)
+    finally: file.close()
 
-        # checks if the path is a directory and in such case runs
-        # the recursion step, otherwise writes the file directly
-        # into the "target" zip file
-        if os.path.isdir(_path): _zip_directory(_path, _relative, file)
-        else: file.write(_path, _relative)
+def _report(path, packer):
+    # converts the various size values into their rounded
+    # string representation and prints the report line
+    bytes_read = colony.libs.size_util.size_round_unit(packer.bytes_read, space = True)
+    bytes_written = colony.libs.size_util.size_round_unit(packer.bytes_written, space = True)
+    throughput = colony.libs.size_util.size_round_unit(packer.get_throughput(), space = True)
+    print "packed %d files into %s (%s to %s) in %.2fs (%s/s)" %\
+        (packer.files, path, bytes_read, bytes_written, packer.elapsed, throughput)
 
 def main():
     # retrieves the operation from the provided arguments
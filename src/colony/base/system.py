@@ -2512,6 +2512,161 @@ class PluginManager:
             # removes the plugin thread from the plugin threads map
             del self.plugin_threads_map[plugin_id]
 
+    def hot_deploy(self, module, plugin_path = None, thread_safe = True):
+        """
+        Hot deploys the plugin in the given (main) module into the
+        running plugin system, without a full reload of the system.
+
+        In case a plugin from the module is already running it's stopped
+        (together with its dependents) and then the new version of the module
+        is imported and only the plugin and its dependents are loaded again.
+
+        @type module: String
+        @param module: The name of the plugin (main) module to be deployed.
+        @type plugin_path: String
+        @param plugin_path: The optional plugin path containing the module,
+        added to the plugin paths in case it's not yet present.
+        @type thread_safe: bool
+        @param thread_safe: If the deploy should use the event mechanism
+        to provide thread safety.
+        """
+
+        # in case thread safety is requested
+        if thread_safe:
+            # creates the execute event for the (internal) hot deploy
+            # and adds it to the event queue to be executed in the
+            # main loop (back thread), the errors are logged so that
+            # a failed deploy never stops the main loop
+            execute_event = colony.base.util.Event(EXECUTE_VALUE, [self._hot_deploy_safe, module, plugin_path])
+            self.add_event(execute_event)
+        else:
+            # runs the hot deploy immediately
+            self._hot_deploy(module, plugin_path)
+
+    def _hot_deploy_safe(self, module, plugin_path = None):
+        """
+        Hot deploys the plugin in the given (main) module, logging
+        any error that occurs in the deploy instead of raising it,
+        this is the version to be run in the main loop.
+
+        @type module: String
+        @param module: The name of the plugin (main) module to be deployed.
+        @type plugin_path: String
+        @param plugin_path: The optional plugin path containing the module.
+        @rtype: Plugin
+        @return: The plugin instance of the deployed plugin or none
+        in case there was an error in the deploy.
+        """
+
+        try:
+            # runs the hot deploy of the module
+            return self._hot_deploy(module, plugin_path)
+        except Exception, exception:
+            # prints an error message (includes the stack trace)
+            self.error("Problem hot deploying module '%s': %s" % (module, unicode(exception)))
+
+    def _hot_deploy(self, module, plugin_path = None):
+        """
+        Hot deploys the plugin in the given (main) module, stopping
+        the current version of it and loading only the new version
+        and the dependents that were loaded before.
+
+        @type module: String
+        @param module: The name of the plugin (main) module to be deployed.
+        @type plugin_path: String
+        @param plugin_path: The optional plugin path containing the module.
+        @rtype: Plugin
+        @return: The plugin instance of the deployed plugin.
+        """
+
+        # in case a plugin path is provided and it's not yet registered
+        # adds it to the plugin paths and to the python path
+        if plugin_path and not plugin_path in self.plugin_paths:
+            self.add_plugin_path(plugin_path)
+            self.set_python_path([], [plugin_path])
+
+        # retrieves the plugin class currently running for the module
+        # and starts the list of plugins (ids) to be loaded after deploy
+        plugin_class = module in sys.modules and self.get_plugin_class_by_module_name(module) or None
+        load_ids = []
+
+        # in case there's a plugin running for the module it must be
+        # stopped (and removed) before the import of the new version
+        if plugin_class:
+            # retrieves the plugin instance and the (loaded) dependents
+            # of it, these are the plugins to be loaded after the deploy
+            plugin_instance = self.plugin_instances_map[plugin_class.id]
+            plugin_instance.is_loaded() and load_ids.append(plugin_class.id)
+            load_ids.extend(self._get_loaded_dependents(plugin_instance))
+
+            # prints an info message
+            self.info("Hot deploying '%s' v%s (%d plugins affected)" % (plugin_instance.name, plugin_instance.version, len(load_ids)))
+
+            # stops the module (unloads the plugin and the dependents)
+            # and removes the main modules of the plugin so that the
+            # new versions are imported at load time
+            self.stop_module(module)
+            for main_module in plugin_instance.main_modules:
+                if main_module in sys.modules: del sys.modules[main_module]
+        # otherwise in case the module is loaded (without plugin)
+        # removes it so that the new version is imported
+        elif module in sys.modules:
+            del sys.modules[module]
+
+        # imports the new version of the module and starts the plugins
+        # for the new classes (only the new plugin is started)
+        __import__(module)
+        self.start_plugins()
+
+        # retrieves the plugin class for the new version of the module
+        # and in case it's not found raises an exception
+        plugin_class = self.get_plugin_class_by_module_name(module)
+        if not plugin_class: raise colony.base.exceptions.ColonyException("no plugin found in module '%s'" % module)
+
+        # retrieves the new plugin instance and in case it's a startup or
+        # main plugin (and not previously loaded) sets it for loading
+        plugin_instance = self.plugin_instances_map[plugin_class.id]
+        startup = STARTUP_TYPE in plugin_instance.capabilities or MAIN_TYPE in plugin_instance.capabilities
+        if startup and not plugin_instance.id in load_ids: load_ids.insert(0, plugin_instance.id)
+
+        # loads the plugin and the dependents (in order) so that
+        # the dependencies are injected with the new version
+        for plugin_id in load_ids: self.load_plugin(plugin_id)
+
+        # generates the hot deploy event for the plugin (so that
+        # the interested plugins are notified) and returns it
+        self.generate_event("plugin_manager.hot_deploy", [plugin_instance.id, plugin_instance.version, plugin_instance])
+        return plugin_instance
+
+    def _get_loaded_dependents(self, plugin):
+        """
+        Retrieves the ids of the loaded plugins that depend (directly
+        or indirectly) on the given plugin, in order of dependency.
+
+        @type plugin: Plugin
+        @param plugin: The plugin to retrieve the dependents.
+        @rtype: List
+        @return: The list of ids of the loaded dependents.
+        """
+
+        # starts the list of dependent ids and the list of
+        # plugins to be visited (breadth first)
+        dependent_ids = []
+        visit = [plugin]
+
+        # iterates while there are plugins to be visited adding
+        # the loaded dependents of each of them (once)
+        while visit:
+            _plugin = visit.pop(0)
+            for dependent_plugin in self.get_plugin_dependent_plugins_map(_plugin.id):
+                if not dependent_plugin.is_loaded(): continue
+                if dependent_plugin.id in dependent_ids: continue
+                dependent_ids.append(dependent_plugin.id)
+                visit.append(dependent_plugin)
+
+        # returns the list of dependent ids
+        return dependent_ids
+
     def add_plugin_path(self, plugin_path, persist = False):
         """
         Adds the given plugin path to the plugin paths
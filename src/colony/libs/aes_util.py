@@ -38,14 +38,30 @@ __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
 import os
+import binascii
 
-try: import Crypto.Cipher.AES
+try: import Crypto.Cipher.AES; import Crypto.Util.Counter
 except: Crypto = None
 
 BLOCK_SIZE = 16
 """ The block size to be used for the post operation
 should not be too small or security issues may arise """
 
+AES_BLOCK_SIZE = 16
+""" The size of the (cipher) block of the aes system,
+used for the chaining of the stream modes """
+
+CHUNK_SIZE = 65536
+""" The size of the chunks to be read from the files
+in the (streaming) file encryption and decryption """
+
+CBC_MODE = "cbc"
+""" The cipher block chaining mode, the stream
+is padded according to pkcs5 """
+
+CTR_MODE = "ctr"
+""" The counter mode, the stream is not padded """
+
 class AesCipher:
     """
     The class responsible for a proper encryption
@@ -65,6 +81,10 @@ class AesCipher:
     """ The size of the encryption block to be
     used under this cipher instance """
 
+    cipher = None
+    """ The (ecb) cipher context, created once and
+    reused for all the encryption and decryption """
+
     def __init__(self, key = None, block_size = BLOCK_SIZE):
         """
         Constructor of the class.
@@ -96,7 +116,7 @@ class AesCipher:
         """
 
         raw = self.pad(raw)
-        cipher = Crypto.Cipher.AES.new(self.key, Crypto.Cipher.AES.MODE_ECB)
+        cipher = self._get_cipher()
         return cipher.encrypt(raw)
 
     def decrypt(self, encoded):
@@ -113,10 +133,95 @@ class AesCipher:
         cryptographic system in ecb mode.
         """
 
-        cipher = Crypto.Cipher.AES.new(self.key, Crypto.Cipher.AES.MODE_ECB)
+        cipher = self._get_cipher()
         decoded = cipher.decrypt(encoded)
         return self.unpad(decoded)
 
+    def stream(self, mode = CBC_MODE, iv = None, decrypt = False):
+        """
+        Creates a new stream (chunked) cipher for the key of
+        the aes cipher, in the given mode.
+
+        @type mode: String
+        @param mode: The mode of the stream (cbc or ctr).
+        @type iv: String
+        @param iv: The initialization vector (or initial counter)
+        for the stream, in case it's not defined a random one
+        is created (encryption only).
+        @type decrypt: bool
+        @param decrypt: If the stream should decrypt the data.
+        @rtype: AesStream
+        @return: The created stream cipher.
+        """
+
+        return AesStream(self.key, mode, iv, decrypt)
+
+    def encrypt_file(self, source_path, target_path, mode = CBC_MODE, chunk_size = CHUNK_SIZE):
+        """
+        Encrypts the file in the source path into the target
+        path, in constant memory (chunk by chunk), the target
+        file is prefixed with the initialization vector.
+
+        @type source_path: String
+        @param source_path: The path to the (raw) file to be encrypted.
+        @type target_path: String
+        @param target_path: The path to the encrypted file.
+        @type mode: String
+        @param mode: The mode of the encryption (cbc or ctr).
+        @type chunk_size: int
+        @param chunk_size: The size of the chunks to be read.
+        """
+
+        # opens both the source and the target files
+        source_file = open(source_path, "rb")
+        target_file = open(target_path, "wb")
+
+        try:
+            # creates the stream for the encryption and writes
+            # the initialization vector into the target file
+            stream = self.stream(mode)
+            target_file.write(stream.get_iv())
+
+            # runs the stream over the source file
+            self._stream_file(stream, source_file, target_file, chunk_size)
+        finally:
+            # closes both the source and the target files
+            source_file.close()
+            target_file.close()
+
+    def decrypt_file(self, source_path, target_path, mode = CBC_MODE, chunk_size = CHUNK_SIZE):
+        """
+        Decrypts the file in the source path into the target
+        path, in constant memory (chunk by chunk), the source
+        file should be prefixed with the initialization vector.
+
+        @type source_path: String
+        @param source_path: The path to the encrypted file.
+        @type target_path: String
+        @param target_path: The path to the (raw) decrypted file.
+        @type mode: String
+        @param mode: The mode of the decryption (cbc or ctr).
+        @type chunk_size: int
+        @param chunk_size: The size of the chunks to be read.
+        """
+
+        # opens both the source and the target files
+        source_file = open(source_path, "rb")
+        target_file = open(target_path, "wb")
+
+        try:
+            # reads the initialization vector from the source
+            # file and creates the stream for the decryption
+            iv = source_file.read(AES_BLOCK_SIZE)
+            stream = self.stream(mode, iv, True)
+
+            # runs the stream over the source file
+            self._stream_file(stream, source_file, target_file, chunk_size)
+        finally:
+            # closes both the source and the target files
+            source_file.close()
+            target_file.close()
+
     def pad(self, value):
         """
         Adds the pkcs5 padding to the provided value
@@ -180,3 +285,200 @@ class AesCipher:
         """
 
         return self.block_size
+
+    def _get_cipher(self):
+        """
+        Retrieves the (ecb) cipher context for the key,
+        creating it in case it's not yet created.
+
+        @rtype: Object
+        @return: The (ecb) cipher context for the key.
+        """
+
+        if self.cipher: return self.cipher
+        self.cipher = Crypto.Cipher.AES.new(self.key, Crypto.Cipher.AES.MODE_ECB)
+        return self.cipher
+
+    def _stream_file(self, stream, source_file, target_file, chunk_size):
+        """
+        Runs the given stream over the contents of the source
+        file writing the result to the target file, chunk by chunk.
+
+        @type stream: AesStream
+        @param stream: The stream cipher to be used.
+        @type source_file: File
+        @param source_file: The file to read the data from.
+        @type target_file: File
+        @param target_file: The file to write the result to.
+        @type chunk_size: int
+        @param chunk_size: The size of the chunks to be read.
+        """
+
+        # iterates continuously to read the chunks from
+        # the source file and write the result
+        while True:
+            data = source_file.read(chunk_size)
+            if not data: break
+            target_file.write(stream.update(data))
+
+        # writes the final chunk (padding) to the target file
+        target_file.write(stream.finalize())
+
+class AesStream:
+    """
+    The class representing a stream (chunked) aes cipher,
+    that may be fed with chunks of data and produces the
+    resulting chunks, using a single cipher context.
+
+    The cbc mode uses pkcs5 padding and the ctr mode is
+    not padded (the output has the size of the input).
+    """
+
+    key = None
+    """ The symmetric key to be used in the stream """
+
+    mode = None
+    """ The mode of the stream (cbc or ctr) """
+
+    iv = None
+    """ The initialization vector (or initial counter)
+    of the stream """
+
+    decrypt = False
+    """ If the stream decrypts the data """
+
+    buffer = ""
+    """ The buffer holding the data pending processing
+    (not aligned with the block size) """
+
+    operation = None
+    """ The (bound) operation of the cipher context to be
+    used for the processing of the data """
+
+    def __init__(self, key, mode = CBC_MODE, iv = None, decrypt = False):
+        """
+        Constructor of the class.
+
+        @type key: String
+        @param key: The symmetric key (secret) to be used
+        in the aes encryption and decryption.
+        @type mode: String
+        @param mode: The mode of the stream (cbc or ctr).
+        @type iv: String
+        @param iv: The initialization vector (or initial counter)
+        for the stream, in case it's not defined a random one
+        is created (encryption only).
+        @type decrypt: bool
+        @param decrypt: If the stream should decrypt the data.
+        """
+
+        self.key = key
+        self.mode = mode
+        self.decrypt = decrypt
+
+        self.reset(iv)
+
+    def update(self, data):
+        """
+        Processes the given chunk of data, retrieving the
+        resulting chunk, the data not aligned with the block
+        size is kept for the next chunks.
+
+        @type data: String
+        @param data: The chunk of data to be processed.
+        @rtype: String
+        @return: The resulting chunk (may be empty).
+        """
+
+        # adds the data to the pending buffer and calculates the
+        # size of the data to be processed (aligned with the block),
+        # the cbc decryption holds the last block for the unpadding
+        buffer = self.buffer + data
+        if self.decrypt and self.mode == CBC_MODE: size = max(len(buffer) - 1, 0) // AES_BLOCK_SIZE * AES_BLOCK_SIZE
+        else: size = len(buffer) // AES_BLOCK_SIZE * AES_BLOCK_SIZE
+
+        # updates the pending buffer and processes
+        # the aligned data (in case there's any)
+        self.buffer = buffer[size:]
+        return size and self.operation(buffer[:size]) or ""
+
+    def finalize(self):
+        """
+        Processes the remaining data of the stream retrieving
+        the final chunk, after this call the stream must be
+        reset before any further use.
+
+        @rtype: String
+        @return: The final chunk of the stream.
+        """
+
+        # retrieves the pending buffer and
+        # resets it (no more data pending)
+        buffer = self.buffer
+        self.buffer = ""
+
+        # in case the mode is counter the pending buffer is
+        # processed with zero padding and then truncated
+        if self.mode == CTR_MODE:
+            size = len(buffer)
+            return size and self.operation(buffer + "\x00" * (AES_BLOCK_SIZE - size))[:size] or ""
+
+        # in case it's an encryption the pending buffer
+        # is padded (pkcs5) and processed
+        if not self.decrypt:
+            remaining = AES_BLOCK_SIZE - len(buffer)
+            return self.operation(buffer + remaining * chr(remaining))
+
+        # in case the pending buffer is not a complete block
+        # the encrypted data is invalid (raises an error)
+        if not len(buffer) == AES_BLOCK_SIZE:
+            raise RuntimeError("invalid encrypted data length")
+
+        # processes the last block and removes the padding
+        decoded = self.operation(buffer)
+        return decoded[:-ord(decoded[-1])]
+
+    def reset(self, iv = None):
+        """
+        Resets the stream with a new cipher context, so that
+        the stream may be reused for new data.
+
+        @type iv: String
+        @param iv: The initialization vector (or initial counter)
+        for the stream, in case it's not defined a random one
+        is created (encryption only).
+        """
+
+        # in case it's a decryption and no initialization
+        # vector is defined raises an error
+        if self.decrypt and not iv:
+            raise RuntimeError("initialization vector required for decryption")
+
+        # sets the initialization vector (random by default)
+        # and resets the pending buffer
+        self.iv = iv or os.urandom(AES_BLOCK_SIZE)
+        self.buffer = ""
+
+        # creates the cipher context according to the mode
+        # (the counter mode uses the vector as initial value)
+        if self.mode == CBC_MODE:
+            cipher = Crypto.Cipher.AES.new(self.key, Crypto.Cipher.AES.MODE_CBC, self.iv)
+        elif self.mode == CTR_MODE:
+            counter = Crypto.Util.Counter.new(AES_BLOCK_SIZE * 8, initial_value = long(binascii.hexlify(self.iv), 16))
+            cipher = Crypto.Cipher.AES.new(self.key, Crypto.Cipher.AES.MODE_CTR, counter = counter)
+        else:
+            raise RuntimeError("invalid mode: %s" % self.mode)
+
+        # sets the operation to be used for the processing
+        self.operation = self.decrypt and cipher.decrypt or cipher.encrypt
+
+    def get_iv(self):
+        """
+        Retrieves the initialization vector (or initial counter)
+        of the stream, required for the decryption.
+
+        @rtype: String
+        @return: The initialization vector of the stream.
+        """
+
+        return self.iv
@@ -37,7 +37,8 @@ __copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
 __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
-import string_buffer_util
+try: import multiprocessing
+except: multiprocessing = None
 
 DIGIT_ENCODING_MAP = {
     "0" : "NNWWN",
@@ -70,6 +71,36 @@ START_CODES_CODE_128 = {
 END_CODE_CODE_128 = 106
 """ The end code for code 128 """
 
+ENCODING_2_OF_5 = "2_of_5"
+""" The name of the 2 of 5 encoding (batch encoding) """
+
+ENCODING_CODE_128 = "code_128"
+""" The name of the code 128 encoding (batch encoding) """
+
+ENCODING_CODE_39 = "code_39"
+""" The name of the code 39 encoding (batch encoding) """
+
+DEFAULT_CHUNK_SIZE = 1024
+""" The default number of values sent to each of the
+processes at a time (multiprocessing batch encoding) """
+
+CODE_SET_A_MAP = dict((chr(index), index > 32 and index - 32 or index + 64) for index in range(96))
+""" The (lookup) map associating the characters with
+the code 128 values in the code set a """
+
+CODE_SET_B_MAP = dict((chr(index), index - 32) for index in range(32, 128))
+""" The (lookup) map associating the (ascii) characters with
+the code 128 values in the code set b, the ascii limit avoids
+the comparison of non ascii strings with unicode values """
+
+CODE_SET_C_MAP = dict(("%02d" % index, index) for index in range(100))
+""" The (lookup) map associating the pairs of digits with
+the code 128 values in the code set c """
+
+CHARACTER_TABLE = [unichr(index < 95 and index + 32 or index + 100) for index in range(256)]
+""" The (lookup) table associating the code 128 values
+with the characters of the true type font """
+
 def encode_2_of_5(string_value):
     """
     Encodes the provided string value into the 2 of 5
@@ -84,11 +115,6 @@ def encode_2_of_5(string_value):
     @see: http://en.wikipedia.org/wiki/Interleaved_2_of_5
     """
 
-    # starts the encoded buffer with the default
-    # start code for the 2 of 5
-    encoded_buffer = string_buffer_util.StringBuffer()
-    encoded_buffer.write(START_CODE_2_OF_5)
-
     # retrieves the length of the string value and the
     # uses it to check if the string value length is
     # of type odd or even
@@ -100,44 +126,20 @@ def encode_2_of_5(string_value):
     # the string value (so that it's possible to codify it)
     if not is_even_length: string_value = "0" + string_value
 
-    # resets the index counter
-    index = 0
-
-    # iterates over the range of indexes of the
-    # string value range
-    while index < string_value_length:
-        # retrieves the first and second digits
-        # for the current string value index
-        first_digit = string_value[index]
-        second_digit = string_value[index + 1]
-
-        # encodes the first and second digits
-        # using the the digit encoding map
-        first_digit_encoded = DIGIT_ENCODING_MAP.get(first_digit, None)
-        second_digit_encoded = DIGIT_ENCODING_MAP.get(second_digit, None)
-
-        # in case at least one of the digits is not valid
-        # (not possible to encoded) it, this is an error
-        # situation and a runtime error must be raised
-        if first_digit_encoded == None or second_digit_encoded == None: raise RuntimeError("Value is not serializable in 2 of 5 encoding")
-
-        # interleaves both the first and second encoded
-        # digits and then writes the result to the encoded buffer
-        interleaved_digits_string = _interleave_digits(first_digit_encoded, second_digit_encoded)
-        encoded_buffer.write(interleaved_digits_string)
-
-        # increments the index counter in two values
-        # so that so that the s
-        index += 2
-
-    # writes the end of the 2 of 5 encoding
-    # value to the encoded buffer and then
-    # retrieves the (final) encoded value
-    encoded_buffer.write(END_CODE_2_OF_5)
-    encoded_value = encoded_buffer.get_value()
-
-    # returns the 2 of 5 encoded value
-    return  encoded_value
+    # retrieves the interleaved encoding for each of the pairs
+    # of digits of the string value from the lookup map
+    get = INTERLEAVED_2_OF_5_MAP.get
+    encoded_pairs = [get(string_value[index:index + 2], None) for index in xrange(0, string_value_length, 2)]
+
+    # in case at least one of the pairs is not valid
+    # (not possible to encoded) it, this is an error
+    # situation and a runtime error must be raised
+    if None in encoded_pairs: raise RuntimeError("Value is not serializable in 2 of 5 encoding")
+
+    # joins the start code, the encoded pairs and the end
+    # code into the (final) encoded value and returns it
+    encoded_value = START_CODE_2_OF_5 + "".join(encoded_pairs) + END_CODE_2_OF_5
+    return encoded_value
 
 def encode_code_128(value, code_set = "A"):
     """
@@ -192,6 +194,110 @@ def encode_code_39(value):
 
     return "*" + value + "*"
 
+def encode_many(values, encoding = ENCODING_CODE_128, arguments = (), generator = False, processes = 0, chunk_size = DEFAULT_CHUNK_SIZE, pool = None):
+    """
+    Encodes the provided iterable of values into the barcode
+    encoding with the given name (batch encoding).
+    The encoding may be run in a pool of processes for the
+    huge batches (the output is the same in all the modes).
+
+    Note that using the processes creates (and tears down) a new
+    pool of processes in each call, which is only worth it for very
+    large batches, for repeated calls an existing pool should be
+    provided instead (the pool is not closed by this function).
+
+    @type values: Iterable
+    @param values: The iterable of values to be encoded.
+    @type encoding: String
+    @param encoding: The name of the barcode encoding (2 of 5,
+    code 128 or code 39).
+    @type arguments: Tuple
+    @param arguments: The extra arguments to the encoding
+    function (eg: the code set for code 128).
+    @type generator: bool
+    @param generator: If a generator should be returned instead
+    of a list (streaming of the encoded values).
+    @type processes: int
+    @param processes: The number of processes to be used for the
+    encoding, zero (default) encodes in the current process and
+    none uses the number of cpus.
+    @type chunk_size: int
+    @param chunk_size: The number of values sent to each of the
+    processes at a time.
+    @type pool: Pool
+    @param pool: The (multiprocessing) pool of processes owned by
+    the caller to be used for the encoding, instead of a new one.
+    @rtype: List
+    @return: The list (or generator) of the encoded values.
+    """
+
+    # retrieves the encoding function for the encoding, in case
+    # no valid encoding is provided raises a runtime error
+    encoder = ENCODERS_MAP.get(encoding, None)
+    if not encoder: raise RuntimeError("Specified encoding not supported %s" % encoding)
+
+    # in case a pool of processes is provided delegates the
+    # encoding to it (the pool is owned by the caller)
+    if pool:
+        items = ((encoding, arguments, value) for value in values)
+        if generator: return pool.imap(_encode_item, items, chunk_size)
+        return pool.map(_encode_item, items, chunk_size)
+
+    # in case the encoding should be run in a (new) pool of processes
+    # (and the multiprocessing is available) delegates the encoding
+    if multiprocessing and not processes == 0:
+        items = ((encoding, arguments, value) for value in values)
+        if generator: return _encode_pool_generator(items, processes, chunk_size)
+        pool = multiprocessing.Pool(processes)
+        try: return pool.map(_encode_item, items, chunk_size)
+        finally: pool.close(); pool.join()
+
+    # encodes the values in the current process
+    # either as a generator or as a list
+    if generator: return (encoder(value, *arguments) for value in values)
+    return [encoder(value, *arguments) for value in values]
+
+def _encode_item(item):
+    """
+    Encodes the given item (tuple with the encoding, the extra
+    arguments and the value) to be used in the pool of processes
+    (must be defined at the module level).
+
+    @type item: Tuple
+    @param item: The tuple containing the name of the encoding,
+    the extra arguments and the value to be encoded.
+    @rtype: String
+    @return: The encoded value.
+    """
+
+    encoding, arguments, value = item
+    return ENCODERS_MAP[encoding](value, *arguments)
+
+def _encode_pool_generator(items, processes, chunk_size):
+    """
+    Generator that encodes the given items in a pool of processes
+    yielding the encoded values in order, the pool is closed once
+    the generator is exhausted (or closed).
+
+    @type items: Iterable
+    @param items: The iterable of items (tuples with the encoding,
+    the extra arguments and the value) to be encoded.
+    @type processes: int
+    @param processes: The number of processes of the pool.
+    @type chunk_size: int
+    @param chunk_size: The number of values sent to each of the
+    processes at a time.
+    @rtype: Generator
+    @return: The generator of the encoded values.
+    """
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for encoded_value in pool.imap(_encode_item, items, chunk_size): yield encoded_value
+    finally:
+        pool.terminate()
+        pool.join()
+
 def _interleave_digits(first_digit, second_digit):
     """
     Interleaves both 2 of 5 encoded digits by creating
@@ -252,23 +358,11 @@ def _calculate_check_digit(character_values):
     of character values.
     """
 
-    # starts the checksum value with the first
-    # value and then retrieves the string
-    # containing the remaining values
+    # starts the checksum value with the first value and
+    # then adds the remaining values weighted by their own
+    # index value plus one (weighted value)
     checksum = character_values[0]
-    remaining_values = character_values[1:]
-    remaining_values_length = len(remaining_values)
-
-    # iterates over the range of the remaining
-    # value length to calculate the checksum
-    for index in range(remaining_values_length):
-        # retrieves the current value and multiplies
-        # it over it's own index value plus one, that
-        # will be its weighted value (value to be added
-        # to the checksum integer)
-        value = remaining_values[index]
-        weighted_value = value * (index + 1)
-        checksum += weighted_value
+    checksum += sum([value * weight for weight, value in enumerate(character_values[1:], 1)])
 
     # runs the modulus operation on the checksum
     # and returns it as its check digit
@@ -294,17 +388,13 @@ def _encode_code_set_a(string_value):
     start_code = START_CODES_CODE_128["A"]
     character_values = [start_code]
 
-    # iterates over all the characters contained
-    # in the string value to encode them
+    # retrieves the code 128 code set a values for the characters
+    # from the lookup map, in case a character is not found in
+    # the map it's not a valid one (raises an error)
+    get = CODE_SET_A_MAP.get
     for character in string_value:
-        # retrieves the ordinal value of the character
-        # and checks if it's a valid one
-        character_ascii_value = ord(character)
-        if character_ascii_value > 95: raise RuntimeError("Code set does not support character '%s' " % character)
-
-        # "calculates" the appropriate code 128 code set a
-        # for the value and appends it to the character values
-        character_code_128_value = character_ascii_value > 32 and character_ascii_value - 32 or character_ascii_value + 64
+        character_code_128_value = get(character, None)
+        if character_code_128_value == None: raise RuntimeError("Code set does not support character '%s' " % character)
         character_values.append(character_code_128_value)
 
     # returns the list containing the code set
@@ -330,17 +420,16 @@ def _encode_code_set_b(string_value):
     start_code = START_CODES_CODE_128["B"]
     character_values = [start_code]
 
-    # iterates over all the characters contained
-    # in the string value to encode them
+    # retrieves the code 128 code set b values for the characters
+    # from the lookup map, in case a character is not found in
+    # the map (eg: non ascii) the value is "calculated"
+    get = CODE_SET_B_MAP.get
     for character in string_value:
-        # retrieves the ordinal value of the character
-        # and checks if it's a valid one
-        character_ascii_value = ord(character)
-        if character_ascii_value < 32: raise RuntimeError("Code set does not support character '%s' " % character)
-
-        # "calculates" the appropriate code 128 code set b
-        # for the value and appends it to the character values
-        character_code_128_value = character_ascii_value - 32
+        character_code_128_value = get(character, None)
+        if character_code_128_value == None:
+            character_ascii_value = ord(character)
+            if character_ascii_value < 32: raise RuntimeError("Code set does not support character '%s' " % character)
+            character_code_128_value = character_ascii_value - 32
         character_values.append(character_code_128_value)
 
     # returns the list containing the code set
@@ -366,19 +455,15 @@ def _encode_code_set_c(string_value):
     start_code = START_CODES_CODE_128["C"]
     character_values = [start_code]
 
-    # resets the index value
-    index = 0
-
-    # iterates over the range of string value
-    # to access all of its characters
-    while index < len(string_value) - 1:
-        # retrieves the current character slice and
-        # parses it as an integer to append it to
-        # the character values list
+    # retrieves the values for each of the pairs of characters
+    # from the lookup map, in case a pair is not found in the
+    # map the pair is parsed as an integer
+    get = CODE_SET_C_MAP.get
+    for index in xrange(0, len(string_value) - 1, 2):
         characters_slice = string_value[index:index + 2]
-        character_value = int(characters_slice)
+        character_value = get(characters_slice, None)
+        if character_value == None: character_value = int(characters_slice)
         character_values.append(character_value)
-        index += 2
 
     # returns the list containing the code set
     # c encoded values
@@ -399,26 +484,24 @@ def _get_character_string(character_values):
     used in the true type font.
     """
 
-    # creates the buffer to hold the various partial
-    # encoded value that will constitute the "final"
-    # character string
-    character_buffer = string_buffer_util.StringBuffer()
-
-    # iterates over all the characters in the list of
-    # code 128 character values
-    for character_value in character_values:
-        # converts the value offset according to the position
-        # in the conversion table
-        if character_value < 95: ordinal_value = character_value + 32
-        else: ordinal_value = character_value + 100
-
-        # converts the ordinal value into an
-        # unicode encoded value and adds it
-        # to the character buffer
-        character = unichr(ordinal_value)
-        character_buffer.write(character)
-
-    # retrieves the character string as the value from the
-    # character buffer and then returns the value
-    character_string = character_buffer.get_value()
+    # converts the values into the characters using the lookup
+    # table, the values out of the table are converted with the
+    # offset according to the position in the conversion table
+    characters = [0 <= character_value < 256 and CHARACTER_TABLE[character_value] or unichr(character_value < 95 and character_value + 32 or character_value + 100) for character_value in character_values]
+
+    # joins the characters into the character
+    # string and then returns it
+    character_string = u"".join(characters)
     return character_string
+
+INTERLEAVED_2_OF_5_MAP = dict((first + second, _interleave_digits(DIGIT_ENCODING_MAP[first], DIGIT_ENCODING_MAP[second])) for first in DIGIT_ENCODING_MAP for second in DIGIT_ENCODING_MAP)
+""" The (lookup) map associating the pairs of digits with
+the interleaved 2 of 5 encoding of them """
+
+ENCODERS_MAP = {
+    ENCODING_2_OF_5 : encode_2_of_5,
+    ENCODING_CODE_128 : encode_code_128,
+    ENCODING_CODE_39 : encode_code_39
+}
+""" The map associating the names of the encodings with
+the encoding functions (batch encoding) """
@@ -37,11 +37,297 @@ __copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
 __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
+import os
+import sys
+import time
+import types
+import struct
+import hashlib
+import tempfile
+import threading
+
+LRU_POLICY = "lru"
+""" The least recently used eviction policy, the entry
+that has not been accessed for longer is evicted first """
+
+LFU_POLICY = "lfu"
+""" The least frequently used eviction policy, the entry
+with the smallest number of accesses is evicted first """
+
+TTL_POLICY = "ttl"
+""" The time to live eviction policy, the entry that was
+added first (closer to expiration) is evicted first """
+
+class CacheList(object):
+    """
+    Doubly linked list of (unique) names, used by the
+    eviction policies to keep the eviction order with
+    constant time insertion, removal and retrieval of the
+    first name in the list.
+    """
+
+    nodes_map = {}
+    """ The map associating the name with the list node, a
+    node is a list containing the previous node, the next
+    node and the name """
+
+    head = None
+    """ The sentinel node of the (circular) list, the
+    next node of it is the first node of the list """
+
+    def __init__(self):
+        """
+        Constructor of the class.
+        """
+
+        self.nodes_map = {}
+        self.head = []
+        self.head[:] = [self.head, self.head, None]
+
+    def __len__(self):
+        return len(self.nodes_map)
+
+    def append(self, name):
+        """
+        Appends the given name to the end of the list.
+
+        @type name: String
+        @param name: The name to be appended to the list.
+        """
+
+        # retrieves the last node of the list and creates
+        # the new node linking it between the last node and
+        # the head (sentinel) node of the list
+        last = self.head[0]
+        node = [last, self.head, name]
+        last[1] = node
+        self.head[0] = node
+        self.nodes_map[name] = node
+
+    def remove(self, name):
+        """
+        Removes the given name from the list, in case the name
+        is not present in the list nothing is done.
+
+        @type name: String
+        @param name: The name to be removed from the list.
+        """
+
+        # retrieves the node for the name and in case it's not
+        # found returns immediately, otherwise unlinks the node
+        node = self.nodes_map.pop(name, None)
+        if not node: return
+        previous, next, _name = node
+        previous[1] = next
+        next[0] = previous
+
+    def first(self):
+        """
+        Retrieves the first name in the list (oldest), in
+        case the list is empty an invalid value is returned.
+
+        @rtype: String
+        @return: The first name in the list.
+        """
+
+        return self.head[1][2]
+
+class CachePolicy(object):
+    """
+    Abstract eviction policy for the data cache map, the
+    policy is notified about the additions, accesses and
+    removals of entries and selects the entry to be evicted.
+    """
+
+    def add(self, name):
+        """
+        Notifies the policy about the addition of a new entry.
+
+        @type name: String
+        @param name: The name of the added entry.
+        """
+
+        pass
+
+    def access(self, name):
+        """
+        Notifies the policy about the access (hit) to an entry.
+
+        @type name: String
+        @param name: The name of the accessed entry.
+        """
+
+        pass
+
+    def remove(self, name):
+        """
+        Notifies the policy about the removal of an entry.
+
+        @type name: String
+        @param name: The name of the removed entry.
+        """
+
+        pass
+
+    def victim(self):
+        """
+        Retrieves the name of the entry that should be evicted
+        next from the cache.
+
+        @rtype: String
+        @return: The name of the entry to be evicted.
+        """
+
+        raise NotImplementedError("victim selection not implemented")
+
+class LRUPolicy(CachePolicy):
+    """
+    Least recently used eviction policy, keeps the entries
+    ordered by the time of the last access.
+    """
+
+    order = None
+    """ The list of names ordered by the last access """
+
+    def __init__(self):
+        """
+        Constructor of the class.
+        """
+
+        self.order = CacheList()
+
+    def add(self, name):
+        self.order.append(name)
+
+    def access(self, name):
+        self.order.remove(name)
+        self.order.append(name)
+
+    def remove(self, name):
+        self.order.remove(name)
+
+    def victim(self):
+        return self.order.first()
+
+class LFUPolicy(CachePolicy):
+    """
+    Least frequently used eviction policy, keeps the entries
+    in buckets of access frequency (constant time operations),
+    ties are resolved by the time of the last access.
+    """
+
+    frequencies_map = {}
+    """ The map associating the name with the number of
+    accesses to the entry """
+
+    buckets_map = {}
+    """ The map associating the frequency with the list of
+    names with such frequency """
+
+    minimum = 0
+    """ The minimum frequency currently in the buckets """
+
+    def __init__(self):
+        """
+        Constructor of the class.
+        """
+
+        self.frequencies_map = {}
+        self.buckets_map = {}
+        self.minimum = 0
+
+    def add(self, name):
+        self.frequencies_map[name] = 1
+        self._bucket(1).append(name)
+        self.minimum = 1
+
+    def access(self, name):
+        # retrieves the current frequency of the entry and
+        # moves it to the bucket of the next frequency updating
+        # the minimum frequency in case the bucket is now empty
+        frequency = self.frequencies_map[name]
+        self._unbucket(frequency, name)
+        if self.minimum == frequency and not frequency in self.buckets_map:
+            self.minimum = frequency + 1
+        self.frequencies_map[name] = frequency + 1
+        self._bucket(frequency + 1).append(name)
+
+    def remove(self, name):
+        frequency = self.frequencies_map.pop(name, None)
+        if frequency == None: return
+        self._unbucket(frequency, name)
+
+    def victim(self):
+        # in case the minimum bucket is not available (removed
+        # after an explicit removal) the minimum is re-computed
+        if not self.minimum in self.buckets_map:
+            self.minimum = min(self.buckets_map)
+        return self.buckets_map[self.minimum].first()
+
+    def _bucket(self, frequency):
+        bucket = self.buckets_map.get(frequency, None)
+        if bucket == None: bucket = self.buckets_map[frequency] = CacheList()
+        return bucket
+
+    def _unbucket(self, frequency, name):
+        bucket = self.buckets_map[frequency]
+        bucket.remove(name)
+        if not bucket: del self.buckets_map[frequency]
+
+class TTLPolicy(CachePolicy):
+    """
+    Time to live eviction policy, keeps the entries ordered
+    by the time of addition (the first entry to expire is
+    the first to be evicted), accesses do not change the order.
+    """
+
+    order = None
+    """ The list of names ordered by the time of addition """
+
+    def __init__(self):
+        """
+        Constructor of the class.
+        """
+
+        self.order = CacheList()
+
+    def add(self, name):
+        self.order.append(name)
+
+    def remove(self, name):
+        self.order.remove(name)
+
+    def victim(self):
+        return self.order.first()
+
+POLICIES_MAP = {
+    LRU_POLICY : LRUPolicy,
+    LFU_POLICY : LFUPolicy,
+    TTL_POLICY : TTLPolicy
+}
+""" The map associating the name of the eviction policy
+with the class implementing it """
+
+HEADER_FORMAT = "!d"
+""" The format of the header of the cache files, containing
+the (modification) timestamp of the entry """
+
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+""" The size (in bytes) of the header of the cache files """
+
+CACHE_DIRECTORY_NAME = "colony_cache"
+""" The name of the (default) directory for the cache files,
+created under the temporary directory of the system """
+
 class DataCacheMap(object):
     """
     Cache based map structure that may be used to store
     in memory data indexed to a certain name (may be used
     as file path) and to a certain (modification) timestamp.
+
+    The map may be bounded by a maximum number of entries
+    and/or a maximum size (in bytes), in which case the entries
+    are evicted according to the (pluggable) eviction policy.
     """
 
     data_map = {}
@@ -49,12 +335,82 @@ class DataCacheMap(object):
     tuple containing both the data of the entry and the
     timestamp from when it was last modified """
 
-    def __init__(self):
+    sizes_map = {}
+    """ The map associating the name of the entry with
+    the size (in bytes) accounted for the data """
+
+    expires_map = {}
+    """ The map associating the name of the entry with the
+    time at which the entry expires (only for ttl) """
+
+    max_entries = None
+    """ The maximum number of entries in the map, in case
+    it's not set the number of entries is not bounded """
+
+    max_size = None
+    """ The maximum size (in bytes) of the data in the map,
+    in case it's not set the size is not bounded """
+
+    ttl = None
+    """ The time to live (in seconds) of the entries, in case
+    it's not set the entries do not expire """
+
+    policy = None
+    """ The eviction policy used to select the entries
+    to be evicted when the map is over its bounds """
+
+    size = 0
+    """ The current size (in bytes) of the data in the map """
+
+    hits = 0
+    """ The number of retrievals that returned data """
+
+    misses = 0
+    """ The number of retrievals that did not return data """
+
+    evictions = 0
+    """ The number of entries evicted (bounds and expiration) """
+
+    tier = None
+    """ The second level cache (eg: file cache map) used in case
+    the entry is not found in the map (l1), the additions and
+    removals are propagated to it (write through) """
+
+    lock = None
+    """ The lock that controls the access to the internal
+    structures of the map, the critical sections are kept
+    minimal (sizes and times are computed outside of it) """
+
+    def __init__(self, max_entries = None, max_size = None, policy = LRU_POLICY, ttl = None, tier = None):
         """
         Constructor of the class.
+
+        @type max_entries: int
+        @param max_entries: The maximum number of entries in the map.
+        @type max_size: int
+        @param max_size: The maximum size (in bytes) of the data in the map.
+        @type policy: String/CachePolicy
+        @param policy: The name of the eviction policy (lru, lfu or ttl)
+        or an instance of a custom eviction policy.
+        @type ttl: float
+        @param ttl: The time to live (in seconds) of the entries.
+        @type tier: FileCacheMap
+        @param tier: The second level cache to be used for the
+        entries not found in the map (eg: shared between processes).
         """
 
         self.data_map = {}
+        self.sizes_map = {}
+        self.expires_map = {}
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.ttl = ttl
+        self.policy = type(policy) in types.StringTypes and POLICIES_MAP[policy]() or policy
+        self.tier = tier
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.data_map)
 
     def get(self, name, timestamp = None):
         """
@@ -72,15 +428,11 @@ class DataCacheMap(object):
         @return: The object retrieved from the data cache map.
         """
 
-        # in case the name is not present in the data map the
-        # control must be returned to the caller function
-        if not name in self.data_map: return None
-
-        # retrieves and unpacks the data tuple into the data
-        # and the timestamp then if the timestamp value is provided
-        # validates it agains the "just" retrieved timestamp
-        data, _timestamp = self.data_map[name]
-        if timestamp and timestamp > _timestamp: return None
+        # retrieves the data from the map and in case it's not found
+        # and there's a second level cache tries to retrieve it from
+        # there, adding it to the map (without propagation)
+        data = self._get(name, timestamp)
+        if data == None and self.tier: data = self._get_tier(name, timestamp)
 
         # returns the "resolved" cached data
         return data
@@ -91,7 +443,8 @@ class DataCacheMap(object):
         is used as the key in the indexing process.
 
         The entry must contain both the data and the timestamp
-        for the association to be possible.
+        for the association to be possible, in case the map is
+        bounded the entries are evicted until it fits the bounds.
 
         @type name: String
         @param name: The name to be used as key in the map.
@@ -102,10 +455,11 @@ class DataCacheMap(object):
         process, for validation purposes.
         """
 
-        # creates a new tuple containing both the data and the
-        # timestamp and then sets it in the data map for the
-        # name key (will be latter retrieved base on that key)
-        self.data_map[name] = (data, timestamp)
+        # adds the entry to the map and then propagates it to the
+        # second level cache (only string data may be propagated)
+        self._add(name, data, timestamp)
+        if self.tier and type(data) in (types.StringType, types.BufferType):
+            self.tier.add(name, data, timestamp)
 
     def remove(self, name):
         """
@@ -116,7 +470,367 @@ class DataCacheMap(object):
         reference key to be used in the removal process.
         """
 
-        # in case the name is not present in the data map, returns
-        # immediately otherwise proceed with the removal process
-        if not name in self.data_map: return
+        self.lock.acquire()
+        try:
+            # in case the name is present in the data map
+            # proceeds with the removal process
+            if name in self.data_map: self._remove(name)
+        finally:
+            self.lock.release()
+
+        # propagates the removal to the second level cache
+        if self.tier: self.tier.remove(name)
+
+    def clear(self):
+        """
+        Removes all the entries from the map, the statistics
+        counters are kept.
+        """
+
+        self.lock.acquire()
+        try:
+            for name in self.data_map.keys(): self._remove(name)
+        finally:
+            self.lock.release()
+
+    def get_stats(self):
+        """
+        Retrieves a map with the statistics of the map, the
+        number of entries, the size and the hit, miss and
+        eviction counters.
+
+        @rtype: Dictionary
+        @return: The map containing the statistics of the map.
+        """
+
+        return {
+            "entries" : len(self.data_map),
+            "size" : self.size,
+            "hits" : self.hits,
+            "misses" : self.misses,
+            "evictions" : self.evictions
+        }
+
+    def _get(self, name, timestamp):
+        """
+        Retrieves the data associated with the provided name from
+        the map (only), updating the statistics counters.
+
+        @type name: String
+        @param name: The key name to retrieve the the associated
+        data from the map.
+        @type timestamp: float
+        @param timestamp: The optional timestamp vale to be used
+        in the validation of the retrieved item.
+        @rtype: Object
+        @return: The object retrieved from the map.
+        """
+
+        # retrieves the current time (outside of the lock) in
+        # case the expiration of the entries is enabled
+        current_time = self.ttl and time.time()
+
+        self.lock.acquire()
+        try:
+            # in case the name is not present in the data map the
+            # control must be returned to the caller function
+            if not name in self.data_map:
+                self.misses += 1
+                return None
+
+            # in case the entry is already expired it's removed
+            # and the control is returned to the caller function
+            if self.ttl and current_time >= self.expires_map[name]:
+                self._remove(name)
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            # retrieves and unpacks the data tuple into the data
+            # and the timestamp then if the timestamp value is provided
+            # validates it agains the "just" retrieved timestamp
+            data, _timestamp = self.data_map[name]
+            if timestamp and timestamp > _timestamp:
+                self.misses += 1
+                return None
+
+            # notifies the policy about the access to the entry
+            # and increments the number of hits
+            self.policy.access(name)
+            self.hits += 1
+        finally:
+            self.lock.release()
+
+        # returns the "resolved" cached data
+        return data
+
+    def _get_tier(self, name, timestamp):
+        """
+        Retrieves the data associated with the provided name from
+        the second level cache, adding it to the map in case it's
+        found and valid for the provided timestamp.
+
+        @type name: String
+        @param name: The key name to retrieve the the associated
+        data from the second level cache.
+        @type timestamp: float
+        @param timestamp: The optional timestamp vale to be used
+        in the validation of the retrieved item.
+        @rtype: Object
+        @return: The object retrieved from the second level cache.
+        """
+
+        # retrieves the entry from the second level cache and
+        # in case it's not found or is not valid returns
+        entry = self.tier.get_entry(name)
+        if not entry: return None
+        data, _timestamp = entry
+        if timestamp and timestamp > _timestamp: return None
+
+        # adds the entry to the map (l1) and returns the data
+        self._add(name, data, _timestamp)
+        return data
+
+    def _add(self, name, data, timestamp):
+        """
+        Adds a new cache entry to the map (only), evicting the
+        entries in excess according to the policy.
+
+        @type name: String
+        @param name: The name to be used as key in the map.
+        @type data: String
+        @param data: The data string to be used in the map.
+        @type timestamp: float
+        @param timestamp: The timestamp to be used in the indexing
+        process, for validation purposes.
+        """
+
+        # computes the size and the expiration time of the
+        # entry (outside of the lock)
+        size = self._size(data)
+        expires = self.ttl and time.time() + self.ttl
+
+        self.lock.acquire()
+        try:
+            # removes the previous entry for the name (if any) so
+            # that the accounting of the size remains valid
+            if name in self.data_map: self._remove(name)
+
+            # in case the data alone is larger than the maximum size
+            # it's not possible to store it in the map (ignored)
+            if self.max_size and size > self.max_size: return
+
+            # evicts the entries in excess according to the policy
+            # (before the addition so that the new entry is not
+            # selected for eviction)
+            self._evict(size)
+
+            # creates a new tuple containing both the data and the
+            # timestamp and then sets it in the data map for the
+            # name key (will be latter retrieved base on that key)
+            self.data_map[name] = (data, timestamp)
+            self.sizes_map[name] = size
+            if self.ttl: self.expires_map[name] = expires
+            self.size += size
+            self.policy.add(name)
+        finally:
+            self.lock.release()
+
+    def _evict(self, size):
+        """
+        Evicts the entries selected by the policy while the map
+        does not have room for a new entry with the given size,
+        must be called with the lock.
+
+        @type size: int
+        @param size: The size (in bytes) of the new entry.
+        """
+
+        while (self.max_entries and len(self.data_map) >= self.max_entries) or\
+            (self.max_size and self.size + size > self.max_size):
+            self._remove(self.policy.victim())
+            self.evictions += 1
+
+    def _remove(self, name):
+        """
+        Removes the entry with the given name from the internal
+        structures, must be called with the lock.
+
+        @type name: String
+        @param name: The name of the entry to be removed.
+        """
+
         del self.data_map[name]
+        self.size -= self.sizes_map.pop(name)
+        self.expires_map.pop(name, None)
+        self.policy.remove(name)
+
+    def _size(self, data):
+        """
+        Computes the size (in bytes) accounted for the given data,
+        strings (and buffers) are accounted by their length.
+
+        @type data: Object
+        @param data: The data to compute the size.
+        @rtype: int
+        @return: The size (in bytes) of the data.
+        """
+
+        if type(data) in (types.StringType, types.BufferType): return len(data)
+        return sys.getsizeof(data)
+
+class FileCacheMap(object):
+    """
+    Second level cache structure that stores the entries as
+    files in a directory (shared between processes), each file
+    is addressed by the digest of the name and contains the
+    timestamp of the entry followed by its data.
+
+    The data is read into a string and the file is closed
+    immediately, so that the entries kept in the first level
+    map never hold open file descriptors (or memory maps).
+    """
+
+    path = None
+    """ The path to the directory containing the cache files """
+
+    hits = 0
+    """ The number of retrievals that returned data """
+
+    misses = 0
+    """ The number of retrievals that did not return data """
+
+    def __init__(self, path = None):
+        """
+        Constructor of the class.
+
+        @type path: String
+        @param path: The path to the directory to be used for the
+        cache files, in case it's not defined a directory under the
+        temporary directory of the system is used.
+        """
+
+        self.path = path or os.path.join(tempfile.gettempdir(), CACHE_DIRECTORY_NAME)
+        if not os.path.isdir(self.path): os.makedirs(self.path)
+
+    def get(self, name, timestamp = None):
+        """
+        Retrieves the data associated with the provided
+        name and with a timestamp value equivalent to the
+        one provided (if any is provided).
+
+        @type name: String
+        @param name: The key name to retrieve the the associated
+        data from the cache.
+        @type timestamp: float
+        @param timestamp: The optional timestamp vale to be used
+        in the validation of the retrieved item.
+        @rtype: String
+        @return: The data associated with the name.
+        """
+
+        # retrieves the entry for the name and validates the
+        # timestamp of it against the provided one
+        entry = self.get_entry(name)
+        if not entry: return None
+        data, _timestamp = entry
+        if timestamp and timestamp > _timestamp: return None
+        return data
+
+    def get_entry(self, name):
+        """
+        Retrieves the entry for the provided name as a tuple
+        containing the data and the timestamp of the entry.
+
+        @type name: String
+        @param name: The key name to retrieve the entry.
+        @rtype: Tuple
+        @return: The tuple containing the data and the timestamp
+        of the entry, or an invalid value in case it's not found.
+        """
+
+        # opens the file for the entry, in case it does not
+        # exist the entry is not present in the cache
+        try: file = open(self._get_file_path(name), "rb")
+        except IOError: file = None
+        if not file:
+            self.misses += 1
+            return None
+
+        # reads the header and the data of the entry closing the
+        # file right after (no descriptor is kept by the entry)
+        # note that an incomplete file is considered to be a miss
+        try:
+            header = file.read(HEADER_SIZE)
+            data = file.read() if len(header) == HEADER_SIZE else None
+        finally:
+            file.close()
+        if data == None:
+            self.misses += 1
+            return None
+
+        # unpacks the timestamp from the header
+        # and increments the number of hits
+        timestamp, = struct.unpack(HEADER_FORMAT, header)
+        self.hits += 1
+
+        # returns the tuple containing both the data
+        # and the timestamp of the entry
+        return data, timestamp
+
+    def add(self, name, data, timestamp):
+        """
+        Adds a new cache entry to the cache, the file is written
+        to a temporary file and then renamed so that the other
+        processes never read a partially written entry.
+
+        @type name: String
+        @param name: The name to be used as key in the cache.
+        @type data: String
+        @param data: The data string to be used in the cache.
+        @type timestamp: float
+        @param timestamp: The timestamp to be used in the indexing
+        process, for validation purposes.
+        """
+
+        # writes the header and the data into a temporary
+        # file in the same directory (required for the rename)
+        file_path = self._get_file_path(name)
+        handle, temporary_path = tempfile.mkstemp(dir = self.path)
+        file = os.fdopen(handle, "wb")
+        try:
+            file.write(struct.pack(HEADER_FORMAT, timestamp or 0.0))
+            file.write(data)
+        finally:
+            file.close()
+
+        # renames the temporary file into the final file, in case
+        # the rename fails (eg: target in use) the entry is ignored
+        try: os.rename(temporary_path, file_path)
+        except OSError: os.remove(temporary_path)
+
+    def remove(self, name):
+        """
+        Removes the data item with the provided name from the cache.
+
+        @type name: String
+        @param name: The name of the item to be removed, this is the
+        reference key to be used in the removal process.
+        """
+
+        try: os.remove(self._get_file_path(name))
+        except OSError: pass
+
+    def _get_file_path(self, name):
+        """
+        Retrieves the path to the file of the entry with the
+        given name, using the digest of the name as file name.
+
+        @type name: String
+        @param name: The name of the entry.
+        @rtype: String
+        @return: The path to the file of the entry.
+        """
+
+        if type(name) == types.UnicodeType: name = name.encode("utf-8")
+        return os.path.join(self.path, hashlib.sha1(name).hexdigest())
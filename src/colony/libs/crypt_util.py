@@ -37,8 +37,17 @@ __copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
 __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
+import os
 import re
+import hmac
+import time
 import hashlib
+import threading
+
+import cache_util
+
+try: import multiprocessing
+except: multiprocessing = None
 
 HASH_VALUE = "hash"
 """ The hash value """
@@ -67,6 +76,22 @@ DEFAULT_MD5_CRYPT_MAGIC = "$1$"
 DEFAULT_HASH_SET = (MD5_VALUE, SHA1_VALUE, SHA256_VALUE)
 """ The default hash set """
 
+DEFAULT_PROCESSES = 0
+""" The default number of processes of the password service
+pool, zero runs the verifications synchronously (no pool) """
+
+DEFAULT_CACHE_SIZE = 1024
+""" The default maximum number of (successful) verifications
+kept in the cache of the password service """
+
+DEFAULT_CACHE_TTL = 300.0
+""" The default time to live (in seconds) of the
+verifications in the cache of the password service """
+
+DEFAULT_BENCHMARK_COUNT = 1000
+""" The default number of logins to be used in the
+benchmark of the password service """
+
 INTEGER_TO_ASCII_64 = "./0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
 """ The array of conversion from integer to ascii """
 
@@ -429,6 +454,27 @@ def md5_crypt(password, salt, magic = DEFAULT_MD5_CRYPT_MAGIC):
     # returns the md5 crypt value
     return md5_crypt_value
 
+def md5_crypt_match(md5_crypt_value, password):
+    """
+    Checks if the given md5 crypt value matches the given
+    password, using the salt and magic of the value.
+
+    @type md5_crypt_value: String
+    @param md5_crypt_value: The md5 crypt value (eg: $1$salt$hash).
+    @type password: String
+    @param password: The base password for checking.
+    @rtype: bool
+    @return: The result of the password match checking.
+    """
+
+    # splits the md5 crypt value into the magic, the salt
+    # and the hash (the magic is surrounded by separators)
+    _empty, magic, salt, _hash = md5_crypt_value.split(MD5_CRPYT_SEPARATOR, 3)
+    magic = MD5_CRPYT_SEPARATOR + magic + MD5_CRPYT_SEPARATOR
+
+    # checks if the md5 crypt value for the password matches
+    return md5_crypt(password, salt, magic) == md5_crypt_value
+
 def generate_hash_digest_map(file_path, hash_set = DEFAULT_HASH_SET):
     """
     Generates a map containing a set of hash digests generate
@@ -502,3 +548,287 @@ def generate_hash_digest_map(file_path, hash_set = DEFAULT_HASH_SET):
 
     # returns the hash digest map
     return hash_digest_map
+
+def _password_verify(password_hash, password, salt = ""):
+    """
+    Verifies the given password against the password hash,
+    supporting both the password hash (eg: {md5}hash) and the
+    md5 crypt (eg: $1$salt$hash) formats.
+    This function is run in the processes of the password
+    service pool (must be defined at the module level).
+
+    @type password_hash: String
+    @param password_hash: The password hash or md5 crypt value.
+    @type password: String
+    @param password: The base password for checking.
+    @type salt: String
+    @param salt: The base salt for checking (password hash only).
+    @rtype: bool
+    @return: The result of the password match checking.
+    """
+
+    if password_hash.startswith(MD5_CRPYT_SEPARATOR): return md5_crypt_match(password_hash, password)
+    return password_match(password_hash, password, salt)
+
+def _password_verify_tuple(arguments):
+    """
+    Verifies the password for the given tuple of arguments,
+    to be used in the mapping of the pool.
+
+    @type arguments: Tuple
+    @param arguments: The tuple containing the password hash,
+    the password and (optionally) the salt.
+    @rtype: bool
+    @return: The result of the password match checking.
+    """
+
+    return _password_verify(*arguments)
+
+class PasswordService(object):
+    """
+    Service that verifies passwords in a pool of processes,
+    so that the (expensive) hashing does not block the calling
+    threads (and the interpreter lock).
+
+    The pool is opt-in (processes) and is only created in the
+    start of the service, that should be done before the creation
+    of other threads (forking a multi-threaded process may deadlock
+    the children), until then the verifications are synchronous.
+
+    The successful verifications are kept in a bounded cache
+    indexed by a keyed hmac of the values, so that no password
+    is kept in memory and the keys are only valid for the process.
+    """
+
+    processes = DEFAULT_PROCESSES
+    """ The number of processes of the pool, zero
+    runs the verifications synchronously """
+
+    cache = None
+    """ The cache of the successful verifications, indexed
+    by the keyed hmac of the hash, password and salt """
+
+    key = None
+    """ The (random) secret key for the hmac of the cache,
+    created for each of the service instances """
+
+    pool = None
+    """ The pool of processes, created in the start of the service """
+
+    users = 0
+    """ The number of threads currently using the pool """
+
+    condition = None
+    """ The condition that controls the access to the pool
+    and the waiting for its users (in the stop) """
+
+    def __init__(self, processes = DEFAULT_PROCESSES, cache_size = DEFAULT_CACHE_SIZE, cache_ttl = DEFAULT_CACHE_TTL):
+        """
+        Constructor of the class.
+
+        @type processes: int
+        @param processes: The number of processes of the pool, none
+        uses the number of cpus and zero (default) runs synchronously.
+        @type cache_size: int
+        @param cache_size: The maximum number of verifications in the cache.
+        @type cache_ttl: float
+        @param cache_ttl: The time to live (in seconds) of the
+        verifications in the cache.
+        """
+
+        self.processes = processes
+        self.cache = cache_util.DataCacheMap(max_entries = cache_size, ttl = cache_ttl)
+        self.key = os.urandom(32)
+        self.condition = threading.Condition()
+
+    def start(self):
+        """
+        Starts the service, creating the pool of processes (in case
+        the processes are set and the multiprocessing is available).
+        This method should be called before the creation of other
+        threads, as it forks the current process.
+        """
+
+        # in case there's no multiprocessing support or the
+        # number of processes is zero there's no pool
+        if not multiprocessing or self.processes == 0: return
+
+        # acquires the condition and creates the pool
+        # in case it's not yet created
+        self.condition.acquire()
+        try:
+            if not self.pool: self.pool = multiprocessing.Pool(self.processes)
+        finally:
+            self.condition.release()
+
+    def stop(self):
+        """
+        Stops the service, closing the pool of processes (in case
+        it has been created) after its current users finish.
+        """
+
+        # acquires the condition and unsets the pool waiting
+        # for the threads currently using it (the following
+        # verifications are run synchronously)
+        self.condition.acquire()
+        try:
+            pool = self.pool
+            self.pool = None
+            while self.users: self.condition.wait()
+        finally:
+            self.condition.release()
+
+        # in case there's no pool there's
+        # nothing to be done
+        if not pool: return
+
+        # closes the pool and waits for the
+        # processes to terminate
+        pool.close()
+        pool.join()
+
+    def match(self, password_hash, password, salt = ""):
+        """
+        Checks if the given password hash (or md5 crypt value)
+        matches the given password, the verification is run in
+        the pool unless it's found in the cache.
+
+        @type password_hash: String
+        @param password_hash: The password hash or md5 crypt value.
+        @type password: String
+        @param password: The base password for checking.
+        @type salt: String
+        @param salt: The base salt for checking (password hash only).
+        @rtype: bool
+        @return: The result of the password match checking.
+        """
+
+        return self.match_many(((password_hash, password, salt),))[0]
+
+    def match_many(self, items, cache = True):
+        """
+        Checks a batch of passwords, the verifications not found
+        in the cache are distributed among the processes of the pool.
+
+        @type items: List
+        @param items: The sequence of tuples containing the password
+        hash, the password and (optionally) the salt.
+        @type cache: bool
+        @param cache: If the cache should be used for the verifications.
+        @rtype: List
+        @return: The list of results of the password match checking.
+        """
+
+        # creates the list of results and the list of
+        # indexes of the items pending verification
+        results = [False] * len(items)
+        pending = []
+
+        # iterates over all the items to resolve the
+        # ones in the cache (successful verifications)
+        for index, item in enumerate(items):
+            if cache and self.cache.get(self._get_cache_key(item)): results[index] = True
+            else: pending.append(index)
+
+        # in case there are no items pending verification
+        # returns the results immediately
+        if not pending: return results
+
+        # verifies the pending items (using the pool in case
+        # it's available) and sets the results, adding the
+        # successful verifications to the cache
+        pending_items = [items[index] for index in pending]
+        pending_results = self._verify(pending_items)
+        for index, item, result in zip(pending, pending_items, pending_results):
+            results[index] = result
+            if result and cache: self.cache.add(self._get_cache_key(item), True, None)
+
+        # returns the results
+        return results
+
+    def benchmark(self, count = DEFAULT_BENCHMARK_COUNT, cache = False):
+        """
+        Runs a benchmark of the service, verifying the given number
+        of (md5 crypt) logins, retrieving the logins per second.
+
+        @type count: int
+        @param count: The number of logins to be verified.
+        @type cache: bool
+        @param cache: If the cache should be used (one login at a
+        time) or the logins should be verified in a batch.
+        @rtype: float
+        @return: The number of logins verified per second.
+        """
+
+        # creates the (md5 crypt) password hash and
+        # the items to be verified
+        password = "benchmark"
+        password_hash = md5_crypt(password, "benchmk")
+        items = [(password_hash, password)] * count
+
+        # verifies the items (either one at a time using the cache
+        # or in a batch) measuring the elapsed time
+        initial = time.time()
+        if cache:
+            for item in items: self.match(*item)
+        else:
+            self.match_many(items, False)
+        elapsed = time.time() - initial
+
+        # returns the logins per second
+        return count / max(elapsed, 1e-6)
+
+    def _verify(self, items):
+        """
+        Verifies the given items using the pool of processes, in
+        case it's available, or synchronously otherwise, the pool
+        is kept in use (not closed) during the verification.
+
+        @type items: List
+        @param items: The list of tuples containing the password
+        hash, the password and (optionally) the salt.
+        @rtype: List
+        @return: The list of results of the password match checking.
+        """
+
+        # acquires the condition and retrieves the pool, registering
+        # the current thread as user of it (in case it's set)
+        self.condition.acquire()
+        try:
+            pool = self.pool
+            if pool: self.users += 1
+        finally:
+            self.condition.release()
+
+        # in case there's no pool the verifications
+        # are run synchronously (current thread)
+        if not pool: return map(_password_verify_tuple, items)
+
+        # verifies the items in the pool and then unregisters the
+        # current thread as user of it (notifying the stop)
+        try:
+            return pool.map(_password_verify_tuple, items)
+        finally:
+            self.condition.acquire()
+            try:
+                self.users -= 1
+                self.condition.notify_all()
+            finally:
+                self.condition.release()
+
+    def _get_cache_key(self, item):
+        """
+        Retrieves the key for the cache for the given item,
+        as the keyed hmac of the values of the item.
+
+        @type item: Tuple
+        @param item: The tuple containing the password hash,
+        the password and (optionally) the salt.
+        @rtype: String
+        @return: The key for the cache for the item.
+        """
+
+        # unpacks the item (the salt is optional) and creates the
+        # keyed hmac for the values of the item
+        password_hash, password, salt = (tuple(item) + ("",))[:3]
+        return hmac.new(self.key, "\0".join((password_hash, password, salt)), hashlib.sha256).digest()
@@ -37,8 +37,30 @@ __copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
 __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
+import struct
 import binascii
 
+STRUCT_FORMATS = {
+    1 : "b",
+    2 : "h",
+    4 : "i",
+    8 : "q"
+}
+""" The map associating the fixed widths (in bytes) with the
+(signed) struct format characters to be used for them """
+
+MAXIMUM_STRUCT_WIDTH = 8
+""" The maximum width (in bytes) of the values to be
+encoded and decoded using the struct module """
+
+LENGTH_FORMAT = "<I"
+""" The format of the length prefix of the values in
+the (variable width) batch encoding """
+
+LENGTH_SIZE = struct.calcsize(LENGTH_FORMAT)
+""" The size of the length prefix of the values in
+the (variable width) batch encoding """
+
 def encode_two_complement_string(long_value):
     """
     Encode a long to a two's complement little-endian binary string.
@@ -55,75 +77,25 @@ def encode_two_complement_string(long_value):
     if long_value == 0:
         # returns empty string
         return ""
-    # in case the long value is larger
-    # than zero
-    elif long_value > 0:
-        # converts the long value to the hexadecimal string value
-        long_value_hexadecial = hex(long_value)
-
-        # counts the number of nibbles in the given value
-        number_nibbles = _count_nibbles(long_value_hexadecial)
-
-        # in case the number of nibbles is odd
-        if number_nibbles & 1:
-            # need an even # of nibbles for unhexlify
-            long_value_hexadecial = "0x0" + long_value_hexadecial[2:]
-        # in case the number i
-        elif int(long_value_hexadecial[2], 16) >= 8:
-            # looks negative so need a byte of sign bits
-            long_value_hexadecial = "0x00" + long_value_hexadecial[2:]
-    else:
-        # converts the (negative) long value to the hexadecimal string value
-        long_value_hexadecial = hex(-long_value)
-
-        # counts the number of nibbles in the given value
-        number_nibbles = _count_nibbles(long_value_hexadecial)
-
-        # in case the number of nibbles is odd
-        if number_nibbles & 1:
-            # extends to a full byte.
-            number_nibbles += 1
-
-        # calculates the number of bits from the nibbles
-        number_bits = number_nibbles * 4
 
-        # puts the negative indication as the last digit
-        long_value += 1L << number_bits
-
-        # converts the long value to the hexadecimal string value
-        long_value_hexadecial = hex(long_value)
-
-        # counts the number of nibbles in the given value
-        new_number_nibbles = _count_nibbles(long_value_hexadecial)
-
-        # in case the new number of nibbles is smaller than
-        # the previous one
-        if new_number_nibbles < number_nibbles:
-            # puts the sign bits
-            long_value_hexadecial = "0x" + "0" * (number_nibbles - new_number_nibbles) + long_value_hexadecial[2:]
-        # in case it's a positive number
-        if int(long_value_hexadecial[2], 16) < 8:
-            # no need a byte of sign bits
-            long_value_hexadecial = "0xff" + long_value_hexadecial[2:]
-
-    # in case the long value hexadecimal ends with the long
-    # indication value
-    if long_value_hexadecial.endswith("L"):
-        # removes the last character to avoid the extra long indication
-        long_value_hexadecial = long_value_hexadecial[2:-1]
-    # otherwise
-    else:
-        # sets the normal value without the "0x" initialization
-        long_value_hexadecial = long_value_hexadecial[2:]
-
-    # unhexflies the value retrieving the binary value
-    binary = binascii.unhexlify(long_value_hexadecial)
-
-    # reverses the binary value
-    reversed_binary = binary[::-1]
-
-    # returns the reversed binary value
-    return reversed_binary
+    # calculates the (minimum) number of bytes required to hold the
+    # value, including the sign bit (the negative values are measured
+    # through their complement)
+    number_bits = (long_value < 0 and ~long_value or long_value).bit_length() + 1
+    number_bytes = (number_bits + 7) >> 3
+
+    # in case the number of bytes fits the struct width the value
+    # is packed (little-endian) and truncated to the number of bytes
+    if number_bytes <= MAXIMUM_STRUCT_WIDTH:
+        return struct.pack("<q", long_value)[:number_bytes]
+
+    # converts the value into its (unsigned) two's complement form
+    # and then into the hexadecimal string with the proper width
+    long_value_hexadecimal = "%0*x" % (number_bytes * 2, long_value % (1L << (number_bytes * 8)))
+
+    # unhexlifies the value retrieving the binary value
+    # and reverses it (little-endian)
+    return binascii.unhexlify(long_value_hexadecimal)[::-1]
 
 def decode_two_complement_string(data):
     """
@@ -143,12 +115,15 @@ def decode_two_complement_string(data):
         # return zero
         return 0L
 
-    # converts the (inverted) data to hexadecimal string
-    long_value_hexadecial = binascii.hexlify(data[::-1])
+    # in case the data fits the struct width the data is padded
+    # with the sign bytes and unpacked (little-endian)
+    if data_length <= MAXIMUM_STRUCT_WIDTH:
+        padding = data[-1] >= "\x80" and "\xff" or "\x00"
+        return long(struct.unpack("<q", data + padding * (MAXIMUM_STRUCT_WIDTH - data_length))[0])
 
-    # converts the long value hexadecimal to integer
-    # using base 16
-    long_value = long(long_value_hexadecial, 16)
+    # converts the (inverted) data to hexadecimal string and then
+    # to integer using base 16
+    long_value = long(binascii.hexlify(data[::-1]), 16)
 
     # in case the last digit is 0x80 (negative)
     if data[-1] >= "\x80":
@@ -158,24 +133,87 @@ def decode_two_complement_string(data):
     # returns the long value
     return long_value
 
-def _count_nibbles(long_value_hexadecial):
+def encode_two_complement_list(long_values, width = None):
     """
-    Calculates the number of nibbles (4 bit group) from the given
-    long value encoded in hexadecimal string.
-
-    @type long_value_hexadecial: String
-    @param long_value_hexadecial: The long value encoded in
-    hexadecimal string to count the nibbles.
-    @rtype: int
-    @return: The number of nibbles in the given value.
+    Encodes the given sequence of longs into a single (contiguous)
+    two's complement little-endian binary string.
+    In case the width is set every value is encoded with that width,
+    otherwise the values are encoded with the minimum width and
+    prefixed with their length.
+
+    @type long_values: List
+    @param long_values: The sequence of long values to be encoded.
+    @type width: int
+    @param width: The fixed width (in bytes) to be used for
+    each of the values.
+    @rtype: String
+    @return: The encoded two's complement little-endian binary string.
     """
 
-    # calculates the number of "junk" characters
-    number_junk_characters = 2 + long_value_hexadecial.endswith("L")
+    # in case the width is not set every value is encoded with
+    # the minimum width and prefixed with the length
+    if width == None:
+        encoded_values = [encode_two_complement_string(long_value) for long_value in long_values]
+        return "".join([struct.pack(LENGTH_FORMAT, len(value)) + value for value in encoded_values])
+
+    # in case the width has a struct format all the values
+    # are packed at once (fast path)
+    if width in STRUCT_FORMATS:
+        try: return struct.pack("<%d%s" % (len(long_values), STRUCT_FORMATS[width]), *long_values)
+        except struct.error: raise ValueError("value out of range for width %d" % width)
+
+    # creates the list of encoded values, padding each of
+    # the values with the sign bytes up to the width
+    encoded_values = []
+    for long_value in long_values:
+        value = encode_two_complement_string(long_value)
+        if len(value) > width: raise ValueError("value out of range for width %d" % width)
+        encoded_values.append(value + (long_value < 0 and "\xff" or "\x00") * (width - len(value)))
+
+    # joins the encoded values into the binary string
+    return "".join(encoded_values)
+
+def decode_two_complement_list(data, width = None):
+    """
+    Decodes a list of longs from a (contiguous) two's complement
+    little-endian binary string, created with the same width.
 
-    # calculates the number of nibbles from the length of the
-    # long value string without the junk characters
-    number_nibbles = len(long_value_hexadecial) - number_junk_characters
+    @type data: String
+    @param data: The data to be used in the decoding.
+    @type width: int
+    @param width: The fixed width (in bytes) used for
+    each of the values.
+    @rtype: List
+    @return: The list of decoded values.
+    """
 
-    # returns the number of nibbles
-    return number_nibbles
+    # in case the width is not set the values are decoded
+    # using the length prefix of each of them
+    if width == None:
+        # creates the list of values and the
+        # initial offset for the decoding
+        long_values = []
+        offset = 0
+        data_length = len(data)
+
+        # iterates while there is data to be decoded
+        while offset < data_length:
+            length, = struct.unpack_from(LENGTH_FORMAT, data, offset)
+            offset += LENGTH_SIZE
+            long_values.append(decode_two_complement_string(data[offset:offset + length]))
+            offset += length
+
+        # returns the list of decoded values
+        return long_values
+
+    # in case the data length is not a multiple of
+    # the width the data is not valid
+    if len(data) % width: raise ValueError("invalid data length for width %d" % width)
+
+    # in case the width has a struct format all the values
+    # are unpacked at once (fast path)
+    if width in STRUCT_FORMATS:
+        return list(struct.unpack("<%d%s" % (len(data) / width, STRUCT_FORMATS[width]), data))
+
+    # decodes each of the values (slices) of the data
+    return [decode_two_complement_string(data[index:index + width]) for index in xrange(0, len(data), width)]
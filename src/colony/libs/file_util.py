@@ -1091,10 +1091,10 @@ class FileTransactionContext(FileContext, TransactionContext):
             # calls the pre (before) commit callbacks
             self._call_pre_commit_callbacks()
 
-            # creates a no duplicates list from the path tuples
-            # list, this will ensure that no duplicate operations
-            # exist (this is a critical performance trick)
-            path_tuples_list = remove_duplicates and list_util.list_no_duplicates(self.path_tuples_list) or self.path_tuples_list
+            # creates a no duplicates (hash based) generator from the
+            # path tuples list, this will ensure that no duplicate
+            # operations exist (this is a critical performance trick)
+            path_tuples_list = remove_duplicates and list_util.list_no_duplicates_generator(self.path_tuples_list) or self.path_tuples_list
 
             # iterates over all the path tuples in
             # path tuples list
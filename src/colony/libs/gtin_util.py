@@ -39,6 +39,14 @@ __license__ = "GNU General Public License (GPL), Version 3"
 
 import number_util
 
+WEIGHTED_DIGITS_MAP = dict((str(digit), digit * 3) for digit in range(10))
+""" The (lookup) map associating the digits with their
+weighted (multiplied by three) values """
+
+DIGITS_MAP = dict((str(digit), digit) for digit in range(10))
+""" The (lookup) map associating the digits with
+their (integer) values """
+
 def calculate_control_value(number):
     """
     Calculates the control value for the given
@@ -54,23 +62,15 @@ def calculate_control_value(number):
     # calculates the number of digits in the number
     number_digits = number_util.get_number_length(number)
 
-    # starts the accumulator
-    accumulator = 0
-
-    # iterates over the range of the number of digits
-    for index in range(number_digits):
-        # in case it's even, sets the multiplier as one
-        # otherwise it must be odd and the multiplier
-        # should be set as three
-        if index % 2: multiplier = 1
-        else: multiplier = 3
-
-        # retrieves the current digit
-        current_digit = number_util.get_digit(number, index)
+    # retrieves the digits of the number starting with the
+    # least significant one (limited to the number of digits)
+    digits = str(number)[::-1][:number_digits]
 
-        # increments the accumulator with the current digit
-        # multiplied with the current multiplier
-        accumulator += current_digit * multiplier
+    # calculates the accumulator from the digits using the lookup
+    # maps, the even indexes use the multiplier three and the
+    # odd indexes the multiplier one
+    accumulator = sum([WEIGHTED_DIGITS_MAP[digit] for digit in digits[::2]])
+    accumulator += sum([DIGITS_MAP[digit] for digit in digits[1::2]])
 
     # calculates the partial value from
     # the accumulator value
@@ -82,3 +82,17 @@ def calculate_control_value(number):
 
     # returns the control value
     return control_value
+
+def calculate_control_values(numbers):
+    """
+    Calculates the control values for the given
+    iterable of numbers (batch calculation).
+
+    @type numbers: Iterable
+    @param numbers: The iterable of numbers to calculate
+    the control values.
+    @rtype: List
+    @return: The list of control values for the numbers.
+    """
+
+    return [calculate_control_value(number) for number in numbers]
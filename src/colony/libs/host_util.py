@@ -37,8 +37,12 @@ __copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
 __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
+import time
 import socket
 import struct
+import threading
+
+import colony.libs.update_thread_util
 
 LOCAL_EXTENSION = ".local"
 """ The local extension value """
@@ -64,6 +68,55 @@ DEFAULT_IP6_HOST = "ipv6.google.com"
 DEFAULT_PORT = 80
 """ The default port to be used for queries """
 
+DEFAULT_TTL = 300.0
+""" The default time to live (in seconds) of the host
+information, used as the interval of the refreshes """
+
+HOST_INFO_CHANGED_EVENT = "host_info.changed"
+""" The name of the event generated (in the plugin manager)
+when the host information changes """
+
+host_info = None
+""" The process wide host information (lazily created) """
+
+host_info_lock = threading.Lock()
+""" The lock that controls the creation of the host information """
+
+def get_host_info(manager = None, ttl = DEFAULT_TTL, force = False):
+    """
+    Retrieves the process wide host information, creating and
+    starting it (background refresh) in case it's not yet available.
+
+    The time to live is only used in the creation of the host
+    information, while the manager and the force flag are also
+    set in an already created host information (in case they're set).
+
+    @type manager: PluginManager
+    @param manager: The plugin manager to be notified of
+    the changes in the host information (optional).
+    @type ttl: float
+    @param ttl: The time to live (in seconds) of the information.
+    @type force: bool
+    @param force: If the "force" methods (remote connection) should
+    be used when the "normal" address retrieval fails.
+    @rtype: HostInfo
+    @return: The process wide host information.
+    """
+
+    global host_info
+
+    host_info_lock.acquire()
+    try:
+        if not host_info:
+            host_info = HostInfo(ttl = ttl, manager = manager, force = force)
+            host_info.start()
+        if manager: host_info.manager = manager
+        if force: host_info.force = force
+    finally:
+        host_info_lock.release()
+
+    return host_info
+
 def get_hostname():
     """"
     Retrieves the current base host name.
@@ -429,3 +482,221 @@ def ip6_address_to_network(ip6_address):
 
     # returns the ip6 address network
     return ip6_address_network
+
+class HostInfo(object):
+    """
+    Service that resolves the information of the host (names and
+    addresses) once and keeps it cached for a time to live, the
+    refreshes are run in the background (timer wheel) so that the
+    getters never require socket or system call work.
+
+    The changes in the information are notified to the plugin
+    manager (in case it's set) using the host info changed event.
+    """
+
+    ttl = DEFAULT_TTL
+    """ The time to live (in seconds) of the information,
+    used as the interval of the background refreshes """
+
+    manager = None
+    """ The plugin manager to be notified of the changes """
+
+    force = False
+    """ If the "force" methods (remote connection) should be
+    used when the "normal" address retrieval fails """
+
+    values = None
+    """ The map containing the cached host information """
+
+    expires = None
+    """ The timestamp at which the cached information expires """
+
+    timer = None
+    """ The timer (handle) of the background refresh """
+
+    lock = None
+    """ The lock that controls the refresh of the information """
+
+    def __init__(self, ttl = DEFAULT_TTL, manager = None, force = False):
+        """
+        Constructor of the class.
+
+        @type ttl: float
+        @param ttl: The time to live (in seconds) of the information.
+        @type manager: PluginManager
+        @param manager: The plugin manager to be notified of the changes.
+        @type force: bool
+        @param force: If the "force" methods (remote connection) should
+        be used when the "normal" address retrieval fails.
+        """
+
+        self.ttl = ttl
+        self.manager = manager
+        self.force = force
+        self.lock = threading.RLock()
+
+    def start(self):
+        """
+        Starts the service, resolving the information (in case it's
+        not yet resolved) and scheduling the background refresh.
+        """
+
+        # resolves the information inline in case it's not yet
+        # resolved (blocks the start), so that the accesses after
+        # the start are never blocked by the resolution
+        if self.values == None: self.refresh()
+
+        # schedules the background refresh in the
+        # process wide timer wheel (in case it's not
+        # already scheduled)
+        self.lock.acquire()
+        try:
+            if self.timer: return
+            timer_wheel = colony.libs.update_thread_util.get_timer_wheel()
+            self.timer = timer_wheel.add_timer(self.refresh, self.ttl)
+        finally:
+            self.lock.release()
+
+    def stop(self):
+        """
+        Stops the service, cancelling the background refresh
+        (the cached information remains available).
+        """
+
+        # acquires the lock and unsets the timer
+        self.lock.acquire()
+        try: timer = self.timer; self.timer = None
+        finally: self.lock.release()
+
+        # cancels the timer in case it's set
+        timer and timer.cancel()
+
+    def refresh(self):
+        """
+        Resolves the information of the host, replacing the cached
+        values and notifying the plugin manager of the changes.
+
+        @rtype: Dictionary
+        @return: The map containing the (new) host information.
+        """
+
+        # resolves the information of the host (outside of the lock
+        # so that the getters are never blocked by the resolution)
+        values = {
+            "hostname" : get_hostname(),
+            "hostname_local" : get_hostname_local(),
+            "addresses_ip4" : get_addresses_ip4(),
+            "addresses_ip6" : get_addresses_ip6()
+        }
+
+        # retrieves the "preferred" addresses from the lists
+        # of addresses, using the "force" methods in case they're
+        # not available and the force flag is set
+        address_ip4 = values["addresses_ip4"] and values["addresses_ip4"][0] or ALL_IP4_ADDRESS
+        address_ip6 = values["addresses_ip6"] and values["addresses_ip6"][0] or ALL_IP6_ADDRESS
+        if self.force and address_ip4 == ALL_IP4_ADDRESS: address_ip4 = get_address_ip4_force()
+        if self.force and address_ip6 == ALL_IP6_ADDRESS: address_ip6 = get_address_ip6_force()
+        values["address_ip4"] = address_ip4
+        values["address_ip6"] = address_ip6
+
+        # acquires the lock and swaps the values, setting the
+        # new expiration timestamp of the information
+        self.lock.acquire()
+        try:
+            previous = self.values
+            self.values = values
+            self.expires = time.time() + self.ttl
+        finally:
+            self.lock.release()
+
+        # computes the changes in the values (no changes are
+        # notified for the first resolution)
+        changes = previous and dict([(name, (previous[name], value)) for name, value in values.items() if not previous[name] == value]) or {}
+
+        # notifies the plugin manager of the changes
+        # in case there are changes and a manager is set
+        if changes and self.manager: self.manager.generate_event(HOST_INFO_CHANGED_EVENT, [self, changes])
+
+        # returns the values
+        return values
+
+    def get_hostname(self):
+        """
+        Retrieves the (cached) current base host name.
+
+        @rtype: String
+        @return: The current base host name.
+        """
+
+        return self._get_value("hostname")
+
+    def get_hostname_local(self):
+        """
+        Retrieves the (cached) current base host name.
+        The host name is returned in local notation.
+
+        @rtype: String
+        @return: The current base host name (in local notation).
+        """
+
+        return self._get_value("hostname_local")
+
+    def get_address_ip4(self):
+        """
+        Retrieves the (cached) current "preferred" ip4 address.
+
+        @rtype: String
+        @return: The current "preferred" ip4 address.
+        """
+
+        return self._get_value("address_ip4")
+
+    def get_address_ip6(self):
+        """
+        Retrieves the (cached) current "preferred" ip6 address.
+
+        @rtype: String
+        @return: The current "preferred" ip6 address.
+        """
+
+        return self._get_value("address_ip6")
+
+    def get_addresses_ip4(self):
+        """
+        Retrieves the (cached) list currently available ip4 addresses.
+
+        @rtype: List
+        @return: The list currently available ip4 addresses.
+        """
+
+        return list(self._get_value("addresses_ip4"))
+
+    def get_addresses_ip6(self):
+        """
+        Retrieves the (cached) list currently available ip6 addresses.
+
+        @rtype: List
+        @return: The list currently available ip6 addresses.
+        """
+
+        return list(self._get_value("addresses_ip6"))
+
+    def _get_value(self, name):
+        """
+        Retrieves the cached value for the given name, the information
+        is only resolved inline in case it's not yet resolved or in
+        case it's expired and there's no background refresh.
+
+        @type name: String
+        @param name: The name of the value to be retrieved.
+        @return: The cached value for the given name.
+        """
+
+        # retrieves the values (reference) and checks if they
+        # must be resolved inline (the background refresh is
+        # the common case and keeps the values fresh)
+        values = self.values
+        if values == None or (not self.timer and time.time() > self.expires): values = self.refresh()
+
+        # returns the value for the name
+        return values[name]
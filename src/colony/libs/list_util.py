@@ -54,7 +54,32 @@ def list_intersect(first_list, second_list):
     """
 
     # returns the intersection resulting list
-    return [value for value in first_list if value in second_list]
+    return [value for value in list_intersect_generator(first_list, second_list)]
+
+def list_intersect_generator(first_iterable, second_list):
+    """
+    Generator that intersects the given iterable with the
+    given list, yielding the elements of the iterable that
+    are contained in the list (streaming).
+
+    @type first_iterable: Iterable
+    @param first_iterable: The first iterable to be used in
+    intersection (may be a generator).
+    @type second_list: List
+    @param second_list: The second list to be used in intersection.
+    @rtype: Generator
+    @return: The generator of the elements contained
+    in both sequences (intersection).
+    """
+
+    # creates the set of (hashable) values of the second
+    # list to be used in the (hash based) membership check
+    second_set = _list_set(second_list)
+
+    # iterates over all the values in the first iterable
+    # yielding the ones contained in the second list
+    for value in first_iterable:
+        if _list_contains(value, second_set, second_list): yield value
 
 def list_extend(base_list, extension_list, copy_base_list = True):
     """
@@ -83,7 +108,8 @@ def list_extend(base_list, extension_list, copy_base_list = True):
 
     # creates the list of values that are "new" to the base
     # list (in order to avoid duplicates)
-    filtered_list = [value for value in extension_list if not value in base_list]
+    base_set = _list_set(base_list)
+    filtered_list = [value for value in extension_list if not _list_contains(value, base_set, base_list)]
 
     # extends the result list with the filtered list (new elements)
     result_list.extend(filtered_list)
@@ -98,6 +124,13 @@ def list_exclude(base_list, exclusion_list, copy_base_list = True):
     The base list may be changed or left untouched based on
     the copy base list flag.
 
+    In case an exclusion item is not found a value error is
+    raised, note that the (hashable) exclusion items are all
+    checked before any change, so the base list is left unchanged
+    (previously the items were removed until the first miss), the
+    unhashable items are removed after and a miss in them leaves
+    the base list partially changed (without the hashable items).
+
     @type base_list: List
     @param base_list: The list to be used as base for
     the exclusion.
@@ -113,21 +146,63 @@ def list_exclude(base_list, exclusion_list, copy_base_list = True):
     """
 
     # copies the base list to create the initial result list (optional)
-    result_list = copy_base_list and copy.copy(base_list) or base_list
+    result_list = copy.copy(base_list) if copy_base_list else base_list
+
+    # creates the map of exclusion counts for the (hashable)
+    # exclusion items and the list of unhashable ones
+    exclusion_map, exclusion_unhashable = _list_counts(exclusion_list)
+
+    # creates the filtered list excluding the first occurrences
+    # of the (hashable) exclusion items
+    filtered_list = [value for value in _list_exclude(base_list, exclusion_map)]
 
-    # iterates over all the items in the exclusion list
-    # to remove them from the "result" list
-    for exclusion_item in exclusion_list:
-        # removes the exclusion item from  the result list
-        result_list.remove(exclusion_item)
+    # in case there are exclusion items remaining (not
+    # found in the list) raises the value error
+    if exclusion_map: raise ValueError("list.remove(x): x not in list")
+
+    # sets the filtered list in the result list and removes
+    # the unhashable exclusion items from it
+    result_list[:] = filtered_list
+    for exclusion_item in exclusion_unhashable: result_list.remove(exclusion_item)
 
     # returns the result list
     return result_list
 
+def list_exclude_generator(base_iterable, exclusion_list):
+    """
+    Generator that excludes a series of items from the given
+    base iterable, yielding the remaining items (streaming).
+    For each exclusion item only the first occurrence is excluded,
+    the exclusion items not found are ignored.
+
+    @type base_iterable: Iterable
+    @param base_iterable: The iterable to be used as base for
+    the exclusion (may be a generator).
+    @type exclusion_list: List
+    @param exclusion_list: The list to be used as model for
+    the exclusion of items
+    @rtype: Generator
+    @return: The generator of the items that result of the
+    exclusion of the given list from the base iterable.
+    """
+
+    # creates the map of exclusion counts for the (hashable)
+    # exclusion items and the list of unhashable ones
+    exclusion_map, exclusion_unhashable = _list_counts(exclusion_list)
+
+    # iterates over all the values resulting from the exclusion
+    # of the hashable items, to exclude the unhashable ones
+    for value in _list_exclude(base_iterable, exclusion_map):
+        if exclusion_unhashable and value in exclusion_unhashable:
+            exclusion_unhashable.remove(value)
+            continue
+        yield value
+
 def list_no_duplicates(list):
     """
     Removes the duplicated values from the given list.
-    This method is expensive and should be used carefully.
+    The hashable values are checked using a set and the
+    unhashable ones using equality (slower).
 
     @type list: List
     @param list: The list to heave it's duplicates removed.
@@ -135,19 +210,158 @@ def list_no_duplicates(list):
     @return: The list with the duplicates removed.
     """
 
-    # creates the initial result list to hold the results
-    result_list = []
+    # returns the result list
+    return [value for value in list_no_duplicates_generator(list)]
+
+def list_no_duplicates_generator(iterable):
+    """
+    Generator that yields the values of the given iterable
+    without the duplicated values (first occurrence order).
+    The hashable values are checked using a set and the
+    unhashable ones using equality (slower).
+
+    @type iterable: Iterable
+    @param iterable: The iterable to heave it's duplicates
+    removed (may be a generator).
+    @rtype: Generator
+    @return: The generator of the values with the
+    duplicates removed.
+    """
+
+    # creates the set of (hashable) values already yielded
+    # and the list of unhashable values already yielded
+    values_set = set()
+    values_unhashable = []
+
+    # iterates over all the values in the iterable
+    for value in iterable:
+        try:
+            # in case the value already exists in
+            # the values set (duplicate) continues
+            # the loop, otherwise adds it to the set
+            if value in values_set: continue
+            values_set.add(value)
+        except TypeError:
+            # in case the (unhashable) value already exists
+            # in the unhashable values (duplicate) continues
+            # the loop, otherwise adds it to the list
+            if value in values_unhashable: continue
+            values_unhashable.append(value)
+
+        # yields the (new) value
+        yield value
+
+def _list_set(list):
+    """
+    Creates a set with the hashable values of the given
+    list, to be used in hash based membership checks.
+
+    @type list: List
+    @param list: The list to create the set.
+    @rtype: Set
+    @return: The set with the hashable values of the list.
+    """
+
+    try:
+        # creates the set from the list (fast path, all
+        # the values are hashable)
+        return set(list)
+    except TypeError:
+        # creates the set with only the hashable values
+        # of the list (the others are ignored)
+        return set([value for value in list if _list_hashable(value)])
+
+def _list_contains(value, values_set, values_list):
+    """
+    Checks if the given value is contained in the values,
+    using the set for the hashable values and the list
+    (linear check) for the unhashable ones.
+
+    @type value: Object
+    @param value: The value to be checked.
+    @type values_set: Set
+    @param values_set: The set with the hashable values.
+    @type values_list: List
+    @param values_list: The list with all the values.
+    @rtype: bool
+    @return: If the value is contained in the values.
+    """
+
+    try: return value in values_set
+    except TypeError: return value in values_list
+
+def _list_counts(list):
+    """
+    Creates the map of counts for the hashable values of the
+    given list and the list with the unhashable values.
+
+    @type list: List
+    @param list: The list to create the counts.
+    @rtype: Tuple
+    @return: The map of counts for the hashable values and
+    the list of unhashable values.
+    """
+
+    # creates the map of counts and the
+    # list of unhashable values
+    counts_map = {}
+    unhashable_list = []
 
     # iterates over all the values in the list
+    # to count them (or add them to the list)
     for value in list:
-        # in case the value already exists
-        # in the result list (duplicate)
-        if value in result_list:
-            # continues the loop
+        try: counts_map[value] = counts_map.get(value, 0) + 1
+        except TypeError: unhashable_list.append(value)
+
+    # returns the map of counts and the list of unhashable values
+    return counts_map, unhashable_list
+
+def _list_exclude(iterable, counts_map):
+    """
+    Generator that yields the values of the iterable excluding
+    the first occurrences of the values in the map of counts,
+    the map of counts is updated (the excluded values removed).
+
+    @type iterable: Iterable
+    @param iterable: The iterable to exclude the values.
+    @type counts_map: Dictionary
+    @param counts_map: The map of counts for the values to
+    be excluded.
+    @rtype: Generator
+    @return: The generator of the values not excluded.
+    """
+
+    # iterates over all the values in the iterable
+    for value in iterable:
+        # in case there are no more values to be
+        # excluded the value is yielded
+        if not counts_map:
+            yield value
             continue
 
-        # adds the value to the result list
-        result_list.append(value)
+        # retrieves the count for the value, in case it's
+        # not set (or unhashable) the value is yielded
+        try: count = counts_map.get(value, 0)
+        except TypeError: count = 0
+        if not count:
+            yield value
+            continue
 
-    # returns the result list
-    return result_list
+        # decrements the count for the value, removing it
+        # from the map in case it reaches zero
+        if count == 1: del counts_map[value]
+        else: counts_map[value] = count - 1
+
+def _list_hashable(value):
+    """
+    Checks if the given value is hashable.
+
+    @type value: Object
+    @param value: The value to be checked.
+    @rtype: bool
+    @return: If the value is hashable.
+    """
+
+    try: hash(value)
+    except TypeError: return False
+    return True
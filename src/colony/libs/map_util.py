@@ -43,6 +43,21 @@ import types
 import calendar
 import datetime
 
+SEQUENCE_KIND = 1
+""" The kind of the sequence (list and tuple) containers """
+
+MAP_KIND = 2
+""" The kind of the map (dictionary) containers """
+
+CONTAINER_KINDS = {
+    types.ListType : SEQUENCE_KIND,
+    types.TupleType : SEQUENCE_KIND,
+    types.DictType : MAP_KIND
+}
+""" The dispatch table associating the type of the
+containers with their kind, the types not present
+in the table are considered to be "single" items """
+
 def map_clean(map):
     """
     Cleans the map from all of its entries.
@@ -84,7 +99,8 @@ def map_copy(source_map, destiny_map):
 def map_copy_deep(source_map, destiny_map):
     """
     Copies the contents of the source map to the destiny map.
-    This mode provides a deep copy, using a recursive approach.
+    This mode provides a deep copy, using an iterative (stack
+    based) approach, so that no recursion limit applies.
 
     @type source_map: Dictionary
     @param source_map: The source map of the copy.
@@ -92,26 +108,32 @@ def map_copy_deep(source_map, destiny_map):
     @param destiny_map: The destiny map of the copy.
     """
 
-    # copies the current source map to the destiny map
-    map_copy(source_map, destiny_map)
-
-    # iterates over all the source map items
-    for source_key, source_value in source_map.items():
-        # retrieves the source value type
-        source_value_type = type(source_value)
-
-        # in case the source value type is not a dictionary
-        # continues the loop, nothing to be done in the
-        # current iteration
-        if not source_value_type == types.DictType: continue
-
-        # creates the destiny value map and sets the
-        # destiny value in the destiny map
-        destiny_value = {}
-        destiny_map[source_key] = destiny_value
-
-        # copies the source value (map) to the destiny value
-        map_copy_deep(source_value, destiny_value)
+    # creates the stack of pairs of source and destiny
+    # maps to be copied, starting with the top level maps
+    stack = [(source_map, destiny_map)]
+
+    # iterates while there are maps to be copied
+    while stack:
+        # pops the current pair of maps and copies
+        # the current source map to the destiny map
+        source_map, destiny_map = stack.pop()
+        map_copy(source_map, destiny_map)
+
+        # iterates over all the source map items
+        for source_key, source_value in source_map.iteritems():
+            # in case the source value type is not a dictionary
+            # continues the loop, nothing to be done in the
+            # current iteration
+            if not type(source_value) == types.DictType: continue
+
+            # creates the destiny value map and sets the
+            # destiny value in the destiny map
+            destiny_value = {}
+            destiny_map[source_key] = destiny_value
+
+            # schedules the copy of the source value (map)
+            # to the destiny value
+            stack.append((source_value, destiny_value))
 
 def map_duplicate(item):
     """
@@ -130,33 +152,9 @@ def map_duplicate(item):
     replicated in the sequences and maps.
     """
 
-    # retrieves the type for the current
-    # item in order to percolate it appropriately
-    _type = type(item)
-
-    # in case the current item is a sequence
-    # must "copy" all of its elements
-    if _type in (types.ListType, types.TupleType):
-        return [map_duplicate(value) for value in item]
-
-    # in case the current item is a map
-    # must create a new map with the result
-    # of the copy of all the elements
-    elif _type == types.DictType:
-        # creates the item map to be populated
-        # with the copied values
-        _item = {}
-
-        # iterates over all the items to copy
-        # them and sets them in the new items map
-        for key, value in item.items():
-            _item[key] = map_duplicate(value)
-        return _item
-
-    # otherwise must be a "single" item and the
-    # (reduce) operation must be performed on it
-    else:
-        return item
+    # transforms the item without any operation (identity)
+    # creating new containers for all the sequences and maps
+    return _map_transform(item)
 
 def map_remove(removal_map, destiny_map):
     """
@@ -180,7 +178,7 @@ def map_remove(removal_map, destiny_map):
         # removes the key item from the destiny map
         del destiny_map[key]
 
-def map_extend(base_map, extension_map, override = True, recursive = False, copy_base_map = True):
+def map_extend(base_map, extension_map, override = True, recursive = False, copy_base_map = True, share = False):
     """
     Extends the given map with the extension map,
     retrieving a map resulting of the merge of both maps.
@@ -206,39 +204,60 @@ def map_extend(base_map, extension_map, override = True, recursive = False, copy
     extension).
     @type copy_base_map: bool
     @param copy_base_map: If the base map should be copied before
-    being extended in order to avoid loss of data.
+    being extended in order to avoid loss of data (in case it's not
+    set the base map is extended in place).
+    @type share: bool
+    @param share: If the (recursive) extension maps that do not
+    exist in the base map should be shared (referenced) in the
+    result map instead of being copied.
     @rtype: Dictionary
     @return: The map that result of the merge of both maps.
     """
 
     # copies the base map to create the initial result map (optional)
-    result_map = copy_base_map and copy.copy(base_map) or base_map
-
-    # iterates over all the keys and values
-    # in the extension map
-    for key, value in extension_map.items():
-        # in case the override flag is not set
-        # and the key already exists in the result map
-        if not override and key in result_map:
-            # continues the loop
-            continue
-
-        # retrieves the type for the value
-        value_type = type(value)
-
-        # in case the value is a map and the
-        # recursive flag is set
-        if recursive and value_type == types.DictType:
-            # retrieves the result map value in
-            # case it's set
-            result_map_value = result_map.get(key, {})
-
-            # extends the map that is currently
-            # in the result map with the new value (recursive step)
-            value = map_extend(result_map_value, value, override, recursive, copy_base_map)
-
-        # sets the (extension) value in the result map
-        result_map[key] = value
+    result_map = copy.copy(base_map) if copy_base_map else base_map
+
+    # creates the stack of pairs of result and extension maps
+    # to be merged, starting with the top level maps (the
+    # iterative approach avoids the recursion limit)
+    stack = [(result_map, extension_map)]
+
+    # iterates while there are maps to be merged
+    while stack:
+        # pops the current pair of result and extension maps
+        _result_map, _extension_map = stack.pop()
+
+        # iterates over all the keys and values
+        # in the extension map
+        for key, value in _extension_map.iteritems():
+            # in case the override flag is not set
+            # and the key already exists in the result map
+            if not override and key in _result_map:
+                # continues the loop
+                continue
+
+            # in case the value is not a map or the recursive
+            # flag is not set, sets the (extension) value in
+            # the result map (nothing more to be done)
+            if not recursive or not type(value) == types.DictType:
+                _result_map[key] = value
+                continue
+
+            # retrieves the result map value in case it's set
+            # (and is a map) and in case it's not and the
+            # sharing is enabled references the extension value
+            result_map_value = _result_map.get(key, None)
+            if not type(result_map_value) == types.DictType: result_map_value = None
+            if result_map_value == None and share:
+                _result_map[key] = value
+                continue
+
+            # copies the current result map value (optional) and
+            # schedules its extension with the value (recursive step)
+            result_map_value = result_map_value or {}
+            result_map_value = copy.copy(result_map_value) if copy_base_map else result_map_value
+            _result_map[key] = result_map_value
+            stack.append((result_map_value, value))
 
     # returns the result map
     return result_map
@@ -381,7 +400,7 @@ def map_output(map, output_method = sys.stdout.write, indentation = ""):
             # outputs the map value string
             output_method(map_value_string)
 
-def map_normalize(item, operation = None):
+def map_normalize(item, operation = None, in_place = False, share = False):
     """
     Normalizes the provided map/item, applying the reduce
     operation to each of the items.
@@ -397,6 +416,13 @@ def map_normalize(item, operation = None):
     @type operation: Method
     @param operation: The operation used for normalization
     (reduce operation).
+    @type in_place: bool
+    @param in_place: If the lists and maps should be normalized
+    in place (the tuples are always converted into lists).
+    @type share: bool
+    @param share: If the lists and maps that remain unchanged
+    after the normalization should be shared (referenced) in the
+    result instead of being copied.
     @rtype: Object
     @return: The normalized map, resulting from the normalization
     of each of its items.
@@ -406,33 +432,134 @@ def map_normalize(item, operation = None):
     # to reduce map in case none is defined
     operation = operation or _map_reduce
 
-    # retrieves the type for the current
-    # item in order to percolate it appropriately
-    _type = type(item)
-
-    # in case the current item is a sequence
-    # must normalize all of its elements
-    if _type in (types.ListType, types.TupleType):
-        return [map_normalize(value, operation) for value in item]
-
-    # in case the current item is a map
-    # must create a new map with the result
-    # of the normalization of all the elements
-    elif _type == types.DictType:
-        # creates the item map to be populated
-        # with the normalized values
-        _item = {}
-
-        # iterates over all the items to normalize
-        # them and sets them in the new items map
-        for key, value in item.items():
-            _item[key] = map_normalize(value, operation)
-        return _item
-
-    # otherwise must be a "single" item and the
-    # (reduce) operation must be performed on it
-    else:
-        return operation(item)
+    # transforms the item applying the operation to each
+    # of the "single" items (iterative approach)
+    return _map_transform(item, operation, in_place, share)
+
+def _map_transform(item, operation = None, in_place = False, share = False):
+    """
+    Transforms the provided item (map) applying the operation to
+    each of the "single" items, the sequences are converted into
+    lists and the maps into new maps (unless the in place or share
+    modes are used).
+
+    The transform uses an explicit stack (post order) instead of
+    recursion, so that deep structures do not hit the recursion limit.
+
+    @type item: Object
+    @param item: The item to be transformed.
+    @type operation: Method
+    @param operation: The operation to be applied to the "single"
+    items, in case it's not defined the items are kept.
+    @type in_place: bool
+    @param in_place: If the lists and maps should be changed in place.
+    @type share: bool
+    @param share: If the unchanged lists and maps should be shared.
+    @rtype: Object
+    @return: The transformed item.
+    """
+
+    # in case the item is not a container the operation
+    # is applied directly to it (nothing more to be done)
+    if not type(item) in CONTAINER_KINDS: return operation(item) if operation else item
+
+    # creates the stack of frames with the frame of the item, each
+    # frame contains the container, the keys (for maps), the current
+    # index, the transformed values and the changed flag
+    stack = [_map_frame(item)]
+
+    # iterates while there are frames in the stack
+    while True:
+        # retrieves the current frame (top of the stack)
+        # and unpacks it into its components
+        frame = stack[-1]
+        container, keys, index, values, _changed = frame
+
+        # in case there are items remaining in the container
+        # the next item is processed
+        if index < len(container):
+            # retrieves the value for the index and increments
+            # the index of the frame for the next iteration
+            value = container[keys[index] if keys else index]
+            frame[2] = index + 1
+
+            # in case the value is a container a new frame is
+            # pushed for it (processed before the current)
+            if type(value) in CONTAINER_KINDS:
+                stack.append(_map_frame(value))
+                continue
+
+            # applies the operation to the value and adds it to
+            # the values updating the changed flag
+            _value = operation(value) if operation else value
+            values.append(_value)
+            if not _value is value: frame[4] = True
+            continue
+
+        # pops the frame and creates the result for the container
+        # taking into account the share and in place modes
+        stack.pop()
+        result = _map_result(frame, in_place, share)
+
+        # in case there's no parent frame the transform
+        # is complete and the result is returned
+        if not stack: return result
+
+        # adds the result to the values of the parent frame
+        # updating the changed flag of it
+        parent = stack[-1]
+        parent[3].append(result)
+        if not result is container: parent[4] = True
+
+def _map_frame(container):
+    """
+    Creates the frame for the given container to be used in
+    the transform stack.
+
+    @type container: Object
+    @param container: The container (sequence or map).
+    @rtype: List
+    @return: The frame for the container.
+    """
+
+    keys = container.keys() if CONTAINER_KINDS[type(container)] == MAP_KIND else None
+    return [container, keys, 0, [], False]
+
+def _map_result(frame, in_place, share):
+    """
+    Creates the result for the given (complete) frame, the
+    tuples are always converted into lists.
+
+    @type frame: List
+    @param frame: The frame for the container.
+    @type in_place: bool
+    @param in_place: If the container should be changed in place.
+    @type share: bool
+    @param share: If the container should be shared (in case
+    it remains unchanged).
+    @rtype: Object
+    @return: The result for the container.
+    """
+
+    # unpacks the frame and checks if the container
+    # may be reused (tuples must be converted)
+    container, keys, _index, values, changed = frame
+    reusable = not type(container) == types.TupleType
+
+    # in case the container is unchanged and the sharing
+    # is enabled the container is reused
+    if reusable and share and not changed: return container
+
+    # in case the in place mode is enabled the values
+    # are set in the container (reused)
+    if reusable and in_place:
+        if keys == None: container[:] = values
+        else: container.update(zip(keys, values))
+        return container
+
+    # creates a new container with the values
+    if keys == None: return values
+    return dict(zip(keys, values))
 
 def _map_reduce(value):
     """
@@ -39,6 +39,8 @@ __license__ = "GNU General Public License (GPL), Version 3"
 
 import copy
 import types
+import functools
+import itertools
 
 NOT_SET_VALUE = None
 """ The value to be set when the value is not set (defined) """
@@ -112,7 +114,7 @@ def object_flatten(instance, flattening_map):
     @param instance: The instance to be flatten.
     @type flattening_map: Dictionary
     @param flattening_map: Map describing the structure
-    for flattening.
+    for flattening, or a (compiled) flattening plan.
     """
 
     # retrieves the type of the instance
@@ -130,6 +132,11 @@ def object_flatten(instance, flattening_map):
         # raises a runtime error (no valid instance type)
         raise RuntimeError("invalid instance type")
 
+    # in case the flattening map is a compiled plan
+    # the flattening is delegated to it
+    if isinstance(flattening_map, FlatteningPlan):
+        return flattening_map.flatten(instance)
+
     # flattens the structure of the instance (list)
     # using the flattening map (the returned structure
     # is a list of "flatten" instances)
@@ -138,6 +145,42 @@ def object_flatten(instance, flattening_map):
     # returns the flatten list
     return flatten_list
 
+def compile_flattening(flattening_map):
+    """
+    Compiles the given flattening map into a (reusable)
+    flattening plan, avoiding the interpretation of the map
+    for each of the flattened instances.
+
+    @type flattening_map: Dictionary
+    @param flattening_map: Map describing the structure
+    for flattening.
+    @rtype: FlatteningPlan
+    @return: The flattening plan for the map, to be used
+    with the object flatten function or directly.
+    """
+
+    # creates the list of steps for the plan, each step
+    # contains the attribute key, the target name (for the
+    # leafs) and the plan for the relation (for the maps)
+    steps = []
+
+    # iterates over all the keys and values in the
+    # flattening map to create the plan steps
+    for key, value in flattening_map.items():
+        # retrieves the value type
+        value_type = type(value)
+
+        # in case the value is of type string (a leaf of
+        # the flattening structure) the target name is set,
+        # otherwise in case it's a dictionary (a relation)
+        # the map is compiled into a "sub" plan
+        if value_type == types.StringType: steps.append((key, value, None))
+        elif value_type == types.DictionaryType: steps.append((key, None, compile_flattening(value)))
+
+    # creates the flattening plan from the steps
+    # and returns it to the caller method
+    return FlatteningPlan(steps)
+
 def object_print_list(instances_list):
     """
     Prints some information on the obects
@@ -685,3 +728,152 @@ def __object_items(instance):
         # returns the instance dictionary keys
         # (the instance names)
         return instance.__dict__.items()
+
+class FlatteningPlan(object):
+    """
+    Class representing a compiled flattening map, the
+    plan walks each instance once and generates the
+    flattened instances (rows) as a stream.
+
+    The "to-one" relations are resolved into the row and
+    the "to-many" relations (lists) are expanded with the
+    cartesian product of their rows, the attributes of the
+    plan that are not set in a row are set as null.
+    """
+
+    steps = []
+    """ The list of steps of the plan, each step contains
+    the attribute key, the target name and the "sub" plan """
+
+    names = set()
+    """ The set of target names (recursive) of the plan """
+
+    def __init__(self, steps):
+        """
+        Constructor of the class.
+
+        @type steps: List
+        @param steps: The list of steps of the plan, each step
+        contains the attribute key, the target name and the "sub" plan.
+        """
+
+        self.steps = steps
+
+        # creates the set of target names for the plan
+        # including the ones of the "sub" plans
+        self.names = set()
+        for _key, name, plan in steps:
+            if plan: self.names.update(plan.names)
+            else: self.names.add(name)
+
+    def flatten(self, instances_list):
+        """
+        Flattens the given instances list into a list of
+        flattened instances (copies of the instances).
+
+        @type instances_list: List
+        @param instances_list: The list of instances to be flatten.
+        @rtype: List
+        @return: The list of instances in the flatten state.
+        """
+
+        return list(self.iterate(instances_list))
+
+    def iterate(self, instances_list):
+        """
+        Generator that flattens the given instances list yielding
+        each of the flattened instances (copies of the instances)
+        as soon as it's created.
+
+        @type instances_list: List
+        @param instances_list: The list of instances to be flatten,
+        may be any iterable (eg: a generator).
+        @rtype: Generator
+        @return: The generator of instances in the flatten state.
+        """
+
+        # iterates over all the instances and over all the
+        # rows of values of each of them
+        for instance in instances_list:
+            for values in self._rows(instance):
+                # creates a clone of the instance and retrieves
+                # the proper setter for it (map or object)
+                item = copy.copy(instance)
+                is_map = type(item) == types.DictionaryType
+                setter = is_map and item.__setitem__ or functools.partial(setattr, item)
+                checker = is_map and item.__contains__ or functools.partial(hasattr, item)
+
+                # sets the values of the row in the item, in case the
+                # value is not set in the row the item is only set as
+                # null when it doesn't have the value (as in the flush)
+                for name in self.names:
+                    if name in values: setter(name, values[name])
+                    elif not checker(name): setter(name, NOT_SET_VALUE)
+                yield item
+
+    def _rows(self, instance):
+        """
+        Generator that yields the rows (maps of values) for the
+        given instance, resolving the "to-one" relations and
+        expanding the "to-many" relations.
+
+        @type instance: Object
+        @param instance: The instance to generate the rows.
+        @rtype: Generator
+        @return: The generator of rows (maps of values).
+        """
+
+        # collects the values and the "to-many" relations
+        # for the instance (single walk)
+        values = {}
+        relations = []
+        self._collect(instance, values, relations)
+
+        # in case there are no "to-many" relations the values
+        # are the only row (nothing more to be done)
+        if not relations:
+            yield values
+            return
+
+        # retrieves the rows for each of the relations (lists) and
+        # yields the row for each combination (cartesian product)
+        relations_rows = [[row for item in items for row in plan._rows(item)] for plan, items in relations]
+        for combination in itertools.product(*relations_rows):
+            row = dict(values)
+            for relation_row in combination: row.update(relation_row)
+            yield row
+
+    def _collect(self, instance, values, relations):
+        """
+        Collects the values of the leafs of the plan into the
+        values map and the "to-many" relations into the relations
+        list, resolving the "to-one" relations.
+
+        @type instance: Object
+        @param instance: The instance to collect the values.
+        @type values: Dictionary
+        @param values: The map to hold the collected values.
+        @type relations: List
+        @param relations: The list to hold the pairs of plan and
+        list of the "to-many" relations.
+        """
+
+        # checks if the instance is a map, to use the
+        # proper attribute getter for the instance
+        is_map = type(instance) == types.DictionaryType
+
+        # iterates over all the steps in the plan
+        for key, name, plan in self.steps:
+            # retrieves the value for the key, in case it's not
+            # set (or it's an empty value, as in the interpreted
+            # flattening) there's nothing to be done, note that
+            # the empty lists are kept (empty "to-many" product)
+            value = instance.get(key, None) if is_map else getattr(instance, key, None)
+            if not value and not type(value) in LIST_TYPES: continue
+
+            # in case the step is a leaf sets the value, in case
+            # the value is a list it's a "to-many" relation and
+            # otherwise it's a "to-one" relation (resolved now)
+            if name: values[name] = value
+            elif type(value) in LIST_TYPES: relations.append((plan, value))
+            else: plan._collect(value, values, relations)
@@ -37,13 +37,16 @@ __copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
 __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
-import colony.libs.string_buffer_util
+import re
+import types
 
 QUOTE_SAFE_CHAR = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.-"
 """ The string containing all the safe characters to be quoted """
 
 QUOTE_SAFE_MAPS = {}
-""" The map of cached (buffered) safe lists to be quoted """
+""" The map of cached (buffered) safe structures to be quoted,
+containing the safe characters, the regex for the unsafe runs
+and the map of quoted characters """
 
 HEX_TO_CHAR_MAP = dict(("%02x" % i, chr(i)) for i in range(256))
 """ The map associating the hexadecimal byte (256) values with the integers """
@@ -51,6 +54,10 @@ HEX_TO_CHAR_MAP = dict(("%02x" % i, chr(i)) for i in range(256))
 # updates the map with the upper case values
 HEX_TO_CHAR_MAP.update(("%02X" % i, chr(i)) for i in range(256))
 
+HEX_TO_UNICODE_MAP = dict((key, unichr(ord(value))) for key, value in HEX_TO_CHAR_MAP.items())
+""" The map associating the hexadecimal byte (256) values with the
+unicode characters, used for the unquoting of unicode values """
+
 def quote(string_value, safe = "/"):
     """
     Quotes the given string value according to
@@ -59,24 +66,24 @@ def quote(string_value, safe = "/"):
 
     @type string_value: String
     @param string_value: The string value to be quoted.
+    @type safe: String
+    @param safe: The string containing the characters considered
+    safe for quoting.
     @rtype: String
     @return: The quoted string value.
     """
 
-    # creates the cache key tuple
-    cache_key = (
-        safe,
-        QUOTE_SAFE_CHAR
-    )
-
     try:
-        # in case the cache key is not defined
-        # in the quote safe maps, creates a new entry
-        safe_map = QUOTE_SAFE_MAPS[cache_key]
+        # in case the safe value is not defined in
+        # the quote safe maps, creates a new entry
+        safe, safe_regex, safe_map = QUOTE_SAFE_MAPS[safe]
     except KeyError:
         # adds the "base" quote safe characters to the
-        # "safe list"
+        # "safe list" and creates the regex that matches
+        # the runs of unsafe characters
+        cache_key = safe
         safe += QUOTE_SAFE_CHAR
+        safe_regex = re.compile("[^%s]+" % re.escape(safe))
 
         # starts the safe map
         safe_map = {}
@@ -90,15 +97,20 @@ def quote(string_value, safe = "/"):
             # adds the "valid" character or the safe map entry
             safe_map[character] = (character in safe) and character or ("%%%02X" % index)
 
-        # sets the safe map in the cache quote safe maps
-        QUOTE_SAFE_MAPS[cache_key] = safe_map
+        # sets the safe structures in the cache quote safe maps
+        QUOTE_SAFE_MAPS[cache_key] = (safe, safe_regex, safe_map)
 
-    # maps the getitem method of the map to all the string
-    # value to retrieve the valid items
-    resolution_list = map(safe_map.__getitem__, string_value)
+    # in case the string value is only composed of safe
+    # characters it's returned immediately (fast path)
+    if not string_value.rstrip(safe): return string_value
 
-    # joins the resolution list to retrieve the quoted value
-    return "".join(resolution_list)
+    # creates the function that quotes a run of unsafe characters
+    # mapping the getitem method of the map to the run
+    quote_run = lambda match: "".join(map(safe_map.__getitem__, match.group()))
+
+    # replaces the runs of unsafe characters with the quoted
+    # values, leaving the safe runs unchanged
+    return safe_regex.sub(quote_run, string_value)
 
 def quote_plus(string_value, safe = ""):
     """
@@ -142,24 +154,23 @@ def unquote(string_value):
     @return: The unquoted string value.
     """
 
-    # splits the string value around
-    # percentage value
-    string_value_splitted = string_value.split("%")
+    # in case there are no quoted characters in the
+    # string value it's returned immediately (fast path)
+    if not "%" in string_value: return string_value
 
-    # iterates over all the "percentage values" range
-    for index in xrange(1, len(string_value_splitted)):
-        # retrieves the current iteration item
-        item = string_value_splitted[index]
+    # retrieves the map to be used to unquote the characters, the
+    # unicode values are unquoted into unicode characters
+    is_unicode = type(string_value) == types.UnicodeType
+    hex_map = is_unicode and HEX_TO_UNICODE_MAP or HEX_TO_CHAR_MAP
 
-        try:
-            string_value_splitted[index] = HEX_TO_CHAR_MAP[item[:2]] + item[2:]
-        except KeyError:
-            string_value_splitted[index] = "%" + item
-        except UnicodeDecodeError:
-            string_value_splitted[index] = unichr(int(item[:2], 16)) + item[2:]
+    # splits the string value around the percentage value and
+    # unquotes each of the "percentage values", the invalid ones
+    # are restored with the percentage value
+    string_value_splitted = string_value.split("%")
+    unquoted_list = [item[:2] in hex_map and hex_map[item[:2]] + item[2:] or "%" + item for item in string_value_splitted[1:]]
 
     # returns the joined "partial" string value
-    return "".join(string_value_splitted)
+    return string_value_splitted[0] + "".join(unquoted_list)
 
 def unquote_plus(string_value):
     """
@@ -196,34 +207,52 @@ def url_encode(attributes_map, plus_encoding = False):
     # retrieves the quote method to be used
     quote_method = plus_encoding and quote_plus or quote
 
-    # creates a string buffer to hold the encoded attribute values
-    string_buffer = colony.libs.string_buffer_util.StringBuffer()
+    # quotes both the attribute keys and values and joins
+    # them into the encoded attributes string
+    encoded_attributes = "&".join([quote_method(attribute_key) + "=" + quote_method(attribute_value) for attribute_key, attribute_value in attributes_map.iteritems()])
 
-    # sets the is first flag
-    is_first = True
-
-    # iterates over all the attribute keys and values
-    for attribute_key, attribute_value in attributes_map.items():
-        # quotes both the attribute key and value
-        attribute_key_quoted = quote_method(attribute_key)
-        attribute_value_quoted = quote_method(attribute_value)
+    # returns the encoded attributes
+    return encoded_attributes
 
-        # in case it's is the first iteration
-        if is_first:
-            # unsets the is first flag
-            is_first = False
-        else:
-            # writes the and continuation in the string buffer
-            string_buffer.write("&")
+def url_encode_many(attributes_maps, plus_encoding = False):
+    """
+    Encodes the given sequence of attributes maps into url
+    encoding, the quoted keys and values are reused across
+    the maps (batch encoding).
 
-        # adds the quoted key and value strings to the
-        # string buffer
-        string_buffer.write(attribute_key_quoted)
-        string_buffer.write("=")
-        string_buffer.write(attribute_value_quoted)
+    @type attributes_maps: List
+    @param attributes_maps: The sequence of maps of attributes
+    to be encoded using url encoding.
+    @type plus_encoding: bool
+    @param plus_encoding: If the plus encoding should be used.
+    @rtype: List
+    @return: The list of encoded attributes strings (one for
+    each of the attributes maps).
+    """
 
-    # retrieves the encoded attributes from the string buffer
-    encoded_attributes = string_buffer.get_value()
+    # retrieves the quote method to be used
+    quote_method = plus_encoding and quote_plus or quote
 
-    # returns the encoded attributes
-    return encoded_attributes
+    # creates the map to hold the quoted values for the
+    # batch and the list of encoded attributes
+    quoted_map = {}
+    encoded_attributes_list = []
+
+    # iterates over all the attributes maps to encode them
+    for attributes_map in attributes_maps:
+        # creates the list of encoded items for the map
+        items = []
+
+        # iterates over all the attribute keys and values
+        # quoting them in case they are not quoted already
+        for attribute_key, attribute_value in attributes_map.iteritems():
+            if not attribute_key in quoted_map: quoted_map[attribute_key] = quote_method(attribute_key)
+            if not attribute_value in quoted_map: quoted_map[attribute_value] = quote_method(attribute_value)
+            items.append(quoted_map[attribute_key] + "=" + quoted_map[attribute_value])
+
+        # joins the items into the encoded attributes
+        # and adds them to the list
+        encoded_attributes_list.append("&".join(items))
+
+    # returns the list of encoded attributes
+    return encoded_attributes_list
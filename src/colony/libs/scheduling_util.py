@@ -38,19 +38,68 @@ __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
 import time
+import heapq
+import Queue
+import logging
+import datetime
 import threading
 
 DEFAULT_SLEEP_STEP = 0.5
 """ The default sleep step to be used in the scheduler """
 
+DEFAULT_WORKERS = 0
+""" The default number of worker threads to be used for
+the execution of the scheduled callables, zero executes the
+callables one at a time in the scheduler thread (serial) """
+
+DEFAULT_POOL_WORKERS = 4
+""" The default number of worker threads in a worker pool """
+
+DEFAULT_MISFIRE_GRACE = 1.0
+""" The default amount of time (in seconds) after the timestamp
+in which the execution of a callable is not considered a misfire """
+
+DEFAULT_LOGGER = "default_messages"
+""" The default logger name """
+
+SKIP_MISFIRE = "skip"
+""" The misfire policy that skips the misfired execution """
+
+COALESCE_MISFIRE = "coalesce"
+""" The misfire policy that runs the misfired execution once
+(coalescing all the missed executions of a recurring callable) """
+
+RUN_LATE_MISFIRE = "run_late"
+""" The misfire policy that runs the misfired execution late
+(and all the missed executions of a recurring callable) """
+
+CRON_RANGES = (
+    (0, 59),
+    (0, 23),
+    (1, 31),
+    (1, 12),
+    (0, 6)
+)
+""" The ranges of values for each of the fields of a cron
+expression (minute, hour, day, month and weekday) """
+
+MAXIMUM_CRON_ITERATIONS = 100000
+""" The maximum number of iterations to be used while
+searching for the next time of a cron schedule """
+
 class Scheduler(threading.Thread):
     """
     Class that implements a scheduler to be used
     to "call" callable objects for a provided timestamp.
+
+    The scheduler keeps the callables in a heap ordered by
+    timestamp and sleeps (on a condition) until the next
+    timestamp is reached or a new callable is added.
     """
 
     sleep_step = None
-    """ The amount of time to be used during a sleep iteration """
+    """ The amount of time to be used during a sleep iteration
+    (kept for compatibility, the scheduler no longer polls) """
 
     continue_flag = False
     """ Flag controlling the execution of the scheduler """
@@ -59,106 +108,115 @@ class Scheduler(threading.Thread):
     """ Flag controlling the busy state of the scheduler """
 
     timestamp_queue = []
-    """ Ordered list (queue) of timestamps for callables """
+    """ The heap (queue) of tuples containing the timestamp, the
+    sequence number and the task for each scheduled callable """
+
+    sequence = 0
+    """ The sequence number for the next task to be scheduled, used
+    to keep the insertion order for the same timestamp """
+
+    lag_count = 0
+    """ The number of tasks executed (for lag metrics) """
 
-    timestamp_map = {}
-    """ The map associating the timestamp with a list of callables """
+    lag_total = 0.0
+    """ The accumulated lag (in seconds) between the timestamp of
+    the tasks and the time of their execution """
+
+    lag_maximum = 0.0
+    """ The maximum lag (in seconds) of a task execution """
+
+    lag_last = 0.0
+    """ The lag (in seconds) of the last task execution """
+
+    misfires = 0
+    """ The number of executions that have been misfired """
+
+    skips = 0
+    """ The number of executions that have been skipped (either
+    by the misfire policy or by the concurrency limit) """
+
+    timeouts = 0
+    """ The number of executions that exceeded the timeout """
+
+    active = 0
+    """ The number of executions currently running """
+
+    misfire_grace = None
+    """ The default amount of time (in seconds) after the timestamp
+    in which the execution is not considered a misfire """
+
+    pool = None
+    """ The pool of worker threads used for the execution of the
+    callables, in case it's not set they're executed in the
+    scheduler thread """
+
+    logger = None
+    """ The logger used for the warnings of the scheduler """
 
     timestamp_lock = None
     """ The lock that controls the access to the timestamp structures """
 
+    timestamp_condition = None
+    """ The condition (over the timestamp lock) used to wait for
+    the next timestamp or for the addition of new callables """
+
     action_lock = None
     """ The lock that controls the access to the start and stop actions """
 
-    def __init__(self, sleep_step = DEFAULT_SLEEP_STEP):
+    def __init__(self, sleep_step = DEFAULT_SLEEP_STEP, workers = DEFAULT_WORKERS, misfire_grace = DEFAULT_MISFIRE_GRACE, logger = None):
         """
         Constructor of the class.
 
-        @type plugin: Plugin
-        @param plugin: The plugin to be used.
         @type sleep_step: float
         @param sleep_step: The amount of time to be used
-        during a sleep iteration.
+        during a sleep iteration (kept for compatibility).
+        @type workers: int
+        @param workers: The number of worker threads to be used for
+        the execution of the callables, in case it's zero (default) the
+        callables are executed one at a time in the scheduler thread,
+        note that with workers the callables may run concurrently.
+        @type misfire_grace: float
+        @param misfire_grace: The default amount of time (in seconds)
+        after the timestamp in which the execution is not a misfire.
+        @type logger: Logger
+        @param logger: The logger to be used for the warnings.
         """
 
         threading.Thread.__init__(self)
 
         self.sleep_step = sleep_step
+        self.misfire_grace = misfire_grace
+        self.pool = workers and WorkerPool(workers) or None
+        self.logger = logger or logging.getLogger(DEFAULT_LOGGER)
 
         self.daemon = True
         self.timestamp_queue = []
-        self.timestamp_map = {}
         self.timestamp_lock = threading.RLock()
+        self.timestamp_condition = threading.Condition(self.timestamp_lock)
         self.action_lock = threading.RLock()
 
     def run(self):
-        # iterates while the continue
-        # flag is set
-        while self.continue_flag:
-            # acquires the timestamp lock
-            self.timestamp_lock.acquire()
-
-            try:
-                # retrieves the current timestamp
-                current_timestamp = time.time()
-
-                # iterates over the timestamp queue
-                while True:
-                    # in case the timestamp queue is invalid
-                    # (possibly empty)
-                    if not self.timestamp_queue:
-                        # breaks the loop (no more work
-                        # to be processed for now)
-                        break
-
-                    # retrieves the timestamp from the
-                    # timestamp queue
-                    timestamp = self.timestamp_queue[0]
-
-                    # in case the final timestamp has been
-                    # reached
-                    if current_timestamp < timestamp:
-                        # breaks the loop (no more work
-                        # to be processed for now)
-                        break
-
-                    # retrieves the callable (elements) list
-                    # for the timestamp
-                    callable_list = self.timestamp_map[timestamp]
-
-                    # removes the callable list for the timestmap
-                    # (done before the calling to avoid race condition)
-                    del self.timestamp_map[timestamp]
-
-                    # pops (removes first element) the timestamp
-                    # from the timestamp queue (done before the
-                    # calling to avoid race condition)
-                    self.timestamp_queue.pop(0)
-
-                    # sets the busy flag and releases the timestamp
-                    # lock (avoids waiting for callables)
-                    self.busy_flag = True
-                    self.timestamp_lock.release()
-
-                    try:
-                        # iterates over all the callables to call
-                        # them (calls the proper function)
-                        for callable in callable_list:
-                            # calls the callable (element)
-                            # this can be of long duration
-                            callable()
-                    finally:
-                        # acquires the timestamp lock (back)
-                        # and unsets the busy flag
-                        self.timestamp_lock.acquire()
-                        self.busy_flag = False
-            finally:
-                # releases the timestamp lock
-                self.timestamp_lock.release()
-
-            # sleeps for the amount of time defined
-            # in the sleep step
-            time.sleep(self.sleep_step)
+        # acquires the timestamp lock
+        self.timestamp_lock.acquire()
+
+        try:
+            # iterates while the continue
+            # flag is set
+            while self.continue_flag:
+                # retrieves the next task that is due for execution
+                # waiting for it in case it's not yet available
+                task = self._next_task()
+                if not task: continue
+
+                # dispatches the task for execution (in the pool)
+                # according to the misfire and concurrency policies
+                # and then re-schedules the task in case it's a
+                # recurring one (and not cancelled)
+                self._dispatch_task(task)
+                self._reschedule_task(task)
+        finally:
+            # releases the timestamp lock
+            self.timestamp_lock.release()
 
     def start_scheduler(self):
         """
@@ -175,7 +233,9 @@ class Scheduler(threading.Thread):
         # sets the continue flag
         self.continue_flag = True
 
-        # starts the thread
+        # starts the pool of workers (if any)
+        # and then starts the thread
+        self.pool and self.pool.start()
         self.start()
 
     def stop_scheduler(self):
@@ -189,8 +249,18 @@ class Scheduler(threading.Thread):
         # duplicate stopping, returns immediately
         if not self.continue_flag: return
 
-        # unsets the continue flag
-        self.continue_flag = False
+        # unsets the continue flag and wakes the scheduler
+        # thread so that it's able to exit
+        self.timestamp_lock.acquire()
+        try:
+            self.continue_flag = False
+            self.timestamp_condition.notify()
+        finally:
+            self.timestamp_lock.release()
+
+        # stops the pool of workers (if any), the
+        # running callables are allowed to finish
+        self.pool and self.pool.stop()
 
     def reset_scheduler(self):
         """
@@ -204,62 +274,105 @@ class Scheduler(threading.Thread):
 
         self.continue_flag = False
         self.timestamp_queue = []
-        self.timestamp_map = {}
         self.timestamp_lock = threading.RLock()
+        self.timestamp_condition = threading.Condition(self.timestamp_lock)
 
-    def add_callable(self, callbable, timestamp):
+    def add_callable(self, callbable, timestamp, misfire = RUN_LATE_MISFIRE, **kwargs):
         """
         Adds a callable object to the scheduler
         for calling upon the given timestamp value.
         The sent callable is called without any arguments
         and the real time for calling may not be assured.
 
+        The extra keyword arguments (max_instances, grace and
+        timeout) are used in the construction of the task.
+
         @type callbable: Callable
         @param callbable: The callable object to be called
         upon in time described in the given timestamp.
         @type timestamp: float
         @param timestamp: The timestamp describing the
         time for calling the callable object.
+        @type misfire: String
+        @param misfire: The misfire policy (skip, coalesce or run_late).
+        @rtype: SchedulerTask
+        @return: The task (handle) for the scheduled callable,
+        that may be used for cancellation.
         """
 
-        # acquires the timestamp lock
-        self.timestamp_lock.acquire()
+        task = SchedulerTask(callbable, misfire = misfire, **kwargs)
+        self._schedule_task(task, timestamp)
+        return task
 
-        try:
-            # starts the index value
-            index = 0
-
-            # iterates over all the timestamps in the
-            # timestamp queue (to find position for insertion)
-            for _timestamp in self.timestamp_queue:
-                # in case the the current iteration
-                # tiemstamp contains a value smaller than
-                # the timestamp to be inserted
-                if timestamp < _timestamp:
-                    # breaks the loop (position for
-                    # insertion reached)
-                    break
-
-                # increments the index
-                index += 1
-
-            # checks if the timestamp already exists in the
-            # current structures
-            timestamp_exists = timestamp in self.timestamp_map
-
-            # inserts the timestamp in the timestamp queue
-            # for the correct index (in order to maintain order)
-            # in case it does not exist already
-            not timestamp_exists and self.timestamp_queue.insert(index, timestamp)
-
-            # retrieves the list of callabled for the given timestamp
-            # and then updates it with the given callable object
-            callable_list = self.timestamp_map.get(timestamp, [])
-            callable_list.append(callbable)
-            self.timestamp_map[timestamp] = callable_list
-        finally:
-            # releases the timestamp lock
-            self.timestamp_lock.release()
+    def add_recurring(self, callbable, interval, timestamp = None, misfire = COALESCE_MISFIRE, **kwargs):
+        """
+        Adds a callable object to the scheduler to be called
+        periodically with the given interval (in seconds).
+
+        @type callbable: Callable
+        @param callbable: The callable object to be called.
+        @type interval: float
+        @param interval: The interval (in seconds) between calls.
+        @type timestamp: float
+        @param timestamp: The timestamp of the first call, in case
+        it's not defined the first call is done after the interval.
+        @type misfire: String
+        @param misfire: The misfire policy (skip, coalesce or run_late).
+        @rtype: SchedulerTask
+        @return: The task (handle) for the scheduled callable,
+        that may be used for cancellation.
+        """
+
+        schedule = IntervalSchedule(interval)
+        task = SchedulerTask(callbable, schedule, misfire = misfire, **kwargs)
+        timestamp = timestamp or time.time() + interval
+        self._schedule_task(task, timestamp)
+        return task
+
+    def add_cron(self, callbable, expression, misfire = COALESCE_MISFIRE, **kwargs):
+        """
+        Adds a callable object to the scheduler to be called
+        according to the given cron expression (in local time).
+
+        @type callbable: Callable
+        @param callbable: The callable object to be called.
+        @type expression: String
+        @param expression: The cron expression (minute, hour, day,
+        month and weekday) describing the times of the calls.
+        @type misfire: String
+        @param misfire: The misfire policy (skip, coalesce or run_late).
+        @rtype: SchedulerTask
+        @return: The task (handle) for the scheduled callable,
+        that may be used for cancellation.
+        """
+
+        schedule = CronSchedule(expression)
+        task = SchedulerTask(callbable, schedule, misfire = misfire, **kwargs)
+        timestamp = schedule.next(time.time())
+        self._schedule_task(task, timestamp)
+        return task
+
+    def get_stats(self):
+        """
+        Retrieves a map with the statistics of the scheduler,
+        the number of pending tasks and the scheduling lag metrics
+        (delay between the timestamp and the execution).
+
+        @rtype: Dictionary
+        @return: The map containing the statistics of the scheduler.
+        """
+
+        return {
+            "pending" : len(self.timestamp_queue),
+            "running" : self.active,
+            "executed" : self.lag_count,
+            "misfires" : self.misfires,
+            "skips" : self.skips,
+            "timeouts" : self.timeouts,
+            "lag_average" : self.lag_count and self.lag_total / self.lag_count or 0.0,
+            "lag_maximum" : self.lag_maximum,
+            "lag_last" : self.lag_last
+        }
 
     def is_busy(self):
         """
@@ -270,7 +383,7 @@ class Scheduler(threading.Thread):
         @return: If the scheduler is executing any kind of work.
         """
 
-        return self.busy_flag
+        return self.busy_flag or self.active > 0
 
     def is_running(self):
         """
@@ -282,3 +395,489 @@ class Scheduler(threading.Thread):
         """
 
         return self.continue_flag
+
+    def _schedule_task(self, task, timestamp):
+        """
+        Schedules the given task for the given timestamp, waking
+        the scheduler thread in case the task is the next one.
+
+        @type task: SchedulerTask
+        @param task: The task to be scheduled.
+        @type timestamp: float
+        @param timestamp: The timestamp for the execution of the task.
+        """
+
+        # acquires the timestamp lock
+        self.timestamp_lock.acquire()
+
+        try:
+            # sets the timestamp in the task and pushes it into the
+            # heap (the sequence keeps the order for equal timestamps)
+            task.timestamp = timestamp
+            heapq.heappush(self.timestamp_queue, (timestamp, self.sequence, task))
+            self.sequence += 1
+
+            # in case the task is the next one to be executed the
+            # scheduler thread must be woken to update its wait
+            if self.timestamp_queue[0][2] is task: self.timestamp_condition.notify()
+        finally:
+            # releases the timestamp lock
+            self.timestamp_lock.release()
+
+    def _next_task(self):
+        """
+        Retrieves (and removes from the queue) the next task that
+        is due for execution, waiting until the timestamp of the
+        first task is reached, must be called with the lock.
+
+        In case the wait is interrupted (eg: new task or stop)
+        an invalid value is returned.
+
+        @rtype: SchedulerTask
+        @return: The next task due for execution.
+        """
+
+        # removes the cancelled tasks from the top of the
+        # heap (lazy removal of the cancelled tasks)
+        while self.timestamp_queue and self.timestamp_queue[0][2].cancelled:
+            heapq.heappop(self.timestamp_queue)
+
+        # in case there are no tasks waits (indefinitely)
+        # until a new task is added or the scheduler stopped
+        if not self.timestamp_queue:
+            self.timestamp_condition.wait()
+            return None
+
+        # in case the timestamp of the first task has not been
+        # reached waits until it's reached (or interrupted)
+        timestamp = self.timestamp_queue[0][0]
+        current_timestamp = time.time()
+        if current_timestamp < timestamp:
+            self.timestamp_condition.wait(timestamp - current_timestamp)
+            return None
+
+        # pops the first task from the heap (done before the
+        # calling to avoid race condition) and returns it
+        _timestamp, _sequence, task = heapq.heappop(self.timestamp_queue)
+        return task
+
+    def _dispatch_task(self, task):
+        """
+        Dispatches the given (due) task for execution in the pool
+        of workers (or in the current thread if there's no pool),
+        taking into account the misfire policy and the concurrency
+        limit of the task, must be called with the lock.
+
+        @type task: SchedulerTask
+        @param task: The task to be dispatched.
+        """
+
+        # computes the lag of the task and checks if the execution
+        # is misfired (lag larger than the grace time)
+        lag = max(time.time() - task.timestamp, 0.0)
+        grace = self.misfire_grace if task.grace == None else task.grace
+        misfired = lag > grace
+        if misfired: self.misfires += 1
+
+        # in case the execution is misfired and the policy is to
+        # skip the misfired executions the task is not executed
+        if misfired and task.misfire == SKIP_MISFIRE:
+            self.skips += 1
+            return
+
+        # in case the task already has the maximum number of
+        # concurrent executions running the execution is skipped
+        if task.running >= task.max_instances:
+            self.skips += 1
+            self.logger.warning("Skipping execution of '%s' (%d running)" % (task, task.running))
+            return
+
+        # updates the lag metrics with the delay between the
+        # timestamp of the task and the current time
+        self.lag_count += 1
+        self.lag_total += lag
+        self.lag_maximum = max(self.lag_maximum, lag)
+        self.lag_last = lag
+
+        # increments the running counters (before the execution)
+        # and sets the busy flag
+        task.running += 1
+        self.active += 1
+        self.busy_flag = True
+
+        # in case there's a pool of workers submits the execution
+        # of the task to it and returns immediately
+        if self.pool:
+            self.pool.submit(self._execute_task, task)
+            return
+
+        # releases the timestamp lock (avoids waiting for callables)
+        # and executes the task in the current thread
+        self.timestamp_lock.release()
+        try: self._execute_task(task)
+        finally: self.timestamp_lock.acquire()
+
+    def _execute_task(self, task):
+        """
+        Executes the given task, warning in case the execution
+        exceeds the timeout of the task, must be called without
+        the lock (may be of long duration).
+
+        @type task: SchedulerTask
+        @param task: The task to be executed.
+        """
+
+        # retrieves the initial time and calls the callable
+        # (element), logging any exception raised by it
+        initial = time.time()
+        try: task.callable()
+        except: self.logger.exception("Problem executing '%s'" % task)
+
+        # computes the duration of the execution and checks
+        # if the timeout of the task has been exceeded
+        duration = time.time() - initial
+        timeout = task.timeout and duration > task.timeout
+        if timeout: self.logger.warning("Execution of '%s' took %.3fs (timeout %.3fs)" % (task, duration, task.timeout))
+
+        # decrements the running counters (after the execution)
+        # and updates the busy flag
+        self.timestamp_lock.acquire()
+        try:
+            task.running -= 1
+            self.active -= 1
+            self.busy_flag = self.active > 0
+            if timeout: self.timeouts += 1
+        finally:
+            self.timestamp_lock.release()
+
+    def _reschedule_task(self, task):
+        """
+        Re-schedules the given task in case it's a recurring
+        task and it has not been cancelled, must be called
+        with the lock.
+
+        In case the misfire policy is to run late the missed
+        executions are kept, otherwise they're skipped.
+
+        @type task: SchedulerTask
+        @param task: The task to be re-scheduled.
+        """
+
+        if not task.schedule or task.cancelled: return
+        current_timestamp = not task.misfire == RUN_LATE_MISFIRE and time.time() or None
+        timestamp = task.schedule.next(task.timestamp, current_timestamp)
+        self._schedule_task(task, timestamp)
+
+class SchedulerTask(object):
+    """
+    Class representing a task (callable) scheduled in the
+    scheduler, used as handle for the cancellation.
+    """
+
+    callable = None
+    """ The callable object to be called """
+
+    schedule = None
+    """ The schedule of the task (for recurring tasks) """
+
+    timestamp = None
+    """ The timestamp of the next execution of the task """
+
+    cancelled = False
+    """ Flag controlling if the task has been cancelled """
+
+    misfire = None
+    """ The misfire policy (skip, coalesce or run_late) """
+
+    max_instances = None
+    """ The maximum number of concurrent executions of the task """
+
+    grace = None
+    """ The amount of time (in seconds) after the timestamp in
+    which the execution is not considered a misfire, in case it's
+    not set the scheduler default is used """
+
+    timeout = None
+    """ The amount of time (in seconds) after which the
+    execution of the task is considered to be too long """
+
+    running = 0
+    """ The number of executions of the task currently running """
+
+    def __init__(self, callable, schedule = None, misfire = RUN_LATE_MISFIRE, max_instances = 1, grace = None, timeout = None):
+        """
+        Constructor of the class.
+
+        @type callable: Callable
+        @param callable: The callable object to be called.
+        @type schedule: Object
+        @param schedule: The schedule of the task (for recurring
+        tasks), in case it's not defined the task is called once.
+        @type misfire: String
+        @param misfire: The misfire policy (skip, coalesce or run_late).
+        @type max_instances: int
+        @param max_instances: The maximum number of concurrent
+        executions of the task.
+        @type grace: float
+        @param grace: The amount of time (in seconds) after the
+        timestamp in which the execution is not a misfire.
+        @type timeout: float
+        @param timeout: The amount of time (in seconds) after which
+        a warning is issued for the execution.
+        """
+
+        self.callable = callable
+        self.schedule = schedule
+        self.misfire = misfire
+        self.max_instances = max_instances
+        self.grace = grace
+        self.timeout = timeout
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, getattr(self.callable, "__name__", repr(self.callable)))
+
+    def cancel(self):
+        """
+        Cancels the task, the task is not called (anymore) after
+        the cancellation (unless it's already being called).
+        """
+
+        self.cancelled = True
+
+class WorkerPool(object):
+    """
+    Simple pool of (daemon) worker threads that execute the
+    functions submitted to a shared queue.
+    """
+
+    workers = None
+    """ The number of worker threads in the pool """
+
+    queue = None
+    """ The queue of functions (and arguments) to be executed """
+
+    threads = []
+    """ The list of worker threads of the pool """
+
+    def __init__(self, workers = DEFAULT_POOL_WORKERS):
+        """
+        Constructor of the class.
+
+        @type workers: int
+        @param workers: The number of worker threads in the pool.
+        """
+
+        self.workers = workers
+        self.queue = Queue.Queue()
+        self.threads = []
+
+    def start(self):
+        """
+        Starts the worker threads of the pool.
+        """
+
+        self.threads = []
+
+        for _index in range(self.workers):
+            thread = threading.Thread(target = self._work)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """
+        Stops the worker threads of the pool, after the
+        execution of the functions already submitted.
+        """
+
+        for _thread in self.threads: self.queue.put(None)
+
+    def join(self, timeout = None):
+        """
+        Waits for the (stopped) worker threads of the pool
+        to finish the execution of their functions.
+
+        @type timeout: float
+        @param timeout: The maximum amount of time (in seconds)
+        to wait for each of the worker threads.
+        """
+
+        for thread in self.threads: thread.join(timeout)
+        self.threads = []
+
+    def submit(self, function, *args):
+        """
+        Submits the given function (with the arguments) for
+        execution in one of the worker threads.
+
+        @type function: Function
+        @param function: The function to be executed.
+        """
+
+        self.queue.put((function, args))
+
+    def _work(self):
+        # iterates continuously retrieving the functions from
+        # the queue and executing them (stops on the sentinel)
+        while True:
+            item = self.queue.get()
+            if not item: break
+            function, args = item
+            function(*args)
+
+class IntervalSchedule(object):
+    """
+    Schedule that defines fixed intervals between calls, the
+    times are computed from the previous timestamp (no drift).
+    """
+
+    interval = None
+    """ The interval (in seconds) between calls """
+
+    def __init__(self, interval):
+        """
+        Constructor of the class.
+
+        @type interval: float
+        @param interval: The interval (in seconds) between calls.
+        """
+
+        self.interval = interval
+
+    def next(self, timestamp, current_timestamp = None):
+        """
+        Retrieves the timestamp of the next call after the given
+        timestamp, in case the current timestamp is provided the
+        missed calls are skipped (next timestamp in the future).
+
+        @type timestamp: float
+        @param timestamp: The timestamp of the previous call.
+        @type current_timestamp: float
+        @param current_timestamp: The current timestamp.
+        @rtype: float
+        @return: The timestamp of the next call.
+        """
+
+        timestamp += self.interval
+        if current_timestamp and timestamp <= current_timestamp:
+            missed = int((current_timestamp - timestamp) / self.interval) + 1
+            timestamp += missed * self.interval
+        return timestamp
+
+class CronSchedule(object):
+    """
+    Schedule that defines the calls using a cron expression
+    with the minute, hour, day, month and weekday fields, each
+    field may be a wildcard, a list, a range and/or a step.
+    """
+
+    expression = None
+    """ The cron expression of the schedule """
+
+    fields = None
+    """ The list containing the set of valid values
+    for each of the fields of the expression """
+
+    def __init__(self, expression):
+        """
+        Constructor of the class.
+
+        @type expression: String
+        @param expression: The cron expression of the schedule.
+        """
+
+        self.expression = expression
+        self.fields = self._parse(expression)
+
+    def next(self, timestamp, current_timestamp = None):
+        """
+        Retrieves the timestamp of the next call after the given
+        timestamp (and after the current timestamp if provided).
+
+        @type timestamp: float
+        @param timestamp: The timestamp of the previous call.
+        @type current_timestamp: float
+        @param current_timestamp: The current timestamp.
+        @rtype: float
+        @return: The timestamp of the next call.
+        """
+
+        # retrieves the set of values for each of the fields and
+        # checks if the day or the weekday fields are restricted
+        minutes, hours, days, months, weekdays = self.fields
+        restricted_day = not len(days) == 31
+        restricted_weekday = not len(weekdays) == 7
+
+        # starts the search at the minute after the maximum
+        # between the timestamp and the current timestamp
+        timestamp = max(timestamp, current_timestamp or 0)
+        date = datetime.datetime.fromtimestamp(timestamp)
+        date = date.replace(second = 0, microsecond = 0) + datetime.timedelta(minutes = 1)
+
+        # iterates (skipping the invalid months, days and hours)
+        # until a valid date is found for the expression
+        for _index in xrange(MAXIMUM_CRON_ITERATIONS):
+            # checks if the day is valid, in case both the day and
+            # the weekday are restricted any of them is valid
+            day_valid = date.day in days
+            weekday_valid = (date.weekday() + 1) % 7 in weekdays
+            if restricted_day and restricted_weekday: day_valid = day_valid or weekday_valid
+            else: day_valid = day_valid and weekday_valid
+
+            if not date.month in months:
+                year, month = date.month == 12 and (date.year + 1, 1) or (date.year, date.month + 1)
+                date = datetime.datetime(year, month, 1)
+            elif not day_valid:
+                date = datetime.datetime(date.year, date.month, date.day) + datetime.timedelta(days = 1)
+            elif not date.hour in hours:
+                date = date.replace(minute = 0) + datetime.timedelta(hours = 1)
+            elif not date.minute in minutes:
+                date += datetime.timedelta(minutes = 1)
+            else:
+                return time.mktime(date.timetuple())
+
+        # raises a runtime error (no valid date found)
+        raise RuntimeError("no valid time found for cron expression '%s'" % self.expression)
+
+    def _parse(self, expression):
+        """
+        Parses the given cron expression into the list of sets
+        of valid values for each of the fields.
+
+        @type expression: String
+        @param expression: The cron expression to be parsed.
+        @rtype: List
+        @return: The list of sets of valid values for the fields.
+        """
+
+        # splits the expression into the fields and verifies
+        # that the number of fields is the expected one
+        parts = expression.split()
+        if not len(parts) == len(CRON_RANGES):
+            raise ValueError("invalid cron expression '%s'" % expression)
+
+        # starts the list of fields and iterates over each
+        # of the parts and ranges to parse them
+        fields = []
+        for part, (minimum, maximum) in zip(parts, CRON_RANGES):
+            values = set()
+            for item in part.split(","):
+                # splits the item into the range and the step
+                # and parses the range into start and end
+                range_string, _step, step_string = item.partition("/")
+                step = step_string and int(step_string) or 1
+                if range_string == "*": start, end = minimum, maximum
+                elif "-" in range_string: start, end = [int(value) for value in range_string.split("-", 1)]
+                else: start = end = int(range_string)
+
+                # verifies that the values are valid and adds them to
+                # the set of values of the field, note that in the weekday
+                # field the sunday may be defined as seven (converted to zero)
+                weekday = maximum == 6
+                if start < minimum or end > maximum + weekday or start > end or step < 1:
+                    raise ValueError("invalid cron field '%s'" % item)
+                values.update([value % 7 if weekday else value for value in range(start, end + 1, step)])
+            fields.append(values)
+
+        # returns the parsed fields
+        return fields
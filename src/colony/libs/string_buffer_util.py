@@ -38,11 +38,15 @@ __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
 import os
-import copy
 
-class StringBuffer:
+class StringBuffer(object):
     """
     The string buffer class.
+
+    The written chunks are kept in a persistent (immutable) linked
+    list of nodes, each node referencing the previous one, so that the
+    duplicates share the structure (copy on write) and the duplication
+    is a constant time operation.
     """
 
     softspace = 0
@@ -51,6 +55,18 @@ class StringBuffer:
     closed = False
     """ The closed value """
 
+    tail = None
+    """ The last node of the (persistent) list of chunks, each node
+    is a tuple containing the previous node, the chunk and the total
+    size up to (and including) the chunk """
+
+    current_value = None
+    """ The cached (joined) value of the chunks """
+
+    current_tail = None
+    """ The tail node from which the current value was generated,
+    used to check if the cached value is still valid """
+
     def __init__(self, fast = True):
         """
         Constructor of the class.
@@ -59,8 +75,9 @@ class StringBuffer:
         @param fast: The fast flag to control the string buffer type.
         """
 
-        self.string_list = []
+        self.tail = None
         self.current_value = str()
+        self.current_tail = None
         self.dirty = False
         self.current_position = 0
         self.current_size = 0
@@ -83,15 +100,31 @@ class StringBuffer:
         # regenerates the current value
         self.regenerate()
 
-        if size:
-            return_value = self.current_value[self.current_position:self.current_position + size]
-            self.seek(size, os.SEEK_CUR)
-        else:
-            return_value = self.current_value[self.current_position:]
-            self.seek(self.current_size, os.SEEK_SET)
+        return self._read(self.current_value, size)
 
-        # returns the return value
-        return return_value
+    def read_view(self, size = None):
+        """
+        Reads a buffer from the string buffer with the given
+        maximum size as a memory view of the current value, no
+        copy of the data is done (zero copy).
+
+        In case the current value is an unicode value (no memory
+        view is possible) the (sliced) unicode value is returned.
+
+        @type size: int
+        @param size: The maximum size of the buffer to be read.
+        @rtype: memoryview
+        @return: The memory view for the read buffer.
+        """
+
+        # regenerates the current value (only in case
+        # there are new chunks) and creates the view
+        # (only possible for byte string values)
+        self.regenerate()
+        is_string = type(self.current_value) == str
+        view = memoryview(self.current_value) if is_string else self.current_value
+
+        return self._read(view, size)
 
     def write(self, string_value):
         """
@@ -122,8 +155,9 @@ class StringBuffer:
         Resets the string buffer.
         """
 
-        self.string_list = []
+        self.tail = None
         self.current_value = str()
+        self.current_tail = None
         self.dirty = False
         self.current_position = 0
         self.current_size = 0
@@ -265,12 +299,13 @@ class StringBuffer:
 
     def regenerate(self):
         """
-        Regenerates the current value.
+        Regenerates the current value, in case new chunks
+        have been written since the last regeneration.
         """
 
-        # in case the buffer is dirty
-        # or the mode fast is enabled
-        if self.dirty or self.fast:
+        # in case the tail has changed since the
+        # last generation of the current value
+        if not self.current_tail is self.tail:
             # regenerates the current value
             self._regenerate()
 
@@ -279,19 +314,25 @@ class StringBuffer:
         Duplicates the string buffer, returning the
         duplicated value.
 
+        The duplicate shares the chunks with the original
+        buffer (constant time) and the writes in any of them
+        do not affect the other (copy on write).
+
         @rtype: StringBuffer
         @return: The duplicated string buffer.
         """
 
         # creates the new string buffer instance
-        duplicated_string_buffer = StringBuffer()
+        duplicated_string_buffer = StringBuffer(self.fast)
 
         # sets the duplicated string buffer values
-        duplicated_string_buffer.string_list = copy.copy(self.string_list)
-        duplicated_string_buffer.current_value = copy.copy(self.current_value)
+        # (the nodes are immutable and may be shared)
+        duplicated_string_buffer.tail = self.tail
+        duplicated_string_buffer.current_value = self.current_value
+        duplicated_string_buffer.current_tail = self.current_tail
         duplicated_string_buffer.dirty = self.dirty
         duplicated_string_buffer.current_position = self.current_position
-        duplicated_string_buffer.fast = self.fast
+        duplicated_string_buffer.current_size = self.current_size
 
         # returns the duplicated string buffer
         return duplicated_string_buffer
@@ -307,8 +348,14 @@ class StringBuffer:
 
         # iterates over the range of item count
         for _index in range(item_count):
-            # pops an item from the string list
-            self.string_list.pop()
+            # moves the tail to the previous node
+            # (removes the last chunk)
+            self.tail = self.tail[0]
+
+        # updates the current size (and position) to
+        # the size up to the new tail
+        self.current_size = self.tail and self.tail[2] or 0
+        self.current_position = min(self.current_position, self.current_size)
 
     def get_last(self, index = -1):
         """
@@ -321,20 +368,59 @@ class StringBuffer:
         @return: The last write.
         """
 
-        # retrieves the absolute index
-        absolute_index = abs(index)
+        # in case the index is positive the complete
+        # list of chunks is required (from the start)
+        if index >= 0:
+            string_list = self.string_list
+            return index < len(string_list) and string_list[index] or None
 
-        # retrieves the string list length
-        string_list_length = len(self.string_list)
+        # walks back the nodes until the node with the
+        # index is reached or the start of the list
+        node = self.tail
+        for _index in range(abs(index) - 1):
+            if not node: break
+            node = node[0]
 
-        # in case the absolute index "overflows"
-        # the string list length
-        if absolute_index > string_list_length:
-            # return invalid
-            return None
+        # in case the index "overflows" the number
+        # of chunks returns invalid
+        if not node: return None
 
         # returns the "last" element
-        return self.string_list[index]
+        return node[1]
+
+    def get_string_list(self):
+        """
+        Retrieves the list of chunks written to the string
+        buffer (in order of writing).
+
+        @rtype: List
+        @return: The list of chunks of the string buffer.
+        """
+
+        # walks back the nodes collecting the chunks and
+        # then reverses the list (writing order)
+        string_list = []
+        node = self.tail
+        while node:
+            string_list.append(node[1])
+            node = node[0]
+        string_list.reverse()
+        return string_list
+
+    string_list = property(get_string_list)
+
+    def _read(self, value, size):
+        # slices the value (string or view) from the current position
+        # with the given size and seeks the buffer accordingly
+        if size:
+            return_value = value[self.current_position:self.current_position + size]
+            self.seek(size, os.SEEK_CUR)
+        else:
+            return_value = value[self.current_position:]
+            self.seek(self.current_size, os.SEEK_SET)
+
+        # returns the return value
+        return return_value
 
     def _write_fast(self, string_value):
         """
@@ -344,7 +430,8 @@ class StringBuffer:
         @param string_value: The string value to be written.
         """
 
-        self.string_list.append(string_value)
+        self.current_size += len(string_value)
+        self.tail = (self.tail, string_value, self.current_size)
 
     def _write_slow(self, string_value):
         """
@@ -354,9 +441,9 @@ class StringBuffer:
         @param string_value: The string value to be written.
         """
 
-        self.string_list.append(string_value)
-        self.dirty = True
         self.current_size += len(string_value)
+        self.tail = (self.tail, string_value, self.current_size)
+        self.dirty = True
         self.current_position = self.current_size
 
     def _regenerate(self):
@@ -364,11 +451,225 @@ class StringBuffer:
         Regenerates the current value (auxiliary method).
         """
 
-        # joins all the string list elements
-        self.current_value = "".join(self.string_list)
+        # joins all the chunks into the current value
+        self.current_value = "".join(self.get_string_list())
 
-        # recreates the string list with the current value
-        self.string_list = [self.current_value]
+        # replaces the tail with a single node for the current
+        # value (the previous nodes may still be shared)
+        self.tail = self.current_value and (None, self.current_value, self.current_size) or None
+        self.current_tail = self.tail
 
         # unsets the dirty flag
         self.dirty = False
+
+class BinaryStringBuffer(StringBuffer):
+    """
+    The binary string buffer class, a string buffer backed by
+    a (single) byte array with amortized growth, to be used for
+    binary (protocol) output with many small writes.
+
+    The writes accept any object supporting the buffer protocol
+    and the contents may be exported without copy either as a
+    single memory view or as a list of views (one per write).
+
+    Note that the byte array may not be resized (written)
+    while there are memory views exported from it.
+    """
+
+    byte_array = None
+    """ The byte array containing the data of the buffer """
+
+    offsets = []
+    """ The list of the end offsets of each of the writes """
+
+    def __init__(self, fast = True):
+        """
+        Constructor of the class.
+
+        @type fast: bool
+        @param fast: The fast flag to control the string buffer type
+        (in slow mode the position is moved to the end on write).
+        """
+
+        StringBuffer.__init__(self, fast)
+
+        self.byte_array = bytearray()
+        self.offsets = []
+        self.write = self._write_binary
+
+    def read(self, size = None):
+        """
+        Reads a buffer from the string buffer with the
+        given maximum size.
+
+        @type size: int
+        @param size: The maximum size of the buffer to be read.
+        """
+
+        # retrieves the end position of the read, and copies
+        # the contents into the return value
+        end_position = size and self.current_position + size or self.current_size
+        return_value = str(self.byte_array[self.current_position:end_position])
+
+        # updates the current position and returns the value
+        self.seek(end_position)
+        return return_value
+
+    def read_view(self, size = None):
+        """
+        Reads a buffer from the string buffer with the given
+        maximum size as a memory view of the byte array, no
+        copy of the data is done (zero copy).
+
+        @type size: int
+        @param size: The maximum size of the buffer to be read.
+        @rtype: memoryview
+        @return: The memory view for the read buffer.
+        """
+
+        end_position = size and self.current_position + size or self.current_size
+        return_value = memoryview(self.byte_array)[self.current_position:end_position]
+        self.seek(end_position)
+        return return_value
+
+    def reset(self):
+        """
+        Resets the string buffer.
+        """
+
+        StringBuffer.reset(self)
+        self.byte_array = bytearray()
+        self.offsets = []
+
+    def seek(self, offset, whence = os.SEEK_SET):
+        """
+        Seeks the string buffer to the given offset with the given jump mode,
+        defined with the whence (the position is limited to the size).
+
+        @type offset: int
+        @param offset: The offset of the jump.
+        @type whence: int
+        @param whence: The jump mode to be used.
+        """
+
+        StringBuffer.seek(self, offset, whence)
+        self.current_position = min(self.current_position, self.current_size)
+
+    def get_value(self):
+        """
+        Retrieves the current string value (copy of the data).
+        """
+
+        return str(self.byte_array)
+
+    def getbuffer(self):
+        """
+        Retrieves a memory view for the complete contents of
+        the buffer, no copy of the data is done.
+
+        @rtype: memoryview
+        @return: The memory view for the contents of the buffer.
+        """
+
+        return memoryview(self.byte_array)
+
+    def get_chunks(self):
+        """
+        Retrieves the list of memory views for each of the writes
+        to the buffer, to be used in vectored (writev) operations,
+        no copy of the data is done.
+
+        @rtype: List
+        @return: The list of memory views for the writes.
+        """
+
+        view = memoryview(self.byte_array)
+        start_offsets = [0] + self.offsets[:-1]
+        return [view[start:end] for start, end in zip(start_offsets, self.offsets)]
+
+    def regenerate(self):
+        """
+        Regenerates the current value (nothing to be done
+        the byte array is always up to date).
+        """
+
+        pass
+
+    def duplicate(self):
+        """
+        Duplicates the string buffer, returning the
+        duplicated value (the byte array is copied).
+
+        @rtype: BinaryStringBuffer
+        @return: The duplicated string buffer.
+        """
+
+        # creates the new string buffer instance
+        duplicated_string_buffer = BinaryStringBuffer(self.fast)
+
+        # sets the duplicated string buffer values
+        duplicated_string_buffer.byte_array = bytearray(self.byte_array)
+        duplicated_string_buffer.offsets = list(self.offsets)
+        duplicated_string_buffer.current_position = self.current_position
+        duplicated_string_buffer.current_size = self.current_size
+
+        # returns the duplicated string buffer
+        return duplicated_string_buffer
+
+    def rollback_last(self, item_count = 1):
+        """
+        Rollsback the last write.
+
+        @type item_count: int
+        @param item_count: The number of items
+        to be "rollbacked".
+        """
+
+        # removes the offsets of the writes and truncates the
+        # byte array to the end of the remaining writes
+        del self.offsets[-item_count:]
+        self.current_size = self.offsets and self.offsets[-1] or 0
+        del self.byte_array[self.current_size:]
+        self.current_position = min(self.current_position, self.current_size)
+
+    def get_last(self, index = -1):
+        """
+        Retrieves the last write.
+
+        @type index: int
+        @param index: The index to retrieve from
+        the string list.
+        @rtype: String
+        @return: The last write.
+        """
+
+        string_list = self.get_string_list()
+        if abs(index) > len(string_list) or index == len(string_list): return None
+        return string_list[index]
+
+    def get_string_list(self):
+        """
+        Retrieves the list of chunks written to the string
+        buffer (in order of writing).
+
+        @rtype: List
+        @return: The list of chunks of the string buffer.
+        """
+
+        return [chunk.tobytes() for chunk in self.get_chunks()]
+
+    string_list = property(get_string_list)
+
+    def _write_binary(self, string_value):
+        """
+        Writes the string value (any object supporting the
+        buffer protocol) into the byte array.
+
+        @type string_value: String
+        @param string_value: The string value to be written.
+        """
+
+        self.byte_array += string_value
+        self.current_size = len(self.byte_array)
+        self.offsets.append(self.current_size)
+        if not self.fast: self.current_position = self.current_size
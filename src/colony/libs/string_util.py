@@ -38,6 +38,13 @@ __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
 import re
+import types
+import binascii
+
+XOR_BLOCK_SIZE = 65536
+""" The (approximate) size of the blocks used in the xor
+operation against a repeating key, the key is only repeated
+up to this size (instead of the size of the string) """
 
 UNDERSCORE_FIRST_VALUE = "(.)([A-Z][a-z]+)"
 """ The underscore first value """
@@ -75,23 +82,87 @@ def xor_string_value(first_string, second_string):
         # raises the value erorr exception
         raise ValueError("Arguments to xor string must have the same length")
 
-    # creates the list to hold the resulting characters
-    result_character_list = []
+    # runs the xor operation over the complete strings
+    # (buffer level) to retrieve the final xor result
+    xor_result = _xor_buffer(first_string, second_string)
 
-    # iterates over all the characters in both strings
-    for first_character, second_character in zip(first_string, second_string):
-        # calculates the result character from the first and second characters
-        result_character = chr(ord(first_character) ^ ord(second_character))
+    # returns the xor result
+    return xor_result
 
-        # adds the result character to the result character list
-        result_character_list.append(result_character)
+def xor_string_key(string_value, key, offset = 0):
+    """
+    Runs the xor bitwise operation over all the items of
+    the string against the (repeating) key, retrieving the
+    result (eg: protocol masking).
+    The key is repeated only up to the block size, so the
+    memory used does not depend on the size of the string.
 
-    # joins the result character list to retrieve
-    # the final xor result
-    xor_result = "".join(result_character_list)
+    @type string_value: String
+    @param string_value: The string to the xor operation.
+    @type key: String
+    @param key: The key to be repeated over the string.
+    @type offset: int
+    @param offset: The offset in the key of the first item of
+    the string (useful for the streaming of values).
+    @rtype: String
+    @return: The "string" result of the xor operation.
+    """
 
-    # returns the xor result
-    return xor_result
+    # retrieves the length of the key
+    key_length = len(key)
+
+    # in case the key is empty
+    if not key_length:
+        # raises the value erorr exception
+        raise ValueError("Key to xor string must not be empty")
+
+    # rotates the key according to the offset and repeats
+    # it to create the key for the block (aligned with the key)
+    offset %= key_length
+    key = key[offset:] + key[:offset]
+    block_key = key * max(XOR_BLOCK_SIZE // key_length, 1)
+    block_size = len(block_key)
+
+    # runs the xor operation over each of the blocks
+    # of the string against the block key
+    xor_list = [_xor_buffer(string_value[index:index + block_size], block_key) for index in xrange(0, len(string_value), block_size)]
+
+    # joins the xor list to retrieve the final
+    # xor result and returns it
+    return "".join(xor_list)
+
+def _xor_buffer(first_buffer, second_buffer):
+    """
+    Runs the xor bitwise operation over the first buffer
+    and the (leading) items of the second buffer, using the
+    conversion of the buffers into (long) integers so that
+    the operation is run over whole machine words.
+
+    @type first_buffer: String
+    @param first_buffer: The first buffer to the xor operation.
+    @type second_buffer: String
+    @param second_buffer: The second buffer to the xor operation,
+    must be at least as long as the first buffer.
+    @rtype: String
+    @return: The "string" result of the xor operation.
+    """
+
+    # retrieves the length of the first buffer, in case
+    # it's empty there's nothing to be done
+    length = len(first_buffer)
+    if not length: return ""
+
+    # encodes the unicode buffers using the latin-1 encoding (one
+    # byte per character as the ordinal values), note that the
+    # characters out of that range raise a value error
+    if type(first_buffer) == types.UnicodeType: first_buffer = first_buffer.encode("latin-1")
+    if type(second_buffer) == types.UnicodeType: second_buffer = second_buffer.encode("latin-1")
+
+    # converts both buffers into integers and runs the xor
+    # operation over them, then converts the resulting
+    # integer back into a buffer (with the same length)
+    value = long(binascii.hexlify(first_buffer), 16) ^ long(binascii.hexlify(second_buffer[:length]), 16)
+    return binascii.unhexlify("%0*x" % (length * 2, value))
 
 def to_underscore(string_value):
     """
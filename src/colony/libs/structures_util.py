@@ -38,6 +38,17 @@ __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
 import types
+import collections
+
+DEFAULT_JOURNAL_SIZE = 1024
+""" The default maximum number of operations kept
+in the journal of the journaled list """
+
+APPEND_OPERATION = 1
+""" The append operation (journal) type """
+
+REMOVE_OPERATION = 2
+""" The remove operation (journal) type """
 
 class JournaledList(list):
     """
@@ -45,13 +56,31 @@ class JournaledList(list):
     remove operation in a jounalized format.
     This structures is relevant for use cases where
     "diffs" around a base list must be kept.
+
+    Besides the (current) appends and removes lists the
+    operations are kept in a bounded (ring buffer) journal
+    of versioned operations, so that the consumers may
+    retrieve the changes since a certain version (diff).
     """
 
-    _appends = []
-    """ The list containing the various appends to the list (journal) """
+    _appends = None
+    """ The index containing the various appends to the list (journal) """
+
+    _removes = None
+    """ The index containing the various removes from the list (journal) """
 
-    _removes = []
-    """ The list containing the various removes from the list (journal) """
+    _journal = None
+    """ The bounded (ring buffer) journal of operations, each operation
+    is a tuple containing the version, the type and the object """
+
+    _counts = None
+    """ The side index associating the objects in the list with their
+    count, used for constant time membership tests, in case it's not
+    set it must be rebuilt (invalidated by untracked operations) """
+
+    version = 0
+    """ The current version of the list, incremented
+    on each of the journaled operations """
 
     def __init__(self, *args, **kwargs):
         """
@@ -59,12 +88,26 @@ class JournaledList(list):
         may be used together with a previously "simple" list
         to start the jounalized list with initial (non logged)
         values.
+
+        The (optional) journal size keyword argument defines
+        the maximum number of operations kept in the journal.
         """
 
+        journal_size = kwargs.pop("journal_size", DEFAULT_JOURNAL_SIZE)
         list.__init__(self, *args, **kwargs)
 
-        self._appends = []
-        self._removes = []
+        self._appends = JournalIndex()
+        self._removes = JournalIndex()
+        self._journal = collections.deque(maxlen = journal_size)
+        self._counts = None
+        self.version = 0
+
+    def __contains__(self, object):
+        # retrieves the (side) index of counts and in case
+        # the object is hashable uses it for the test
+        counts = self._get_counts()
+        try: return object in counts
+        except TypeError: return list.__contains__(self, object)
 
     def append(self, object):
         """
@@ -76,21 +119,19 @@ class JournaledList(list):
         """
 
         # appends the object to the list
-        list.append(self, object)
+        self._append(object)
 
         # in case the object is present in the removes
-        # list it must be removed (previous reverse operations
-        # should reverted)
-        if object in self._removes:
-            # removes the object from the removes list
-            # (reversion of operation)
-            self._removes.remove(object)
-        # otherwise the object must be added to the
-        # appends list (normal behavior)
-        else:
-            # appends the object to the appends list
+        # index it must be removed (previous reverse operations
+        # should reverted), otherwise the object must be added
+        # to the appends index (normal behavior)
+        if not self._removes.discard(object):
+            # appends the object to the appends index
             # (for logging)
-            self._appends.append(object)
+            self._appends.add(object)
+
+        # registers the operation in the (versioned) journal
+        self._register(APPEND_OPERATION, object)
 
     def remove(self, object):
         """
@@ -103,21 +144,55 @@ class JournaledList(list):
 
         # removes the object from the list, an exception
         # should be raises in case it fails
-        list.remove(self, object)
+        self._remove(object)
 
         # in case the object is present in the appends
-        # list it must be removed (previous reverse operations
-        # should reverted)
-        if object in self._appends:
-            # removes the object from the appends list
-            # (reversion of operation)
-            self._appends.remove(object)
-        # otherwise the object must be added to the
-        # removes list (normal behavior)
-        else:
-            # appends the object to the removes list
+        # index it must be removed (previous reverse operations
+        # should reverted), otherwise the object must be added
+        # to the removes index (normal behavior)
+        if not self._appends.discard(object):
+            # appends the object to the removes index
             # (for logging)
-            self._removes.append(object)
+            self._removes.add(object)
+
+        # registers the operation in the (versioned) journal
+        self._register(REMOVE_OPERATION, object)
+
+    def extend(self, iterable):
+        self._counts = None
+        list.extend(self, iterable)
+
+    def insert(self, index, object):
+        self._counts = None
+        list.insert(self, index, object)
+
+    def pop(self, *args):
+        self._counts = None
+        return list.pop(self, *args)
+
+    def __setitem__(self, index, object):
+        self._counts = None
+        list.__setitem__(self, index, object)
+
+    def __delitem__(self, index):
+        self._counts = None
+        list.__delitem__(self, index)
+
+    def __setslice__(self, start, end, iterable):
+        self._counts = None
+        list.__setslice__(self, start, end, iterable)
+
+    def __delslice__(self, start, end):
+        self._counts = None
+        list.__delslice__(self, start, end)
+
+    def __iadd__(self, iterable):
+        self._counts = None
+        return list.__iadd__(self, iterable)
+
+    def __imul__(self, count):
+        self._counts = None
+        return list.__imul__(self, count)
 
     def clear_jounal(self):
         """
@@ -127,15 +202,16 @@ class JournaledList(list):
         unit is required for a new phase
         """
 
-        self._appends[:] = []
-        self._removes[:] = []
+        self._appends.clear()
+        self._removes.clear()
 
     def get_appends(self):
         """
         Retrieves the list of the current (valid) append operations
-        from the journaled list.
+        from the journaled list, the returned index is a live (ordered)
+        view that is updated with the operations over the list.
 
-        @rtype: List
+        @rtype: JournalIndex
         @return: The list of the current (valid) append operations
         from the journaled list.
         """
@@ -145,15 +221,63 @@ class JournaledList(list):
     def get_removes(self):
         """
         Retrieves the list of the current (valid) remove operations
-        from the journaled list.
+        from the journaled list, the returned index is a live (ordered)
+        view that is updated with the operations over the list.
 
-        @rtype: List
+        @rtype: JournalIndex
         @return: The list of the current (valid) remove operations
         from the journaled list.
         """
 
         return self._removes
 
+    def diff(self, since_version = 0):
+        """
+        Retrieves the (compact) change set of the list since the
+        given version, the appends and removes of the same object
+        cancel each other.
+
+        In case the journal no longer contains the operations since
+        the given version (bounded journal) an invalid value is
+        returned and the consumer must copy the complete list.
+        Note that the objects of the list must be hashable.
+
+        @type since_version: int
+        @param since_version: The version from which the changes
+        should be retrieved.
+        @rtype: Tuple
+        @return: A tuple containing the current version, the list of
+        appended objects and the list of removed objects.
+        """
+
+        # in case the oldest operation in the journal is newer than
+        # the operation after the version there's not enough
+        # information for the diff (returns invalid)
+        oldest_version = self._journal and self._journal[0][0] or self.version + 1
+        if since_version + 1 < oldest_version and since_version < self.version: return None
+
+        # computes the net count for each of the objects changed
+        # after the version (appends increment removes decrement)
+        # keeping the order of the first change of each object
+        counts = {}
+        order = []
+        for version, operation, object in self._journal:
+            if version <= since_version: continue
+            if not object in counts:
+                order.append(object)
+                counts[object] = 0
+            counts[object] += operation == APPEND_OPERATION and 1 or -1
+
+        # creates the lists of appends and removes from the net
+        # count of the objects and returns the change set
+        appends = []
+        removes = []
+        for object in order:
+            count = counts[object]
+            if count > 0: appends.extend([object] * count)
+            elif count < 0: removes.extend([object] * -count)
+        return (self.version, appends, removes)
+
     def _append(self, object):
         """
         Appends an object to the list, avoiding the keeping
@@ -164,6 +288,7 @@ class JournaledList(list):
         """
 
         list.append(self, object)
+        self._count(object, 1)
 
     def _remove(self, object):
         """
@@ -175,6 +300,177 @@ class JournaledList(list):
         """
 
         list.remove(self, object)
+        self._count(object, -1)
+
+    def _register(self, operation, object):
+        """
+        Registers the given operation over the object in the
+        (versioned) journal, incrementing the version.
+
+        @type operation: int
+        @param operation: The type of operation (append or remove).
+        @type object: Object
+        @param object: The object of the operation.
+        """
+
+        self.version += 1
+        self._journal.append((self.version, operation, object))
+
+    def _count(self, object, delta):
+        """
+        Updates the count of the given object in the side index
+        (in case it's available) with the given delta.
+
+        @type object: Object
+        @param object: The object to be updated in the index.
+        @type delta: int
+        @param delta: The delta to be applied to the count.
+        """
+
+        counts = self._counts
+        if counts == None: return
+        try: count = counts.get(object, 0) + delta
+        except TypeError: return
+        if count > 0: counts[object] = count
+        else: del counts[object]
+
+    def _get_counts(self):
+        """
+        Retrieves the side index of counts, rebuilding it in
+        case it has been invalidated.
+
+        @rtype: Dictionary
+        @return: The map associating the objects with their count.
+        """
+
+        if self._counts == None:
+            counts = {}
+            for object in self:
+                try: counts[object] = counts.get(object, 0) + 1
+                except TypeError: pass
+            self._counts = counts
+        return self._counts
+
+class JournalIndex(object):
+    """
+    Ordered sequence of objects (with repetitions) used to
+    keep the appends and removes of the journaled list.
+
+    The objects are kept in a (circular) doubly linked list
+    of nodes and each object is associated with the queue of
+    its nodes (in order), so that both the adding and the
+    discarding of an object are constant time operations,
+    independent of the length of the sequence.
+    """
+
+    _map = None
+    """ The map associating each (hashable) object with the queue
+    of its nodes, each node is a list containing the previous node,
+    the next node and the object """
+
+    _root = None
+    """ The sentinel node of the (circular) list, the next
+    node of it is the first node and the previous the last """
+
+    _length = 0
+    """ The number of objects currently in the sequence """
+
+    def __init__(self):
+        """
+        Constructor of the class.
+        """
+
+        self._map = {}
+        self._root = []
+        self._root[:] = [self._root, self._root, None]
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        node = self._root[1]
+        while not node is self._root:
+            yield node[2]
+            node = node[1]
+
+    def __contains__(self, object):
+        try: return object in self._map
+        except TypeError: return object in list(self)
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def add(self, object):
+        """
+        Adds the given object to the end of the sequence.
+
+        @type object: Object
+        @param object: The object to be added to the sequence.
+        """
+
+        # creates the node for the object linking it at the
+        # end of the list and registers it in the queue of
+        # nodes of the object (in case it's hashable)
+        last = self._root[0]
+        node = [last, self._root, object]
+        last[1] = node
+        self._root[0] = node
+        self._length += 1
+        try: nodes = self._map.get(object, None)
+        except TypeError: return
+        if nodes == None: nodes = self._map[object] = collections.deque()
+        nodes.append(node)
+
+    def discard(self, object):
+        """
+        Discards the first occurrence of the given object from
+        the sequence, in case it exists.
+
+        @type object: Object
+        @param object: The object to be discarded from the sequence.
+        @rtype: bool
+        @return: If an occurrence of the object was discarded.
+        """
+
+        # retrieves the first node of the object from its queue
+        # of nodes, in case the object is not hashable the list
+        # is scanned for the node (linear time fallback)
+        try:
+            nodes = self._map.get(object, None)
+            if not nodes: return False
+            node = nodes.popleft()
+            if not nodes: del self._map[object]
+        except TypeError:
+            node = self._root[1]
+            while not node is self._root and not node[2] == object: node = node[1]
+            if node is self._root: return False
+
+        # unlinks the node from the list and
+        # decrements the length of the sequence
+        previous, next = node[0], node[1]
+        previous[1] = next
+        next[0] = previous
+        self._length -= 1
+        return True
+
+    def clear(self):
+        """
+        Clears the sequence, removing all of its objects.
+        """
+
+        self._map.clear()
+        self._root[:] = [self._root, self._root, None]
+        self._length = 0
 
 class OrderedMap(object):
     """
@@ -182,17 +478,23 @@ class OrderedMap(object):
     like syntax to create ordered elements.
 
     The ordered map uses a composing strategy to
-    achieve the extra behavior for order in map.
+    achieve the extra behavior for order in map, the
+    items are kept in a (circular) doubly linked list of
+    nodes indexed by key in a map, so that the setting and
+    removal of items are constant time operations.
     """
 
-    tuples_list = None
-    """ The list of tuples """
-
     _map = None
-    """ The map to be used internally for virtual access """
+    """ The map to be used internally for virtual access, associating
+    the key with the node of the item, each node is a list containing
+    the previous node, the next node, the key and the value """
+
+    _root = None
+    """ The sentinel node of the (circular) list, the next
+    node of it is the first node and the previous the last """
 
-    _keys = None
-    """ The internal keys list for ordered keys retrieval """
+    ordered_keys = True
+    """ Kept for compatibility, the keys are always ordered """
 
     def __init__(self, ordered_keys = False):
         """
@@ -200,19 +502,19 @@ class OrderedMap(object):
 
         @type ordered_keys: bool
         @param ordered_keys: If the keys should also be provided
-        in an ordered fashion (expensive remove operation).
+        in an ordered fashion (kept for compatibility, the keys
+        are always ordered without extra cost).
         """
 
-        self.tuples_list = []
         self._map = {}
-
-        if ordered_keys: self._keys = []
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None]
 
     def __len__(self):
         return self._map.__len__()
 
     def __getitem__(self, key):
-        return self._map[key]
+        return self._map[key][3]
 
     def __setitem__(self, key, value):
         self.__add_item(key, value)
@@ -226,14 +528,28 @@ class OrderedMap(object):
     def __contains__(self, item):
         return self._map.__contains__(item)
 
-    def get(self, key, default_value):
-        return self._map.get(key, default_value)
+    def get(self, key, default_value = None):
+        node = self._map.get(key, None)
+        if node == None: return default_value
+        return node[3]
 
     def values(self):
-        return self._map.values()
+        return [value for _key, value in self.iteritems()]
 
     def items(self):
-        return self.tuples_list
+        return list(self.iteritems())
+
+    def keys(self):
+        return list(self.iterkeys())
+
+    def iterkeys(self):
+        return OrderedMapIterator(self)
+
+    def itervalues(self):
+        return OrderedMapIterator(self, OrderedMapIterator.VALUES)
+
+    def iteritems(self):
+        return OrderedMapIterator(self, OrderedMapIterator.ITEMS)
 
     def extend(self, map):
         # iterates over all the map items
@@ -241,23 +557,24 @@ class OrderedMap(object):
             # sets the item in the structure
             self.__setitem__(key, value)
 
-    def keys(self):
-        # in case the keys (list) is not
-        # defined (no ordered keys used)
-        if self._keys == None:
-            keys = self._map.keys()
-        # otherwise the ordered keys list
-        # is available and must be used
-        else:
-            keys = self._keys
-
-        # returns the valid keys
-        return keys
+    def get_tuples_list(self):
+        """
+        Retrieves the list of (key and value) tuples
+        of the map in order.
+
+        @rtype: List
+        @return: The list of tuples of the map.
+        """
+
+        return self.items()
+
+    tuples_list = property(get_tuples_list)
 
     def __add_item(self, key, value):
         """
         Adds an item with the given key to the
-        internal structures.
+        internal structures, in case the key already
+        exists the item is moved to the end.
 
         @type key: String
         @param key: The key of the element to be added
@@ -274,16 +591,13 @@ class OrderedMap(object):
             # structures (using the key)
             self.__remove_item(key)
 
-        # adds the tuple to the tuples list
-        self.tuples_list.append((key, value))
-
-        # sets the value in the map
-        self._map[key] = value
-
-        # adds the key to the keys list (only in case
-        # the keys list is available and set and the key
-        # is not present in the keys list)
-        if not self._keys == None and not key in self._keys: self._keys.append(key)
+        # creates the node for the item linking it
+        # at the end of the list and sets it in the map
+        last = self._root[0]
+        node = [last, self._root, key, value]
+        last[1] = node
+        self._root[0] = node
+        self._map[key] = node
 
     def __remove_item(self, key):
         """
@@ -295,76 +609,98 @@ class OrderedMap(object):
         from the internal structures.
         """
 
-        # retrieves the value for the key
-        value = self._map[key]
-
-        # removes the tuple from the tuples list
-        self.tuples_list.remove((key, value))
-
-        # removes the value from the map
-        del self._map[key]
-
-        # removes the key from the keys list (only in case
-        # the keys list is available and set)
-        if not self._keys == None: self._keys.remove(key)
+        # removes the node from the map and unlinks it from
+        # the list, the next reference is kept so that the
+        # iterators over the node are able to continue and
+        # the previous reference is unset (removed node)
+        node = self._map.pop(key)
+        previous, next = node[0], node[1]
+        previous[1] = next
+        next[0] = previous
+        node[0] = None
 
 class OrderedMapIterator(object):
     """
-    The iterator for the ordered map.
+    The iterator for the ordered map, the iterator is
+    safe for the modification of the map during the
+    iteration (removed items are skipped).
     """
 
+    KEYS = 2
+    """ The index of the key in the node (keys iteration) """
+
+    VALUES = 3
+    """ The index of the value in the node (values iteration) """
+
+    ITEMS = None
+    """ The items (key and value) iteration mode """
+
     ordered_map = None
     """ The ordered map to be used """
 
-    current_index = None
-    """ The current index value """
+    current_node = None
+    """ The current node of the iteration """
 
-    def __init__(self, ordered_map):
+    mode = None
+    """ The iteration mode (keys, values or items) """
+
+    def __init__(self, ordered_map, mode = KEYS):
         """
         Constructor of the class.
 
         @type ordered_map: OrderedMap
         @param ordered_map: The ordered map to be used by the iterator.
+        @type mode: int
+        @param mode: The iteration mode (keys, values or items).
         """
 
         self.ordered_map = ordered_map
+        self.mode = mode
 
-        self.current_index = 0
+        self.current_node = ordered_map._root
+
+    def __iter__(self):
+        return self
 
     def next(self):
         """
-        Retrieves the next ordered map key.
+        Retrieves the next ordered map key (or value or item).
 
         @rtype: String
         @return: The next key in the ordered map.
         """
 
-        # retrieves the ordered map length
-        ordered_map_length = len(self.ordered_map)
+        # retrieves the next node skipping the removed
+        # nodes (nodes without previous reference)
+        node = self.current_node[1]
+        while node[0] == None: node = node[1]
 
-        # in case there is an overflow (current index is over the length)
-        if not ordered_map_length > self.current_index:
-            # breaks the iteration
+        # in case the end of the list has been
+        # reached breaks the iteration
+        if node is self.ordered_map._root:
             raise StopIteration()
 
-        # retrieves the key and value for the current index
-        key, _value = self.ordered_map.tuples_list[self.current_index]
-
-        # increments the current index
-        self.current_index += 1
-
-        # returns the current key value
-        return key
+        # updates the current node and returns the
+        # value according to the iteration mode
+        self.current_node = node
+        if self.mode == None: return (node[2], node[3])
+        return node[self.mode]
 
 class MultipleValueMap(object):
     """
     Map that holds multiple values for
     each key, and considers
     the first value to the key's value.
+
+    The values are stored in a compact way, a single
+    value is stored inline in the internal map and it's
+    only promoted to a (values) list on the second value.
     """
 
-    _map = None
-    """ The map to be used internally for virtual access """
+    __slots__ = ("_map",)
+    """ The map to be used internally for virtual access,
+    associating the key with the (single) value or with
+    the list of values (values list) """
 
     def __init__(self):
         """
@@ -378,30 +714,32 @@ class MultipleValueMap(object):
         return self._map.__len__()
 
     def __getitem__(self, key):
-        # returns the value
-        values = self._map.get(key)
-
-        # returns in case no
-        # value was found
-        if not values:
-            return
+        # retrieves the value (or values) for the key
+        # and in case it's a single value returns it
+        value = self._map.get(key)
+        if not type(value) == ValuesList: return value
 
-        # retrieves the first value
-        value = values[0]
-
-        # returns the value
-        return value
+        # returns the first value (in case
+        # there's at least one value)
+        return value[0] if value else None
 
     def __setitem__(self, key, value):
-        # retrieves the values
-        values = self._map.get(key, [])
+        # in case the key is not present sets the
+        # value inline (single value) and returns
+        if not key in self._map:
+            self._map[key] = value
+            return
+
+        # retrieves the current value (or values) for the key
+        # and in case it's a single value promotes it to a list
+        values = self._map[key]
+        if not type(values) == ValuesList:
+            values = ValuesList((values,))
+            self._map[key] = values
 
         # adds the value to the list
         values.append(value)
 
-        # sets the values in the map
-        self._map[key] = values
-
     def __delitem__(self, key):
         del self._map[key]
 
@@ -411,14 +749,28 @@ class MultipleValueMap(object):
     def __contains__(self, item):
         return self._map.__contains__(item)
 
-    def get(self, key, default_value):
-        return self._map.get(key, default_value)
+    def get(self, key, default_value = None):
+        """
+        Retrieves the list of values for the given key, the
+        list must be considered read only (it's not copied).
+
+        @type key: Object
+        @param key: The key to retrieve the values.
+        @type default_value: Object
+        @param default_value: The value to be returned in case
+        the key is not present.
+        @rtype: List
+        @return: The list of values for the key.
+        """
+
+        if not key in self._map: return default_value
+        return self._get_values(self._map[key])
 
     def values(self):
-        return self._map.values()
+        return [self._get_values(value) for value in self._map.itervalues()]
 
     def items(self):
-        return self.tuples_list
+        return [(key, self._get_values(value)) for key, value in self._map.iteritems()]
 
     def keys(self):
         return self._map.keys()
@@ -433,11 +785,41 @@ class MultipleValueMap(object):
         @param value: The value to unset.
         """
 
-        # retrieves the values
+        # retrieves the values, in case it's a single value
+        # and it's the value to unset the values become empty
         values = self._map[key]
+        if not type(values) == ValuesList:
+            if not values == value: raise ValueError("value not found for key")
+            self._map[key] = ValuesList()
+            return
 
-        # removes the value
+        # removes the value and in case only one value
+        # remains it's stored inline (single value)
         values.remove(value)
+        if len(values) == 1: self._map[key] = values[0]
+
+    def _get_values(self, value):
+        """
+        Retrieves the list of values for the given (internal)
+        value, single values are wrapped into a list.
+
+        @type value: Object
+        @param value: The (internal) value.
+        @rtype: List
+        @return: The list of values.
+        """
+
+        if type(value) == ValuesList: return value
+        return [value]
+
+class ValuesList(list):
+    """
+    List of values for a key in the multiple value map,
+    used to distinguish the lists of values from the single
+    values (that may be lists themselves).
+    """
+
+    __slots__ = ()
 
 def is_dictionary(object):
     """
@@ -37,12 +37,448 @@ __copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
 __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
+import math
 import time
+import heapq
+import random
+import logging
 import threading
 
-class UpdateThread(threading.Thread):
+import colony.libs.scheduling_util
+
+DEFAULT_TICK = 0.05
+""" The default duration (in seconds) of a tick of the timer wheel """
+
+DEFAULT_SIZE = 512
+""" The default number of slots of the timer wheel """
+
+DEFAULT_WORKERS = 2
+""" The default number of worker threads used by the timer
+wheel for the execution of the callbacks """
+
+DEFAULT_LOGGER = "default_messages"
+""" The default logger name """
+
+timer_wheel = None
+""" The process wide timer wheel (lazily created) """
+
+timer_wheel_lock = threading.Lock()
+""" The lock that controls the creation of the timer wheel """
+
+def get_timer_wheel():
+    """
+    Retrieves the process wide timer wheel, creating and
+    starting it in case it's not yet available.
+
+    @rtype: TimerWheel
+    @return: The process wide timer wheel.
+    """
+
+    global timer_wheel
+
+    timer_wheel_lock.acquire()
+    try:
+        if not timer_wheel:
+            timer_wheel = TimerWheel()
+            timer_wheel.start_wheel()
+    finally:
+        timer_wheel_lock.release()
+
+    return timer_wheel
+
+def stop_timer_wheel():
+    """
+    Stops the process wide timer wheel (in case it's running),
+    the next retrieval creates and starts a new timer wheel.
+
+    @rtype: TimerWheel
+    @return: The stopped timer wheel or none in case there
+    was no timer wheel running.
+    """
+
+    global timer_wheel
+
+    timer_wheel_lock.acquire()
+    try:
+        _timer_wheel = timer_wheel
+        timer_wheel = None
+    finally:
+        timer_wheel_lock.release()
+
+    if _timer_wheel: _timer_wheel.stop_wheel()
+    return _timer_wheel
+
+class TimerWheel(threading.Thread):
+    """
+    Hashed timer wheel that hosts periodic callbacks on a single
+    thread (plus a small pool of workers for the execution), each
+    timer is placed in the slot of its deadline tick.
+
+    The ticks are computed from the (absolute) initial time so that
+    the wheel does not drift and the timers are re-scheduled from
+    their previous deadline (optionally with jitter).
+
+    The wheel thread sleeps until the tick of the next deadline
+    (kept in a heap) instead of waking at every tick.
+    """
+
+    tick = None
+    """ The duration (in seconds) of a tick of the wheel """
+
+    size = None
+    """ The number of slots of the wheel """
+
+    slots = []
+    """ The list of slots, each slot is a list of timers """
+
+    count = 0
+    """ The number of timers in the wheel """
+
+    current_tick = 0
+    """ The last tick processed by the wheel """
+
+    deadlines = []
+    """ The heap of tuples containing the tick, the sequence number
+    and the timer for each of the inserted deadlines, the stale
+    entries (cancelled or re-scheduled timers) are removed lazily """
+
+    sequence = 0
+    """ The sequence number for the next deadline in the heap """
+
+    start_time = None
+    """ The (absolute) time of the tick zero of the wheel """
+
+    continue_flag = False
+    """ Flag controlling the execution of the wheel """
+
+    pool = None
+    """ The pool of worker threads used for the execution of
+    the callbacks, in case it's not set they're executed in
+    the wheel thread """
+
+    condition = None
+    """ The condition used to wait for the next tick or
+    for the addition of timers (idle wheel) """
+
+    def __init__(self, tick = DEFAULT_TICK, size = DEFAULT_SIZE, workers = DEFAULT_WORKERS):
+        """
+        Constructor of the class.
+
+        @type tick: float
+        @param tick: The duration (in seconds) of a tick of the wheel.
+        @type size: int
+        @param size: The number of slots of the wheel.
+        @type workers: int
+        @param workers: The number of worker threads to be used for
+        the execution of the callbacks.
+        """
+
+        threading.Thread.__init__(self)
+
+        self.tick = tick
+        self.size = size
+        self.slots = [[] for _index in range(size)]
+        self.deadlines = []
+        self.start_time = time.time()
+        self.pool = workers and colony.libs.scheduling_util.WorkerPool(workers) or None
+        self.condition = threading.Condition(threading.RLock())
+
+        self.daemon = True
+
+    def run(self):
+        self.condition.acquire()
+        try:
+            # iterates while the continue
+            # flag is set
+            while self.continue_flag:
+                # retrieves the tick of the next deadline, in case there
+                # are no timers waits (indefinitely) until a timer is
+                # added or the wheel stopped
+                next_tick = self._next_tick()
+                if next_tick == None:
+                    self.condition.wait()
+                    continue
+
+                # in case the tick of the next deadline has not been
+                # reached waits until it's reached (or interrupted)
+                target = self.start_time + next_tick * self.tick
+                current_time = time.time()
+                if current_time < target:
+                    self.condition.wait(target - current_time)
+                    continue
+
+                # advances the wheel to the tick of the current time
+                # (processing every tick missed in between)
+                self._advance(max(self._get_tick(current_time), next_tick))
+        finally:
+            self.condition.release()
+
+    def start_wheel(self):
+        """
+        Starts the timer wheel (thread and workers).
+        """
+
+        if self.continue_flag: return
+        self.continue_flag = True
+        self.pool and self.pool.start()
+        self.start()
+
+    def stop_wheel(self):
+        """
+        Stops the timer wheel, the running callbacks
+        are allowed to finish.
+        """
+
+        if not self.continue_flag: return
+        self.condition.acquire()
+        try:
+            self.continue_flag = False
+            self.condition.notify()
+        finally:
+            self.condition.release()
+        self.pool and self.pool.stop()
+
+    def add_timer(self, callable, interval, jitter = 0.0, arguments = ()):
+        """
+        Adds a periodic timer to the wheel that calls the given
+        callable (with the arguments) at each interval.
+
+        @type callable: Callable
+        @param callable: The callable object to be called.
+        @type interval: float
+        @param interval: The interval (in seconds) between calls.
+        @type jitter: float
+        @param jitter: The maximum random delay (in seconds) added
+        to each deadline (spreads the load of similar timers).
+        @type arguments: Tuple
+        @param arguments: The arguments for the calls.
+        @rtype: WheelTimer
+        @return: The timer (handle) that may be used for cancellation.
+        """
+
+        timer = WheelTimer(self, callable, interval, jitter, arguments)
+
+        self.condition.acquire()
+        try:
+            # in case the wheel is idle updates the current tick
+            # (avoids processing the ticks of the idle period)
+            if not self.count: self.current_tick = self._get_tick(time.time())
+
+            # sets the base (deadline without jitter) of the timer
+            # and inserts it in the wheel waking the wheel thread
+            timer.base = time.time() + interval
+            self._insert(timer)
+            self.condition.notify()
+        finally:
+            self.condition.release()
+
+        return timer
+
+    def remove_timer(self, timer):
+        """
+        Removes the given timer from the wheel.
+
+        @type timer: WheelTimer
+        @param timer: The timer to be removed.
+        """
+
+        self.condition.acquire()
+        try:
+            timer.cancelled = True
+            slot = self.slots[timer.tick % self.size]
+            if not timer in slot: return
+            slot.remove(timer)
+            self.count -= 1
+        finally:
+            self.condition.release()
+
+    def _next_tick(self):
+        """
+        Retrieves the tick of the next deadline of the wheel, removing
+        the stale entries from the top of the heap of deadlines, must
+        be called with the lock.
+
+        @rtype: int
+        @return: The tick of the next deadline or none in case
+        there are no timers in the wheel.
+        """
+
+        while self.deadlines:
+            tick, _sequence, timer = self.deadlines[0]
+            if not timer.cancelled and timer.tick == tick and tick > self.current_tick: return tick
+            heapq.heappop(self.deadlines)
+        return None
+
+    def _advance(self, last_tick):
+        """
+        Advances the wheel up to the given tick, expiring the timers
+        of the slots in between (each slot is visited at most once),
+        must be called with the lock.
+
+        @type last_tick: int
+        @param last_tick: The tick up to which the wheel is advanced.
+        """
+
+        first_tick = max(self.current_tick + 1, last_tick - self.size + 1)
+        self.current_tick = last_tick
+        for tick in range(first_tick, last_tick + 1): self._expire(self.slots[tick % self.size])
+
+    def _expire(self, slot):
+        """
+        Expires the timers of the given slot whose deadline tick has
+        been reached, dispatching the callbacks and re-inserting
+        the timers for the next deadline, must be called with the lock.
+
+        @type slot: List
+        @param slot: The slot to be expired.
+        """
+
+        # separates the due timers from the timers to be kept
+        # in the slot (deadline in a future rotation)
+        due = [timer for timer in slot if timer.tick <= self.current_tick]
+        if not due: return
+        slot[:] = [timer for timer in slot if timer.tick > self.current_tick]
+        self.count -= len(due)
+
+        # iterates over all the due timers to dispatch them and
+        # re-insert them for the next deadline
+        for timer in due:
+            self._dispatch(timer)
+            self._reschedule(timer)
+
+    def _dispatch(self, timer):
+        """
+        Dispatches the callback of the given timer for execution,
+        in case the previous execution is still running the call is
+        skipped (no overlap), must be called with the lock.
+
+        @type timer: WheelTimer
+        @param timer: The timer to be dispatched.
+        """
+
+        if timer.running: return
+        timer.running = True
+        if self.pool: self.pool.submit(self._execute, timer)
+        else: self._execute(timer)
+
+    def _execute(self, timer):
+        """
+        Executes the callback of the given timer, logging any
+        exception raised by it (the wheel must not be affected).
+
+        @type timer: WheelTimer
+        @param timer: The timer to be executed.
+        """
+
+        try: timer.callable(*timer.arguments)
+        except: logging.getLogger(DEFAULT_LOGGER).exception("Problem executing timer callback")
+        finally: timer.running = False
+
+    def _reschedule(self, timer):
+        """
+        Re-inserts the given timer for the next deadline, computed
+        from the previous deadline so that there's no drift (the
+        missed deadlines are skipped), must be called with the lock.
+
+        @type timer: WheelTimer
+        @param timer: The timer to be re-scheduled.
+        """
+
+        if timer.cancelled: return
+        current_time = time.time()
+        timer.base += timer.interval
+        if timer.base <= current_time:
+            missed = math.ceil((current_time - timer.base) / timer.interval)
+            timer.base += max(missed, 1) * timer.interval
+        self._insert(timer)
+
+    def _insert(self, timer):
+        """
+        Inserts the given timer in the slot of its deadline tick
+        (with the jitter applied), the deadline is rounded to the
+        nearest tick, must be called with the lock.
+
+        @type timer: WheelTimer
+        @param timer: The timer to be inserted.
+        """
+
+        deadline = timer.base + (timer.jitter and random.uniform(0, timer.jitter) or 0.0)
+        timer.tick = max(int(round((deadline - self.start_time) / self.tick)), self.current_tick + 1)
+        self.slots[timer.tick % self.size].append(timer)
+        self.count += 1
+        heapq.heappush(self.deadlines, (timer.tick, self.sequence, timer))
+        self.sequence += 1
+
+    def _get_tick(self, current_time):
+        return int((current_time - self.start_time) / self.tick)
+
+class WheelTimer(object):
+    """
+    Class representing a periodic timer in the timer
+    wheel, used as handle for the cancellation.
+    """
+
+    wheel = None
+    """ The timer wheel containing the timer """
+
+    callable = None
+    """ The callable object to be called """
+
+    interval = None
+    """ The interval (in seconds) between calls """
+
+    jitter = None
+    """ The maximum random delay (in seconds) of each call """
+
+    arguments = ()
+    """ The arguments for the calls """
+
+    base = None
+    """ The next deadline (without jitter) of the timer """
+
+    tick = None
+    """ The tick of the next deadline of the timer """
+
+    running = False
+    """ Flag controlling if the callback is running """
+
+    cancelled = False
+    """ Flag controlling if the timer has been cancelled """
+
+    def __init__(self, wheel, callable, interval, jitter = 0.0, arguments = ()):
+        """
+        Constructor of the class.
+
+        @type wheel: TimerWheel
+        @param wheel: The timer wheel containing the timer.
+        @type callable: Callable
+        @param callable: The callable object to be called.
+        @type interval: float
+        @param interval: The interval (in seconds) between calls.
+        @type jitter: float
+        @param jitter: The maximum random delay (in seconds) of each call.
+        @type arguments: Tuple
+        @param arguments: The arguments for the calls.
+        """
+
+        self.wheel = wheel
+        self.callable = callable
+        self.interval = interval
+        self.jitter = jitter
+        self.arguments = arguments
+
+    def cancel(self):
+        """
+        Cancels the timer, removing it from the wheel.
+        """
+
+        self.wheel.remove_timer(self)
+
+class UpdateThread(object):
     """
-    The update thread class.
+    The update thread class, a (thin) handle for a periodic
+    timer in the process wide timer wheel, no thread is
+    created for each of the instances.
     """
 
     stop_flag = False
@@ -57,14 +493,35 @@ class UpdateThread(threading.Thread):
     call_arguments = []
     """ The call arguments """
 
+    jitter = 0.0
+    """ The maximum random delay (in seconds) of each call """
+
+    daemon = True
+    """ Flag kept for compatibility (the timer wheel is daemon) """
+
+    timer = None
+    """ The timer in the timer wheel for the update """
+
     def __init__(self):
         """
         Constructor of the class.
         """
 
-        threading.Thread(self)
+        self.call_arguments = []
 
-        self.daemon = True
+    def start(self):
+        """
+        Starts the update, registering the periodic timer
+        in the process wide timer wheel.
+        """
+
+        # unsets the stop flag
+        self.stop_flag = False
+
+        # adds the timer for the call method to the (process
+        # wide) timer wheel, using the timeout as interval
+        timer_wheel = get_timer_wheel()
+        self.timer = timer_wheel.add_timer(self._call, self.timeout, self.jitter)
 
     def stop(self):
         """
@@ -72,6 +529,31 @@ class UpdateThread(threading.Thread):
         """
 
         self.stop_flag = True
+        self.timer and self.timer.cancel()
+
+    def join(self, timeout = None):
+        """
+        Kept for compatibility, there's no thread to be joined
+        (the update is stopped immediately).
+
+        @type timeout: float
+        @param timeout: The timeout (ignored).
+        """
+
+        pass
+
+    def is_alive(self):
+        """
+        Checks if the update is currently active (registered
+        in the timer wheel and not stopped).
+
+        @rtype: bool
+        @return: If the update is currently active.
+        """
+
+        return bool(self.timer) and not self.stop_flag
+
+    isAlive = is_alive
 
     def get_timeout(self):
         """
@@ -133,19 +615,10 @@ class UpdateThread(threading.Thread):
 
         self.call_arguments = call_arguments
 
-    def run(self):
-        # unsets the stop flag
-        self.stop_flag = False
-
-        # while the thread is valid
-        while not self.stop_flag:
-            # sleep for the given timeout time
-            time.sleep(self.timeout)
-
-            # in case the stop flag is set
-            if self.stop_flag:
-                # breaks the cycle
-                break
+    def _call(self):
+        # in case the stop flag is set
+        # returns immediately
+        if self.stop_flag: return
 
-            # calls the method
-            self.call_method(*self.call_arguments)
+        # calls the method
+        self.call_method(*self.call_arguments)
@@ -0,0 +1,476 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import os
+import time
+import zlib
+import stat
+import Queue
+import zipfile
+import threading
+import collections
+
+DEFAULT_LEVEL = 6
+""" The default compression level to be used in the
+deflate of the entries (same as the zlib default) """
+
+DEFAULT_WORKERS = 4
+""" The default number of worker threads to be used
+for the compression of the entries """
+
+BUFFER_SIZE = 65536
+""" The size of the buffer to be used in the reading
+of the files to be compressed """
+
+DETERMINISTIC_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+""" The fixed date time to be used in the entries of
+deterministic archives (minimum value for the zip format) """
+
+WINDOW_FACTOR = 2
+""" The factor to be applied to the number of workers
+to obtain the maximum number of entries "in flight",
+this value controls the memory used by the packer """
+
+STORED_EXTENSIONS = (
+    ".zip",
+    ".gz",
+    ".tgz",
+    ".bz2",
+    ".xz",
+    ".7z",
+    ".rar",
+    ".jar",
+    ".cbx",
+    ".cpx",
+    ".ccx",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".ico",
+    ".mp3",
+    ".mp4",
+    ".avi",
+    ".pdf"
+)
+""" The sequence of extensions for files that are considered
+to be already compressed, these files are stored in the
+archive without any (extra) compression """
+
+RAW_WRITE = hasattr(zipfile.ZipFile, "_writecheck") and hasattr(zipfile.ZipInfo, "FileHeader")
+""" If the (private) internals of the zip file module required
+for the writing of already compressed entries are available,
+in case they're not the public write method is used instead """
+
+class ParallelZip(object):
+    """
+    Packer class that creates zip files compressing the
+    various entries in parallel worker threads (the zlib
+    library releases the global interpreter lock) and then
+    writes them into the archive in the order they were added.
+
+    The amount of memory used is bounded by the number of
+    entries that may be "in flight" at a given time.
+    """
+
+    file_path = None
+    """ The path to the zip file to be created """
+
+    level = None
+    """ The compression level to be used in the deflate
+    of the entries, zero implies stored mode for all """
+
+    workers = None
+    """ The number of worker threads to be used, in case
+    the value is one or less the compression is inline """
+
+    stored_extensions = ()
+    """ The sequence of extensions for the files that
+    should be stored without compression """
+
+    date_time = None
+    """ The fixed date time tuple to be used in every entry
+    instead of the modification time of the file (if any) """
+
+    deterministic = False
+    """ If the archive should be reproducible, meaning that the
+    entries are sorted by name and that both the timestamps and
+    the permissions are normalized """
+
+    entries = []
+    """ The list of tuples containing the path and the name
+    of the entries to be written to the archive """
+
+    files = 0
+    """ The number of files written to the archive """
+
+    bytes_read = 0
+    """ The number of (uncompressed) bytes read from the files """
+
+    bytes_written = 0
+    """ The number of (compressed) bytes written to the archive """
+
+    elapsed = 0.0
+    """ The amount of time (in seconds) taken to write the archive """
+
+    def __init__(
+        self,
+        file_path,
+        level = DEFAULT_LEVEL,
+        workers = DEFAULT_WORKERS,
+        stored_extensions = STORED_EXTENSIONS,
+        date_time = None,
+        deterministic = False
+    ):
+        """
+        Constructor of the class.
+
+        @type file_path: String
+        @param file_path: The path to the zip file to be created.
+        @type level: int
+        @param level: The compression level to be used (from zero to
+        nine), zero implies stored mode for all the entries.
+        @type workers: int
+        @param workers: The number of worker threads to be used.
+        @type stored_extensions: Tuple
+        @param stored_extensions: The sequence of extensions for the
+        files to be stored without compression (already compressed).
+        @type date_time: Tuple
+        @param date_time: The fixed date time tuple to be used in every
+        entry, if not provided the modification time is used.
+        @type deterministic: bool
+        @param deterministic: If the archive should be reproducible (same
+        output for the same input), sorting the entries and normalizing
+        both the timestamps and the permissions of the entries.
+        """
+
+        self.file_path = file_path
+        self.level = level
+        self.workers = workers
+        self.stored_extensions = stored_extensions
+        self.date_time = date_time or (deterministic and DETERMINISTIC_DATE_TIME or None)
+        self.deterministic = deterministic
+        self.entries = []
+
+    def add(self, path, name):
+        """
+        Adds the file in the provided path to the list of
+        entries to be written under the provided name.
+
+        @type path: String
+        @param path: The path to the file to be added.
+        @type name: String
+        @param name: The name (relative path) of the entry
+        inside the archive.
+        """
+
+        # normalizes the name of the entry removing the drive and
+        # any leading separators (as done by the zip file module)
+        # and converting the separators into the zip ones
+        name = os.path.normpath(os.path.splitdrive(name)[1])
+        while name[0] in (os.sep, os.altsep): name = name[1:]
+        name = name.replace(os.sep, "/")
+
+        self.entries.append((path, name))
+
+    def add_directory(self, path, relative = ""):
+        """
+        Adds all the files contained in the directory in the
+        provided path (recursively) to the list of entries.
+
+        @type path: String
+        @param path: The path to the directory to be added.
+        @type relative: String
+        @param relative: The relative path inside the archive
+        to be used as prefix for the names of the entries.
+        """
+
+        # walks the directory tree (top down) adding each
+        # of the files to the list of entries using the
+        # relative path of the file as the entry name
+        # (the symbolic links to directories are followed)
+        for directory_path, directories, file_names in os.walk(path, followlinks = True):
+            directories.sort()
+            file_names.sort()
+            _relative = os.path.relpath(directory_path, path)
+            _relative = "" if _relative == "." else _relative
+            for file_name in file_names:
+                _path = os.path.join(directory_path, file_name)
+                _name = os.path.join(relative, _relative, file_name)
+                self.add(_path, _name)
+
+    def write(self):
+        """
+        Writes the archive with all the currently added entries,
+        the compression of the entries is done in the worker threads
+        and the resulting data is written in the order of addition.
+
+        @rtype: Tuple
+        @return: A tuple with the number of files, the number of bytes
+        read and the number of bytes written to the archive.
+        """
+
+        # resets the statistics values and retrieves the initial
+        # time value to be used in the elapsed time calculus
+        self.files = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        initial = time.time()
+
+        # retrieves the entries to be written, in case the archive
+        # is deterministic the entries are sorted by their name
+        entries = self.entries
+        if self.deterministic: entries = sorted(entries, key = lambda entry: entry[1])
+
+        # opens the target zip file in write mode (the compression
+        # type is irrelevant as every entry sets its own)
+        zip_file = zipfile.ZipFile(self.file_path, "w", zipfile.ZIP_DEFLATED, True)
+        try:
+            if self.workers > 1: self._write_parallel(zip_file, entries)
+            else: self._write_serial(zip_file, entries)
+        finally:
+            zip_file.close()
+
+        # calculates the elapsed time for the writing of the
+        # archive and returns the statistics tuple
+        self.elapsed = time.time() - initial
+        return (self.files, self.bytes_read, self.bytes_written)
+
+    def get_throughput(self):
+        """
+        Retrieves the throughput (in bytes per second) of the
+        last write operation, measured against the (uncompressed)
+        number of bytes read from the files.
+
+        @rtype: float
+        @return: The throughput of the last write operation.
+        """
+
+        if not self.elapsed: return 0.0
+        return self.bytes_read / self.elapsed
+
+    def _write_serial(self, zip_file, entries):
+        for path, name in entries:
+            result = self._compress(path)
+            self._write_entry(zip_file, name, result)
+
+    def _write_parallel(self, zip_file, entries):
+        # creates the queue that is going to be used to send the
+        # tasks to the workers and the deque of pending tasks that
+        # maintains the order of the entries to be written
+        queue = Queue.Queue()
+        pending = collections.deque()
+        iterator = iter(entries)
+
+        def submit():
+            entry = next(iterator, None)
+            if not entry: return False
+            task = CompressTask(entry)
+            pending.append(task)
+            queue.put(task)
+            return True
+
+        def work():
+            while True:
+                task = queue.get()
+                if not task: break
+                try: task.result = self._compress(task.path)
+                except BaseException, exception: task.exception = exception
+                finally: task.event.set()
+
+        # creates and starts the various worker threads that are
+        # going to be used for the compression of the entries
+        threads = [threading.Thread(target = work) for _index in range(self.workers)]
+        for thread in threads: thread.daemon = True; thread.start()
+
+        try:
+            # submits the initial window of tasks, this is the
+            # maximum number of entries that may be "in flight"
+            for _index in range(self.workers * WINDOW_FACTOR):
+                if not submit(): break
+
+            # iterates over the pending tasks (in order) waiting
+            # for each of them to be compressed and then writing
+            # it to the archive and submitting a new task
+            while pending:
+                task = pending.popleft()
+                task.event.wait()
+                if task.exception: raise task.exception
+                self._write_entry(zip_file, task.name, task.result)
+                task.result = None
+                submit()
+        finally:
+            # sends the stop signal to the workers (one per worker)
+            # and waits for them to finish their current tasks
+            for thread in threads: queue.put(None)
+            for thread in threads: thread.join()
+
+    def _compress(self, path):
+        # retrieves the status of the file and determines if the
+        # file should be stored (no compression) or deflated
+        status = os.stat(path)
+        _name, extension = os.path.splitext(path)
+        stored = self.level == 0 or extension.lower() in self.stored_extensions
+
+        # creates the compressor object for the deflate operation
+        # (raw deflate stream as expected by the zip format)
+        compressor = None if stored else zlib.compressobj(self.level, zlib.DEFLATED, -15)
+
+        # reads the file in chunks updating the crc value and
+        # compressing the data (if required) into the buffer
+        crc = 0
+        file_size = 0
+        buffer = []
+        file = open(path, "rb")
+        try:
+            while True:
+                data = file.read(BUFFER_SIZE)
+                if not data: break
+                file_size += len(data)
+                crc = zlib.crc32(data, crc) & 0xffffffff
+                if compressor: data = compressor.compress(data)
+                buffer.append(data)
+        finally:
+            file.close()
+        if compressor: buffer.append(compressor.flush())
+        data = "".join(buffer)
+
+        # in case the compressed data is larger than the original
+        # file the compression is discarded and the file stored
+        if compressor and len(data) >= file_size:
+            file = open(path, "rb")
+            try: data = file.read()
+            finally: file.close()
+            stored = True
+
+        # determines the compression type to be used for the entry
+        # and returns the tuple describing the compressed file
+        compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+        return (data, crc, file_size, compress_type, status)
+
+    def _write_entry(self, zip_file, name, result):
+        # unpacks the result of the compression and determines
+        # the date time value for the entry
+        data, crc, file_size, compress_type, status = result
+        date_time = self.date_time or time.localtime(status.st_mtime)[0:6]
+
+        # retrieves the mode of the file, in case the archive is
+        # deterministic the permissions are normalized (only the
+        # executable permission is taken into account)
+        mode = status.st_mode
+        if self.deterministic: mode = stat.S_IFREG | (mode & 0111 and 0755 or 0644)
+
+        # creates the information structure for the entry with
+        # the values from the (already) compressed file
+        zip_info = zipfile.ZipInfo(name, date_time)
+        zip_info.external_attr = (mode & 0xFFFF) << 16L
+        if self.deterministic: zip_info.create_system = 3
+        zip_info.compress_type = compress_type
+        zip_info.file_size = file_size
+        zip_info.compress_size = len(data)
+        zip_info.CRC = crc
+        zip_info.flag_bits = 0x00
+        zip_info.header_offset = zip_file.fp.tell()
+
+        # in case the private internals of the zip file module are
+        # available the (already) compressed entry is written directly
+        # otherwise the data is inflated and written using the public
+        # write method (compressed again in the current thread)
+        if RAW_WRITE: self._write_raw(zip_file, zip_info, data)
+        else: self._write_public(zip_file, zip_info, data)
+
+        # updates the statistics values with the entry values
+        self.files += 1
+        self.bytes_read += file_size
+        self.bytes_written += len(data)
+
+    def _write_raw(self, zip_file, zip_info, data):
+        # verifies that the entry may be written and writes both the
+        # header and the data, then registers the entry in the archive
+        # so that it's included in the central directory (this mimics
+        # the internal behavior of the zip file write method and relies
+        # on the private internals of the python 2 zip file module, the
+        # availability of them is verified in the raw write flag)
+        zip_file._writecheck(zip_info)
+        zip_file._didModify = True
+        zip64 = zip_info.file_size > zipfile.ZIP64_LIMIT or len(data) > zipfile.ZIP64_LIMIT
+        zip_file.fp.write(zip_info.FileHeader(zip64))
+        zip_file.fp.write(data)
+        zip_file.filelist.append(zip_info)
+        zip_file.NameToInfo[zip_info.filename] = zip_info
+
+    def _write_public(self, zip_file, zip_info, data):
+        # inflates the data in case it's deflated (raw deflate stream)
+        # and writes it using the public write method of the zip file
+        # that compresses it again using the entry compression type
+        if zip_info.compress_type == zipfile.ZIP_DEFLATED: data = zlib.decompress(data, -15)
+        zip_file.writestr(zip_info, data)
+
+class CompressTask(object):
+    """
+    Task structure representing the compression of an
+    entry to be processed by a worker thread.
+    """
+
+    path = None
+    """ The path to the file to be compressed """
+
+    name = None
+    """ The name of the entry inside the archive """
+
+    result = None
+    """ The result tuple of the compression """
+
+    exception = None
+    """ The exception raised during the compression (if any) """
+
+    event = None
+    """ The event set when the compression is complete """
+
+    def __init__(self, entry):
+        """
+        Constructor of the class.
+
+        @type entry: Tuple
+        @param entry: The tuple containing the path and the
+        name of the entry to be compressed.
+        """
+
+        self.path, self.name = entry
+        self.event = threading.Event()
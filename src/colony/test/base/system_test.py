@@ -0,0 +1,163 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import os
+import sys
+import shutil
+import logging
+import tempfile
+
+import colony.base.system
+import colony.libs.test_util
+
+BASE_PLUGIN = """import colony.base.system
+
+VALUE = %d
+
+class HotBasePlugin(colony.base.system.Plugin):
+    id = "pt.hive.colony.test.hot_base"
+    name = "Hot Base"
+    version = "1.0.0"
+    platforms = [colony.base.system.CPYTHON_ENVIRONMENT]
+    capabilities = ["startup"]
+    main_modules = ["hot_base_plugin"]
+"""
+""" The template for the source of the base plugin
+used in the hot deploy tests """
+
+DEPENDENT_PLUGIN = """import colony.base.system
+
+class HotDependentPlugin(colony.base.system.Plugin):
+    id = "pt.hive.colony.test.hot_dependent"
+    name = "Hot Dependent"
+    version = "1.0.0"
+    platforms = [colony.base.system.CPYTHON_ENVIRONMENT]
+    capabilities = ["startup"]
+    dependencies = [colony.base.system.PluginDependency("pt.hive.colony.test.hot_base", "1.0.0")]
+    main_modules = ["hot_dependent_plugin"]
+
+    base_plugin = None
+
+    def dependency_injected(self, plugin):
+        colony.base.system.Plugin.dependency_injected(self, plugin)
+        self.base_plugin = plugin
+"""
+""" The source of the dependent plugin (depends on the base
+plugin) used in the hot deploy tests """
+
+class PluginManagerTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the plugin manager (hot deploy).
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.manager = colony.base.system.PluginManager(
+            self.path,
+            plugin_paths = [self.path],
+            loop = False,
+            threads = False,
+            signals = False
+        )
+        sys.path.insert(0, self.path)
+
+        # adds a null handler to the (default) logger of the
+        # plugins so that no logging warning is printed
+        self.handler = logging.NullHandler()
+        logging.getLogger(colony.base.system.DEFAULT_LOGGER).addHandler(self.handler)
+
+    def tearDown(self):
+        logging.getLogger(colony.base.system.DEFAULT_LOGGER).removeHandler(self.handler)
+        sys.path.remove(self.path)
+        for module in ("hot_base_plugin", "hot_dependent_plugin"):
+            if module in sys.modules: del sys.modules[module]
+        shutil.rmtree(self.path)
+
+    def test_hot_deploy(self):
+        """
+        Tests the hot deploy of a plugin module, swapping the
+        running version and reloading its dependents.
+        """
+
+        # writes both plugin modules and deploys them (in order)
+        # verifying that both plugins are loaded
+        self._write("hot_base_plugin", BASE_PLUGIN % 1)
+        self._write("hot_dependent_plugin", DEPENDENT_PLUGIN)
+        base_plugin = self.manager._hot_deploy("hot_base_plugin")
+        dependent_plugin = self.manager._hot_deploy("hot_dependent_plugin")
+        self.assertTrue(base_plugin.is_loaded())
+        self.assertTrue(dependent_plugin.is_loaded())
+        self.assertEqual(dependent_plugin.base_plugin, base_plugin)
+
+        # writes the new version of the base plugin module and
+        # hot deploys it, verifying that the new version is used
+        self._write("hot_base_plugin", BASE_PLUGIN % 2)
+        _base_plugin = self.manager._hot_deploy("hot_base_plugin")
+        self.assertNotEqual(_base_plugin, base_plugin)
+        self.assertTrue(_base_plugin.is_loaded())
+        self.assertEqual(sys.modules["hot_base_plugin"].VALUE, 2)
+
+        # verifies that the dependent plugin has been loaded
+        # again with the new version of the base plugin
+        self.assertTrue(dependent_plugin.is_loaded())
+        self.assertEqual(dependent_plugin.base_plugin, _base_plugin)
+
+    def test_hot_deploy_error(self):
+        """
+        Tests that the errors in the (main loop) hot deploy
+        are logged instead of raised.
+        """
+
+        # writes a broken plugin module and verifies that the safe
+        # hot deploy of it (and of a missing one) does not raise
+        self._write("hot_base_plugin", "import missing_module\n")
+        self.assertEqual(self.manager._hot_deploy_safe("hot_base_plugin"), None)
+        self.assertEqual(self.manager._hot_deploy_safe("hot_missing_plugin"), None)
+
+        # verifies that the (unsafe) hot deploy raises the error
+        self.assertRaises(ImportError, self.manager._hot_deploy, "hot_base_plugin")
+
+    def _write(self, module, source):
+        # removes the compiled version of the module (so that
+        # the new source is always used) and writes the source
+        compiled_path = os.path.join(self.path, module + ".pyc")
+        if os.path.exists(compiled_path): os.remove(compiled_path)
+        file = open(os.path.join(self.path, module + ".py"), "wb")
+        try: file.write(source)
+        finally: file.close()
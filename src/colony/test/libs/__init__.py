@@ -34,8 +34,22 @@ __copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
 __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
+from aes_util_test import *
 from barcode_util_test import *
+from cache_util_test import *
+from crypt_util_test import *
+from encode_util_test import *
 from gtin_util_test import *
+from host_util_test import *
 from lazy_util_test import *
+from list_util_test import *
+from map_util_test import *
 from number_util_test import *
+from object_util_test import *
+from quote_util_test import *
+from scheduling_util_test import *
+from string_buffer_util_test import *
+from string_util_test import *
 from structures_util_test import *
+from update_thread_util_test import *
+from zip_util_test import *
@@ -0,0 +1,128 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import os
+import tempfile
+
+import colony.libs.aes_util
+import colony.libs.test_util
+
+class AesStreamTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the aes stream cipher.
+    """
+
+    def setUp(self):
+        """
+        Skips the tests in case the (optional)
+        cryptographic library is not available.
+        """
+
+        if not colony.libs.aes_util.Crypto: self.skipTest("no cryptographic library available")
+
+    def test_stream(self):
+        """
+        Tests the round trip of the stream cipher, fed with
+        chunks of various sizes, for both modes.
+        """
+
+        # creates the cipher and the raw value to be used
+        # in the encryption (not aligned with the block size)
+        cipher = colony.libs.aes_util.AesCipher()
+        raw = os.urandom(1000)
+
+        # iterates over both of the modes and over some
+        # chunk sizes to verify the round trip
+        for mode in (colony.libs.aes_util.CBC_MODE, colony.libs.aes_util.CTR_MODE):
+            for chunk_size in (1, 16, 17, 1000):
+                encrypted = self._run_stream(cipher.stream(mode), raw, chunk_size)
+                stream = cipher.stream(mode, encrypted[:16], True)
+                self.assertEqual(self._run_stream(stream, encrypted[16:], chunk_size), raw)
+
+        # verifies the sizes of the encrypted values for
+        # both modes (padding only in the cbc mode)
+        self.assertEqual(len(self._run_stream(cipher.stream(colony.libs.aes_util.CBC_MODE), raw, 100)), 16 + 1008)
+        self.assertEqual(len(self._run_stream(cipher.stream(colony.libs.aes_util.CTR_MODE), raw, 100)), 16 + 1000)
+
+    def test_file(self):
+        """
+        Tests the round trip of the file encryption and decryption.
+        """
+
+        # creates the cipher and the raw value to be used in
+        # the encryption and writes the value to the file
+        cipher = colony.libs.aes_util.AesCipher()
+        raw = os.urandom(100000)
+        paths = [tempfile.mktemp() for _index in range(3)]
+        file = open(paths[0], "wb")
+        try: file.write(raw)
+        finally: file.close()
+
+        try:
+            # encrypts and decrypts the file (using small chunks)
+            # and verifies that the raw value is restored
+            cipher.encrypt_file(paths[0], paths[1], chunk_size = 1000)
+            cipher.decrypt_file(paths[1], paths[2], chunk_size = 1000)
+            file = open(paths[2], "rb")
+            try: self.assertEqual(file.read(), raw)
+            finally: file.close()
+        finally:
+            # removes all the (temporary) files
+            for path in paths: os.remove(path)
+
+    def _run_stream(self, stream, data, chunk_size):
+        """
+        Runs the given stream over the data, chunk by chunk,
+        prefixing the result with the initialization vector
+        (for the encryption).
+
+        @type stream: AesStream
+        @param stream: The stream cipher to be used.
+        @type data: String
+        @param data: The data to be processed.
+        @type chunk_size: int
+        @param chunk_size: The size of the chunks.
+        @rtype: String
+        @return: The result of the stream.
+        """
+
+        result = [] if stream.decrypt else [stream.get_iv()]
+        for index in range(0, len(data), chunk_size): result.append(stream.update(data[index:index + chunk_size]))
+        result.append(stream.finalize())
+        return "".join(result)
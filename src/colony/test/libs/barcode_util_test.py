@@ -37,6 +37,8 @@ __copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
 __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
+import multiprocessing
+
 import colony.libs.test_util
 import colony.libs.barcode_util
 
@@ -99,3 +101,37 @@ class BarcodeTest(colony.libs.test_util.ColonyTestCase):
         # that the encoded value is the expected one
         encoded_value = colony.libs.barcode_util.encode_code_39("123456")
         self.assertEqual(encoded_value, "*123456*")
+
+    def test_encode_many(self):
+        """
+        Tests the batch encoding, the output must be the
+        same as the one of the single encoding.
+        """
+
+        # creates the values to be encoded and encodes them
+        # in a batch (list) for the various encodings
+        values = ["123456", "54321", "000000"]
+        encoded_values = colony.libs.barcode_util.encode_many(values, colony.libs.barcode_util.ENCODING_2_OF_5)
+        self.assertEqual(encoded_values, [colony.libs.barcode_util.encode_2_of_5(value) for value in values])
+        encoded_values = colony.libs.barcode_util.encode_many(values, colony.libs.barcode_util.ENCODING_CODE_128, ("C",))
+        self.assertEqual(encoded_values, [colony.libs.barcode_util.encode_code_128(value, "C") for value in values])
+
+        # encodes the values in a batch using a generator and
+        # a pool of processes (the output must be the same)
+        encoded_values = colony.libs.barcode_util.encode_many(iter(values), generator = True)
+        self.assertEqual(list(encoded_values), [colony.libs.barcode_util.encode_code_128(value) for value in values])
+        encoded_values = colony.libs.barcode_util.encode_many(values, colony.libs.barcode_util.ENCODING_CODE_39, processes = 1)
+        self.assertEqual(encoded_values, ["*123456*", "*54321*", "*000000*"])
+        self.assertRaises(RuntimeError, colony.libs.barcode_util.encode_many, values, "invalid")
+
+        # encodes the values in a batch using a pool of processes
+        # owned by the test (reused between calls and not closed)
+        pool = multiprocessing.Pool(1)
+        try:
+            encoded_values = colony.libs.barcode_util.encode_many(values, colony.libs.barcode_util.ENCODING_CODE_39, pool = pool)
+            self.assertEqual(encoded_values, ["*123456*", "*54321*", "*000000*"])
+            encoded_values = colony.libs.barcode_util.encode_many(values, colony.libs.barcode_util.ENCODING_2_OF_5, generator = True, pool = pool)
+            self.assertEqual(list(encoded_values), [colony.libs.barcode_util.encode_2_of_5(value) for value in values])
+        finally:
+            pool.close()
+            pool.join()
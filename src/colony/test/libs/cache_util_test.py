@@ -0,0 +1,187 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import os
+import time
+import shutil
+import tempfile
+
+import colony.libs.test_util
+import colony.libs.cache_util
+
+class DataCacheMapTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the data cache map structure.
+    """
+
+    def test_get(self):
+        """
+        Tests the retrieval of entries with timestamp validation.
+        """
+
+        cache = colony.libs.cache_util.DataCacheMap()
+        cache.add("a", "data", 10)
+
+        self.assertEqual(cache.get("a"), "data")
+        self.assertEqual(cache.get("a", 5), "data")
+        self.assertEqual(cache.get("a", 20), None)
+        self.assertEqual(cache.get("b"), None)
+
+        cache.remove("a")
+        cache.remove("a")
+        self.assertEqual(cache.get("a"), None)
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 3)
+
+    def test_lru(self):
+        """
+        Tests the least recently used eviction policy.
+        """
+
+        cache = colony.libs.cache_util.DataCacheMap(max_entries = 2)
+        cache.add("a", "1", 0)
+        cache.add("b", "2", 0)
+        cache.get("a")
+        cache.add("c", "3", 0)
+
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("c"), "3")
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_lfu(self):
+        """
+        Tests the least frequently used eviction policy.
+        """
+
+        cache = colony.libs.cache_util.DataCacheMap(max_entries = 2, policy = colony.libs.cache_util.LFU_POLICY)
+        cache.add("a", "1", 0)
+        cache.add("b", "2", 0)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        cache.add("c", "3", 0)
+        cache.add("d", "4", 0)
+
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("c"), None)
+        self.assertEqual(cache.get("d"), "4")
+
+    def test_ttl(self):
+        """
+        Tests the expiration of the entries (time to live).
+        """
+
+        cache = colony.libs.cache_util.DataCacheMap(policy = colony.libs.cache_util.TTL_POLICY, ttl = 0.05)
+        cache.add("a", "1", 0)
+        self.assertEqual(cache.get("a"), "1")
+
+        time.sleep(0.1)
+        self.assertEqual(cache.get("a"), None)
+        self.assertEqual(len(cache), 0)
+
+    def test_size(self):
+        """
+        Tests the bounding of the map by the size of the data.
+        """
+
+        cache = colony.libs.cache_util.DataCacheMap(max_size = 10)
+        cache.add("a", "12345", 0)
+        cache.add("b", "12345", 0)
+        self.assertEqual(cache.size, 10)
+
+        cache.add("c", "123", 0)
+        self.assertEqual(cache.get("a"), None)
+        self.assertEqual(cache.size, 8)
+
+        cache.add("d", "12345678901", 0)
+        self.assertEqual(cache.get("d"), None)
+        self.assertEqual(cache.size, 8)
+
+    def test_tier(self):
+        """
+        Tests the second level (file) cache shared between maps.
+        """
+
+        path = tempfile.mkdtemp()
+        try:
+            first = colony.libs.cache_util.DataCacheMap(tier = colony.libs.cache_util.FileCacheMap(path))
+            second = colony.libs.cache_util.DataCacheMap(tier = colony.libs.cache_util.FileCacheMap(path))
+
+            first.add("a", "data", 10)
+            self.assertEqual(str(second.get("a")), "data")
+            self.assertEqual(second.get("a", 20), None)
+            self.assertEqual(second.get_stats()["entries"], 1)
+
+            first.remove("a")
+            second.clear()
+            self.assertEqual(second.get("a"), None)
+
+            # verifies that an empty entry is retrieved (not a miss)
+            first.add("b", "", 10)
+            self.assertEqual(second.get("b"), "")
+        finally:
+            shutil.rmtree(path)
+
+    def test_tier_descriptors(self):
+        """
+        Tests that the entries retrieved from the second level
+        cache do not keep open file descriptors.
+        """
+
+        # in case the platform does not expose the open file
+        # descriptors there's nothing to be tested
+        if not os.path.isdir("/proc/self/fd"): return
+
+        path = tempfile.mkdtemp()
+        try:
+            first = colony.libs.cache_util.DataCacheMap(tier = colony.libs.cache_util.FileCacheMap(path))
+            first.add("a", "data", 10)
+
+            # retrieves the entry from (new) maps multiple times and
+            # verifies that the number of open descriptors is kept
+            descriptors = len(os.listdir("/proc/self/fd"))
+            caches = [colony.libs.cache_util.DataCacheMap(tier = first.tier) for _index in range(50)]
+            for cache in caches: self.assertEqual(cache.get("a"), "data")
+            self.assertEqual(len(os.listdir("/proc/self/fd")), descriptors)
+        finally:
+            shutil.rmtree(path)
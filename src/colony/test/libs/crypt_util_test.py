@@ -0,0 +1,124 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import colony.libs.test_util
+import colony.libs.crypt_util
+
+class PasswordServiceTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the password service.
+    """
+
+    def test_md5_crypt(self):
+        """
+        Tests the md5 crypt matching against a known value.
+        """
+
+        md5_crypt_value = colony.libs.crypt_util.md5_crypt("secret", "abcdefgh")
+        self.assertEqual(md5_crypt_value, "$1$abcdefgh$cHJi5PXp/ki/ktXzqlk6I1")
+        self.assertTrue(colony.libs.crypt_util.md5_crypt_match(md5_crypt_value, "secret"))
+        self.assertFalse(colony.libs.crypt_util.md5_crypt_match(md5_crypt_value, "secreT"))
+
+    def test_match(self):
+        """
+        Tests the matching of passwords with the service, both
+        synchronously and using the pool of processes.
+        """
+
+        # creates the password hashes for the test
+        md5_crypt_value = colony.libs.crypt_util.md5_crypt("secret", "abcdefgh")
+        password_hash = colony.libs.crypt_util.password_crypt("secret", "salt", colony.libs.crypt_util.SHA1_VALUE)
+
+        # iterates over the number of processes (synchronous
+        # and pool) to verify the matching
+        for processes in (0, 1):
+            service = colony.libs.crypt_util.PasswordService(processes)
+            service.start()
+            try:
+                # verifies the single matching (twice for the cache)
+                # and the batch matching
+                self.assertTrue(service.match(md5_crypt_value, "secret"))
+                self.assertTrue(service.match(md5_crypt_value, "secret"))
+                self.assertFalse(service.match(md5_crypt_value, "secreT"))
+                results = service.match_many([(password_hash, "secret", "salt"), (password_hash, "secret"), (md5_crypt_value, "secret")])
+                self.assertEqual(results, [True, False, True])
+                self.assertEqual(len(service.cache), 2)
+            finally:
+                service.stop()
+
+    def test_pool(self):
+        """
+        Tests that the pool is only created in the start of the
+        service and that the stopped service runs synchronously.
+        """
+
+        # verifies that the default service and a service
+        # that is not started have no pool (synchronous)
+        md5_crypt_value = colony.libs.crypt_util.md5_crypt("secret", "abcdefgh")
+        service = colony.libs.crypt_util.PasswordService()
+        service.start()
+        self.assertEqual(service.pool, None)
+        service = colony.libs.crypt_util.PasswordService(1)
+        self.assertTrue(service.match(md5_crypt_value, "secret"))
+        self.assertEqual(service.pool, None)
+
+        # starts the service (creating the pool) and verifies that
+        # after the stop there are no users and the verifications
+        # are run synchronously
+        service.start()
+        self.assertNotEqual(service.pool, None)
+        self.assertEqual(service.match_many([(md5_crypt_value, "secret")], False), [True])
+        service.stop()
+        self.assertEqual(service.pool, None)
+        self.assertEqual(service.users, 0)
+        self.assertEqual(service.match_many([(md5_crypt_value, "secret")], False), [True])
+
+    def test_cache(self):
+        """
+        Tests that the cache keys do not contain the passwords
+        and that only the successful verifications are cached.
+        """
+
+        service = colony.libs.crypt_util.PasswordService(0)
+        password_hash = colony.libs.crypt_util.password_crypt("secret")
+        service.match(password_hash, "secret")
+        service.match(password_hash, "wrong")
+        self.assertEqual(len(service.cache), 1)
+        self.assertFalse("secret" in service.cache.data_map.keys()[0])
+        self.assertTrue(service.benchmark(10) > 0)
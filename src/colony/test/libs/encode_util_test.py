@@ -0,0 +1,128 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import random
+
+import colony.libs.test_util
+import colony.libs.encode_util
+
+RANDOM_SEED = 1
+""" The seed to be used in the random generation
+of values, so that the tests are repeatable """
+
+class TwoComplementTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the two's complement encoding functions.
+    """
+
+    def test_encode(self):
+        """
+        Tests the two's complement encoding against known values.
+        """
+
+        self.assertEqual(colony.libs.encode_util.encode_two_complement_string(0), "")
+        self.assertEqual(colony.libs.encode_util.encode_two_complement_string(127), "\x7f")
+        self.assertEqual(colony.libs.encode_util.encode_two_complement_string(128), "\x80\x00")
+        self.assertEqual(colony.libs.encode_util.encode_two_complement_string(-1), "\xff")
+        self.assertEqual(colony.libs.encode_util.encode_two_complement_string(-128), "\x80")
+        self.assertEqual(colony.libs.encode_util.encode_two_complement_string(-129), "\x7f\xff")
+        self.assertEqual(colony.libs.encode_util.encode_two_complement_string(2 ** 64), "\x00" * 8 + "\x01")
+        self.assertEqual(colony.libs.encode_util.decode_two_complement_string(""), 0)
+        self.assertEqual(colony.libs.encode_util.decode_two_complement_string("\x7f\xff"), -129)
+        self.assertEqual(colony.libs.encode_util.decode_two_complement_string("\xff" * 9), -1)
+
+    def test_round_trip(self):
+        """
+        Tests the round trip (encode and decode) of random
+        values of various sizes (property test).
+        """
+
+        # retrieves the random values for the test
+        # and iterates over them
+        long_values = self._get_values()
+        for long_value in long_values:
+            # encodes the value and verifies that the encoded
+            # value has the minimum size and decodes back
+            data = colony.libs.encode_util.encode_two_complement_string(long_value)
+            self.assertEqual(colony.libs.encode_util.decode_two_complement_string(data), long_value)
+            self.assertTrue(len(data) < 2 or not data[-1] in ("\x00", "\xff") or (ord(data[-1]) ^ ord(data[-2])) & 0x80)
+
+    def test_list(self):
+        """
+        Tests the round trip of the batch encoding for
+        the variable and fixed widths.
+        """
+
+        # retrieves the random values for the test
+        long_values = self._get_values()
+
+        # iterates over the various widths (including the ones using
+        # the struct module) to verify the round trip of the values
+        for width in (None, 1, 2, 3, 4, 8, 16):
+            _long_values = [value for value in long_values if width == None or (value < 0 and ~value or value).bit_length() < width * 8]
+            data = colony.libs.encode_util.encode_two_complement_list(_long_values, width)
+            self.assertEqual(colony.libs.encode_util.decode_two_complement_list(data, width), _long_values)
+
+        # verifies that the values that do not fit
+        # the width are not encoded
+        self.assertRaises(ValueError, colony.libs.encode_util.encode_two_complement_list, [128], 1)
+        self.assertRaises(ValueError, colony.libs.encode_util.encode_two_complement_list, [2 ** 24], 3)
+        self.assertRaises(ValueError, colony.libs.encode_util.decode_two_complement_list, "\x00" * 3, 2)
+
+    def _get_values(self):
+        """
+        Retrieves a list of random (and boundary) values
+        of various sizes to be used in the tests.
+
+        @rtype: List
+        @return: The list of values to be used in the tests.
+        """
+
+        # creates the random generator and the list
+        # of values with the boundary values
+        _random = random.Random(RANDOM_SEED)
+        long_values = [0, 1, -1, 127, 128, -128, -129, 2 ** 63 - 1, -2 ** 63, 2 ** 63, -2 ** 63 - 1]
+
+        # adds random values for each of the sizes
+        # (in bits) to the list of values
+        for size in range(1, 300):
+            long_values.append(_random.randint(-2 ** size, 2 ** size))
+
+        # returns the list of values
+        return long_values
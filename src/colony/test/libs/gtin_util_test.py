@@ -73,3 +73,8 @@ class GtinTest(colony.libs.test_util.ColonyTestCase):
 
         # asserts the control value
         self.assertEqual(control_value, 4)
+
+        # calculates the control values in a batch and
+        # asserts the control values
+        control_values = colony.libs.gtin_util.calculate_control_values([629104150021, 978097123458])
+        self.assertEqual(control_values, [3, 1])
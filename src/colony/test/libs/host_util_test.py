@@ -0,0 +1,173 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import colony.libs.test_util
+import colony.libs.host_util
+
+class HostInfoTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the host info service.
+    """
+
+    def test_cache(self):
+        """
+        Tests the caching of the host information.
+        """
+
+        # creates a new host info and verifies that the
+        # (cached) values are the resolved ones
+        host_info = colony.libs.host_util.HostInfo()
+        self.assertEqual(host_info.get_hostname(), colony.libs.host_util.get_hostname())
+        self.assertEqual(host_info.get_hostname_local(), colony.libs.host_util.get_hostname_local())
+        self.assertEqual(host_info.get_addresses_ip4(), colony.libs.host_util.get_addresses_ip4())
+        self.assertEqual(host_info.get_address_ip4(), colony.libs.host_util.get_address_ip4())
+
+        # changes the cached values and verifies that they're
+        # retrieved without resolution (not expired)
+        host_info.values["hostname"] = "cached"
+        self.assertEqual(host_info.get_hostname(), "cached")
+
+        # verifies that the retrieved list is a copy of
+        # the cached one
+        host_info.get_addresses_ip4().append("10.0.0.1")
+        self.assertEqual(host_info.get_addresses_ip4(), colony.libs.host_util.get_addresses_ip4())
+
+        # expires the values and verifies that they're resolved
+        # inline (there's no background refresh)
+        host_info.expires = 0.0
+        self.assertEqual(host_info.get_hostname(), colony.libs.host_util.get_hostname())
+
+    def test_changes(self):
+        """
+        Tests the notification of the changes in the host information.
+        """
+
+        # creates a new host info with a manager that records
+        # the generated events and resolves the information
+        manager = EventManager()
+        host_info = colony.libs.host_util.HostInfo(manager = manager)
+        host_info.refresh()
+
+        # verifies that no event is generated for the first
+        # resolution nor for a refresh without changes
+        host_info.refresh()
+        self.assertEqual(manager.events, [])
+
+        # changes the cached values and refreshes them verifying
+        # that the changes are notified to the manager
+        host_info.values["hostname"] = "changed"
+        host_info.refresh()
+        self.assertEqual(len(manager.events), 1)
+        event_name, event_args = manager.events[0]
+        self.assertEqual(event_name, colony.libs.host_util.HOST_INFO_CHANGED_EVENT)
+        self.assertEqual(event_args[0], host_info)
+        self.assertEqual(event_args[1], {"hostname" : ("changed", colony.libs.host_util.get_hostname())})
+
+    def test_start(self):
+        """
+        Tests the background refresh of the host information.
+        """
+
+        # creates and starts a new host info verifying that
+        # the information is resolved and the timer is set
+        host_info = colony.libs.host_util.HostInfo(ttl = 60.0)
+        host_info.start()
+        try:
+            self.assertNotEqual(host_info.values, None)
+            self.assertNotEqual(host_info.timer, None)
+
+            # expires the values and verifies that they're
+            # not resolved inline (background refresh)
+            host_info.values["hostname"] = "cached"
+            host_info.expires = 0.0
+            self.assertEqual(host_info.get_hostname(), "cached")
+        finally:
+            host_info.stop()
+
+        # verifies that the timer is unset
+        self.assertEqual(host_info.timer, None)
+
+    def test_get_host_info(self):
+        """
+        Tests the retrieval of the process wide host information.
+        """
+
+        # unsets the process wide host information and retrieves
+        # it verifying that it's created with the given values
+        colony.libs.host_util.host_info = None
+        host_info = colony.libs.host_util.get_host_info(ttl = 60.0)
+        try:
+            self.assertEqual(host_info.ttl, 60.0)
+            self.assertEqual(host_info.force, False)
+            self.assertNotEqual(host_info.timer, None)
+
+            # retrieves the host information again verifying that
+            # the same instance is returned with the force flag set
+            self.assertEqual(colony.libs.host_util.get_host_info(force = True), host_info)
+            self.assertEqual(host_info.force, True)
+        finally:
+            host_info.stop()
+            colony.libs.host_util.host_info = None
+
+class EventManager(object):
+    """
+    Manager that records the generated events.
+    """
+
+    events = []
+    """ The list of generated events """
+
+    def __init__(self):
+        """
+        Constructor of the class.
+        """
+
+        self.events = []
+
+    def generate_event(self, event_name, event_args):
+        """
+        Records the generated event.
+
+        @type event_name: String
+        @param event_name: The name of the event.
+        @type event_args: List
+        @param event_args: The arguments of the event.
+        """
+
+        self.events.append((event_name, event_args))
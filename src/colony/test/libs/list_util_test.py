@@ -0,0 +1,119 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import colony.libs.test_util
+import colony.libs.list_util
+
+class ListUtilTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the list utilities.
+    """
+
+    def test_no_duplicates(self):
+        """
+        Tests the removal of duplicates (including
+        unhashable values and generators).
+        """
+
+        self.assertEqual(colony.libs.list_util.list_no_duplicates([3, 1, 3, 2, 1]), [3, 1, 2])
+        self.assertEqual(colony.libs.list_util.list_no_duplicates([[1], 1, [1], (1,), (1,)]), [[1], 1, (1,)])
+        generator = colony.libs.list_util.list_no_duplicates_generator(iter(("a", "b", "a", "c")))
+        self.assertEqual(generator.next(), "a")
+        self.assertEqual(list(generator), ["b", "c"])
+
+    def test_intersect(self):
+        """
+        Tests the intersection of lists.
+        """
+
+        self.assertEqual(colony.libs.list_util.list_intersect([1, 2, 3, 2], [2, 3, 4]), [2, 3, 2])
+        self.assertEqual(colony.libs.list_util.list_intersect([[1], 2, {}], [{}, [1]]), [[1], {}])
+        self.assertEqual(list(colony.libs.list_util.list_intersect_generator(iter([1, 2]), [2])), [2])
+
+    def test_extend(self):
+        """
+        Tests the extension of lists.
+        """
+
+        base_list = [1, 2]
+        self.assertEqual(colony.libs.list_util.list_extend(base_list, [2, 3, [4]]), [1, 2, 3, [4]])
+        self.assertEqual(base_list, [1, 2])
+
+    def test_exclude(self):
+        """
+        Tests the exclusion of items from lists (only the
+        first occurrence of each item is excluded).
+        """
+
+        # excludes items from the base list (copy and in place
+        # modes) and verifies the resulting lists
+        base_list = [1, 2, 3, 2, [4], 5]
+        self.assertEqual(colony.libs.list_util.list_exclude(base_list, [2, [4]]), [1, 3, 2, 5])
+        self.assertEqual(colony.libs.list_util.list_exclude(base_list, [2, 2], False), [1, 3, [4], 5])
+        self.assertEqual(base_list, [1, 3, [4], 5])
+
+        # verifies that the exclusion of items not present in the list
+        # fails and that the generator variant ignores them
+        self.assertRaises(ValueError, colony.libs.list_util.list_exclude, [1, 2], [3])
+        self.assertEqual(list(colony.libs.list_util.list_exclude_generator(iter([1, 2, 1, [3]]), [1, 3, [3]])), [2, 1])
+
+    def test_exclude_missing(self):
+        """
+        Tests the exclusion of missing (hashable and unhashable)
+        items, both in the list and in the generator variants.
+        """
+
+        # verifies that a missing hashable item leaves the base
+        # list unchanged (all the items are checked before)
+        base_list = [1, 2, [3]]
+        self.assertRaises(ValueError, colony.libs.list_util.list_exclude, base_list, [1, 4], False)
+        self.assertEqual(base_list, [1, 2, [3]])
+
+        # verifies that a missing unhashable item leaves the base
+        # list without the (already excluded) hashable items
+        self.assertRaises(ValueError, colony.libs.list_util.list_exclude, base_list, [1, [4]], False)
+        self.assertEqual(base_list, [2, [3]])
+
+        # verifies that the generator variant ignores the missing
+        # items (hashable and unhashable) and excludes only the
+        # first occurrence of the unhashable items
+        generator = colony.libs.list_util.list_exclude_generator
+        self.assertEqual(list(generator([1, 2], [4, 5])), [1, 2])
+        self.assertEqual(list(generator([[1], 2, [1]], [[1], [4]])), [2, [1]])
+        self.assertEqual(list(generator(iter([{"a" : 1}, 2]), [{"a" : 1}, 4])), [2])
@@ -0,0 +1,164 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import datetime
+
+import colony.libs.map_util
+import colony.libs.test_util
+
+DEEP_LEVELS = 5000
+""" The number of levels of the deep maps used in
+the tests (must be greater than the recursion limit) """
+
+class MapUtilTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the map utilities.
+    """
+
+    def test_extend(self):
+        """
+        Tests the extension of maps (including the sharing).
+        """
+
+        base_map = {"a" : {"b" : 1, "c" : {"d" : 1}}, "x" : "y"}
+        extension_map = {"a" : {"c" : {"e" : 2}, "f" : {"g" : 1}}, "x" : {"z" : 1}}
+
+        # extends the base map recursively and verifies that
+        # the base map is left unchanged (copy mode)
+        result = colony.libs.map_util.map_extend(base_map, extension_map, recursive = True)
+        self.assertEqual(result, {"a" : {"b" : 1, "c" : {"d" : 1, "e" : 2}, "f" : {"g" : 1}}, "x" : {"z" : 1}})
+        self.assertEqual(base_map, {"a" : {"b" : 1, "c" : {"d" : 1}}, "x" : "y"})
+        self.assertNotEqual(id(result["a"]["f"]), id(extension_map["a"]["f"]))
+
+        # extends the base map sharing the new sub maps and
+        # verifies that the new sub map is referenced
+        result = colony.libs.map_util.map_extend(base_map, extension_map, recursive = True, share = True)
+        self.assertEqual(id(result["a"]["f"]), id(extension_map["a"]["f"]))
+
+        # extends the base map without override and then in place
+        result = colony.libs.map_util.map_extend(base_map, {"x" : 1, "z" : 2}, override = False)
+        self.assertEqual(result, {"a" : {"b" : 1, "c" : {"d" : 1}}, "x" : "y", "z" : 2})
+        result = colony.libs.map_util.map_extend(base_map, {"z" : 2}, copy_base_map = False)
+        self.assertEqual(id(result), id(base_map))
+        self.assertEqual(base_map["z"], 2)
+
+    def test_normalize(self):
+        """
+        Tests the normalization and duplication of maps.
+        """
+
+        date = datetime.datetime(2012, 1, 1)
+        item = {"a" : [1, (2, 3), {"b" : date}], "c" : {"d" : 1}}
+
+        # normalizes the item and verifies the result and that
+        # no container is shared with the original item
+        result = colony.libs.map_util.map_normalize(item)
+        self.assertEqual(result, {"a" : [1, [2, 3], {"b" : 1325376000}], "c" : {"d" : 1}})
+        self.assertNotEqual(id(result["c"]), id(item["c"]))
+
+        # normalizes the item sharing the unchanged containers
+        result = colony.libs.map_util.map_normalize(item, share = True)
+        self.assertEqual(id(result["c"]), id(item["c"]))
+        self.assertNotEqual(id(result["a"]), id(item["a"]))
+
+        # duplicates the item and verifies that the containers
+        # are new (the tuples are converted into lists)
+        result = colony.libs.map_util.map_duplicate(item)
+        self.assertEqual(result, {"a" : [1, [2, 3], {"b" : date}], "c" : {"d" : 1}})
+        self.assertNotEqual(id(result["c"]), id(item["c"]))
+
+        # normalizes the item in place and verifies that the
+        # containers are reused
+        result = colony.libs.map_util.map_normalize(item, in_place = True)
+        self.assertEqual(id(result), id(item))
+        self.assertEqual(item["a"], [1, [2, 3], {"b" : 1325376000}])
+
+    def test_empty(self):
+        """
+        Tests the map operations with empty (nested) maps,
+        that must remain maps and be copied.
+        """
+
+        # duplicates and normalizes items with empty nested maps
+        # and verifies that the empty maps remain maps
+        item = {"a" : {}, "b" : [{}]}
+        self.assertEqual(colony.libs.map_util.map_duplicate(item), {"a" : {}, "b" : [{}]})
+        self.assertEqual(colony.libs.map_util.map_normalize({"x" : {}}), {"x" : {}})
+        self.assertEqual(colony.libs.map_util.map_normalize({}, in_place = True), {})
+        self.assertEqual(type(colony.libs.map_util.map_duplicate(item)["a"]), dict)
+
+        # extends empty base maps (top level and nested) and
+        # verifies that the base maps are left unchanged
+        base_map = {}
+        result = colony.libs.map_util.map_extend(base_map, {"a" : 1})
+        self.assertEqual(result, {"a" : 1})
+        self.assertEqual(base_map, {})
+        base_map = {"a" : {}}
+        result = colony.libs.map_util.map_extend(base_map, {"a" : {"b" : 1}}, recursive = True)
+        self.assertEqual(result, {"a" : {"b" : 1}})
+        self.assertEqual(base_map, {"a" : {}})
+
+    def test_deep(self):
+        """
+        Tests the map operations with maps deeper than
+        the recursion limit.
+        """
+
+        # creates the deep map with the value
+        # at the deepest level
+        deep_map = {}
+        current = deep_map
+        for _index in range(DEEP_LEVELS):
+            current["x"] = {}
+            current = current["x"]
+        current["value"] = datetime.datetime(2012, 1, 1)
+
+        # runs the various operations over the deep map
+        copy_map = {}
+        colony.libs.map_util.map_copy_deep(deep_map, copy_map)
+        duplicate_map = colony.libs.map_util.map_duplicate(deep_map)
+        extended_map = colony.libs.map_util.map_extend(deep_map, {"x" : {"y" : 1}}, recursive = True)
+        normalized_map = colony.libs.map_util.map_normalize(deep_map)
+
+        # verifies the deepest value for each of the results
+        for result, value in ((copy_map, deep_map), (duplicate_map, deep_map), (normalized_map, None)):
+            for _index in range(DEEP_LEVELS): result = result["x"]
+            self.assertEqual(result["value"], value and current["value"] or 1325376000)
+        self.assertEqual(extended_map["x"]["y"], 1)
+        self.assertEqual(id(extended_map["x"]["x"]), id(deep_map["x"]["x"]))
@@ -0,0 +1,141 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import copy
+
+import colony.libs.test_util
+import colony.libs.object_util
+
+FLATTENING_MAP = {
+    "name" : "name",
+    "owner" : {
+        "name" : "owner_name"
+    },
+    "lines" : {
+        "quantity" : "quantity",
+        "product" : {
+            "code" : "code"
+        }
+    }
+}
+""" The flattening map to be used in the tests """
+
+class ObjectFlattenTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the object flatten functions.
+    """
+
+    def test_compile(self):
+        """
+        Tests the flattening with a compiled plan against
+        the (interpreted) flattening map.
+        """
+
+        # compiles the flattening map into the plan and flattens
+        # the instances using both the plan and the map
+        plan = colony.libs.object_util.compile_flattening(FLATTENING_MAP)
+        plan_list = colony.libs.object_util.object_flatten(self._get_instances(), plan)
+        map_list = colony.libs.object_util.object_flatten(self._get_instances(), FLATTENING_MAP)
+
+        # verifies that both of the flattened lists are the same
+        # for the flattened attributes
+        names = ("name", "owner_name", "quantity", "code")
+        plan_values = [[item[name] for name in names] for item in plan_list]
+        map_values = [[item[name] for name in names] for item in map_list]
+        self.assertEqual(plan_values, [["p1", "o1", 1, "x"], ["p1", "o1", 2, "y"], ["p2", "o2", 3, None]])
+        self.assertEqual(plan_values, map_values)
+
+        # flattens an instance with empty (falsy) values using both
+        # the plan and the map, the empty values must not be set
+        instances = [{"name" : "", "owner" : {"name" : 0}, "lines" : [{"quantity" : 0, "product" : {"code" : ""}}]}]
+        plan_list = colony.libs.object_util.object_flatten(copy.deepcopy(instances), plan)
+        map_list = colony.libs.object_util.object_flatten(copy.deepcopy(instances), FLATTENING_MAP)
+        plan_values = [[item.get(name, None) for name in names] for item in plan_list]
+        map_values = [[item.get(name, None) for name in names] for item in map_list]
+        self.assertEqual(plan_values, [["", None, None, None]])
+        self.assertEqual(plan_values, map_values)
+
+    def test_iterate(self):
+        """
+        Tests the streaming flattening with a compiled plan.
+        """
+
+        # compiles the flattening map into the plan and creates
+        # the generator of flattened instances from an iterator
+        plan = colony.libs.object_util.compile_flattening(FLATTENING_MAP)
+        generator = plan.iterate(iter(self._get_instances()))
+
+        # verifies the first flattened instance and that
+        # the original instance is left unchanged
+        item = generator.next()
+        self.assertEqual(item["code"], "x")
+        self.assertEqual(item["lines"][0]["product"], {"code" : "x"})
+        self.assertEqual(len(list(generator)), 2)
+
+        # verifies that an instance without relations is
+        # flattened with the missing values set as null
+        items = list(plan.iterate([{"name" : "p3"}]))
+        self.assertEqual(items, [{"name" : "p3", "owner_name" : None, "quantity" : None, "code" : None}])
+
+    def _get_instances(self):
+        """
+        Retrieves a new list of instances (maps) to
+        be flattened in the tests.
+
+        @rtype: List
+        @return: The list of instances to be flattened.
+        """
+
+        return [
+            {
+                "name" : "p1",
+                "owner" : {"name" : "o1"},
+                "lines" : [
+                    {"quantity" : 1, "product" : {"code" : "x"}},
+                    {"quantity" : 2, "product" : {"code" : "y"}}
+                ]
+            },
+            {
+                "name" : "p2",
+                "owner" : {"name" : "o2"},
+                "lines" : [
+                    {"quantity" : 3}
+                ]
+            }
+        ]
@@ -0,0 +1,88 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import urllib
+
+import colony.libs.test_util
+import colony.libs.quote_util
+
+class QuoteTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the quote functions.
+    """
+
+    def test_quote(self):
+        """
+        Tests the quote and unquote functions against
+        the python base library (for all the bytes).
+        """
+
+        # creates the string value with all the
+        # bytes and some safe runs
+        string_value = "plugins/colony" + "".join([chr(index) for index in range(256)]) + "web"
+
+        # verifies that the quoted values are the same as the
+        # ones from the python base library
+        self.assertEqual(colony.libs.quote_util.quote(string_value), urllib.quote(string_value))
+        self.assertEqual(colony.libs.quote_util.quote(string_value, ""), urllib.quote(string_value, ""))
+        self.assertEqual(colony.libs.quote_util.quote_plus(string_value), urllib.quote_plus(string_value))
+        self.assertEqual(colony.libs.quote_util.quote("plugins/colony"), "plugins/colony")
+
+        # verifies that the unquoted values are the same as the ones
+        # from the python base library (including invalid values)
+        self.assertEqual(colony.libs.quote_util.unquote(urllib.quote(string_value)), string_value)
+        self.assertEqual(colony.libs.quote_util.unquote_plus(urllib.quote_plus(string_value)), string_value)
+        self.assertEqual(colony.libs.quote_util.unquote("%zz%4%41"), "%zz%4A")
+        self.assertEqual(colony.libs.quote_util.unquote(u"a%e9%20b"), u"a\xe9 b")
+
+    def test_url_encode(self):
+        """
+        Tests the url encode functions (including the batch one).
+        """
+
+        # creates the attributes map and the
+        # expected encoded attributes
+        attributes_map = {"name" : "john doe", "path" : "/a/b", "query" : "x&y=z"}
+        encoded_attributes = urllib.urlencode(attributes_map)
+
+        # verifies the encoding of the attributes map
+        # in the single and batch modes
+        self.assertEqual(colony.libs.quote_util.url_encode(attributes_map, True), encoded_attributes)
+        self.assertEqual(colony.libs.quote_util.url_encode_many([attributes_map, {}], True), [encoded_attributes, ""])
+        self.assertEqual(colony.libs.quote_util.url_encode_many([{"path" : "/a"}]), ["path=/a"])
@@ -0,0 +1,153 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import time
+import datetime
+import threading
+
+import colony.libs.test_util
+import colony.libs.scheduling_util
+
+TIMEOUT = 10.0
+""" The maximum amount of time (in seconds) to wait for
+the execution of the callables in the tests """
+
+class SchedulerTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the scheduler and the schedules.
+    """
+
+    def test_scheduler(self):
+        """
+        Tests the ordering and the cancellation of the callables
+        and the (default) serial execution of them.
+        """
+
+        # schedules the callables (out of order) before the start
+        # of the scheduler and a final callable that sets the event
+        calls = []
+        event = threading.Event()
+        scheduler = colony.libs.scheduling_util.Scheduler()
+        current = time.time()
+        scheduler.add_callable(lambda: calls.append("b"), current - 0.1)
+        scheduler.add_callable(lambda: calls.append("a"), current - 0.2)
+        task = scheduler.add_callable(lambda: calls.append("c"), current - 0.15)
+        task.cancel()
+        scheduler.add_callable(event.set, current)
+
+        # starts the scheduler and waits for the final callable
+        scheduler.start_scheduler()
+        try: event.wait(TIMEOUT)
+        finally: scheduler.stop_scheduler(); scheduler.join(TIMEOUT)
+
+        # verifies that there's no pool (serial execution) and that
+        # the callables were executed in order (except the cancelled)
+        self.assertEqual(scheduler.pool, None)
+        self.assertEqual(calls, ["a", "b"])
+        self.assertEqual(scheduler.get_stats()["executed"], 3)
+
+    def test_pool(self):
+        """
+        Tests that a blocked callable does not delay the other callables
+        and the concurrency limit and misfire policies.
+        """
+
+        calls = []
+        release = threading.Event()
+        executed = threading.Event()
+        scheduler = colony.libs.scheduling_util.Scheduler(workers = 3, misfire_grace = 0.05)
+        scheduler.start_scheduler()
+        try:
+            # schedules a callable that blocks until released and verifies
+            # that the following callable is executed meanwhile
+            current = time.time()
+            scheduler.add_callable(lambda: release.wait(TIMEOUT), current)
+            scheduler.add_callable(lambda: (calls.append("a"), executed.set()), current)
+            executed.wait(TIMEOUT)
+            self.assertEqual(calls, ["a"])
+
+            # schedules a misfired callable (skipped by the policy) and a
+            # recurring blocked callable (skipped by the concurrency limit)
+            scheduler.add_callable(lambda: calls.append("b"), current - 1.0, misfire = colony.libs.scheduling_util.SKIP_MISFIRE)
+            scheduler.add_recurring(lambda: release.wait(TIMEOUT), 0.01, max_instances = 1)
+            self._wait(lambda: scheduler.get_stats()["skips"] >= 2)
+        finally:
+            release.set()
+            scheduler.stop_scheduler()
+            scheduler.join(TIMEOUT)
+            scheduler.pool.join(TIMEOUT)
+
+        stats = scheduler.get_stats()
+        self.assertEqual(calls, ["a"])
+        self.assertEqual(stats["misfires"] >= 1, True)
+        self.assertEqual(stats["skips"] >= 2, True)
+
+    def test_interval(self):
+        """
+        Tests the interval schedule (skipping of missed calls).
+        """
+
+        schedule = colony.libs.scheduling_util.IntervalSchedule(10)
+        self.assertEqual(schedule.next(100), 110)
+        self.assertEqual(schedule.next(100, 135), 140)
+
+    def test_cron(self):
+        """
+        Tests the computation of the next time of a cron schedule.
+        """
+
+        schedule = colony.libs.scheduling_util.CronSchedule("*/15 9-17 * * 1-5")
+        timestamp = time.mktime(datetime.datetime(2012, 6, 1, 17, 50).timetuple())
+        timestamp = schedule.next(timestamp)
+        self.assertEqual(datetime.datetime.fromtimestamp(timestamp), datetime.datetime(2012, 6, 4, 9, 0))
+
+        schedule = colony.libs.scheduling_util.CronSchedule("0 0 13 * 5")
+        timestamp = time.mktime(datetime.datetime(2012, 6, 2).timetuple())
+        timestamp = schedule.next(timestamp)
+        self.assertEqual(datetime.datetime.fromtimestamp(timestamp), datetime.datetime(2012, 6, 8, 0, 0))
+
+        self.assertRaises(ValueError, colony.libs.scheduling_util.CronSchedule, "* * *")
+        self.assertRaises(ValueError, colony.libs.scheduling_util.CronSchedule, "60 * * * *")
+
+    def _wait(self, condition, timeout = TIMEOUT):
+        # waits (polling) until the condition is verified or
+        # the timeout is reached (the timeout is large so that
+        # the tests are not sensible to the load of the machine)
+        end = time.time() + timeout
+        while not condition() and time.time() < end: time.sleep(0.01)
@@ -0,0 +1,121 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import colony.libs.test_util
+import colony.libs.string_buffer_util
+
+class StringBufferTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the string buffer class.
+    """
+
+    def test_duplicate(self):
+        """
+        Tests that the duplicates do not affect each other.
+        """
+
+        string_buffer = colony.libs.string_buffer_util.StringBuffer()
+        string_buffer.write("hello")
+        string_buffer.write(" ")
+
+        duplicated_string_buffer = string_buffer.duplicate()
+        duplicated_string_buffer.write("colony")
+        string_buffer.write("world")
+
+        self.assertEqual(string_buffer.get_value(), "hello world")
+        self.assertEqual(duplicated_string_buffer.get_value(), "hello colony")
+        self.assertEqual(duplicated_string_buffer.get_last(), "hello colony")
+
+        duplicated_string_buffer.write("!")
+        duplicated_string_buffer.rollback_last()
+        self.assertEqual(duplicated_string_buffer.get_value(), "hello colony")
+        self.assertEqual(duplicated_string_buffer.string_list, ["hello colony"])
+
+    def test_read(self):
+        """
+        Tests the reading (and seeking) of the string buffer.
+        """
+
+        string_buffer = colony.libs.string_buffer_util.StringBuffer(False)
+        string_buffer.write("hello ")
+        string_buffer.write("world")
+        string_buffer.seek(0)
+
+        self.assertEqual(string_buffer.read(5), "hello")
+        self.assertEqual(string_buffer.read_view(1).tobytes(), " ")
+        self.assertEqual(string_buffer.read(), "world")
+        self.assertEqual(string_buffer.eof(), True)
+
+    def test_read_unicode(self):
+        """
+        Tests the reading of a string buffer containing
+        unicode values (no memory view is possible).
+        """
+
+        for fast in (True, False):
+            string_buffer = colony.libs.string_buffer_util.StringBuffer(fast)
+            string_buffer.write(u"ol\xe1 ")
+            string_buffer.write(u"mundo")
+            string_buffer.seek(0)
+
+            self.assertEqual(string_buffer.read(4), u"ol\xe1 ")
+            self.assertEqual(string_buffer.read_view(1), u"m")
+            self.assertEqual(string_buffer.read(), u"undo")
+            self.assertEqual(string_buffer.eof(), True)
+
+    def test_binary(self):
+        """
+        Tests the binary (byte array backed) string buffer.
+        """
+
+        string_buffer = colony.libs.string_buffer_util.BinaryStringBuffer()
+        string_buffer.write("hello")
+        string_buffer.write(bytearray(" "))
+        string_buffer.write(memoryview("world"))
+
+        self.assertEqual(string_buffer.get_value(), "hello world")
+        self.assertEqual(string_buffer.getbuffer().tobytes(), "hello world")
+        self.assertEqual(len(string_buffer.get_chunks()), 3)
+        self.assertEqual(string_buffer.string_list, ["hello", " ", "world"])
+        self.assertEqual(string_buffer.get_last(), "world")
+
+        string_buffer.rollback_last()
+        self.assertEqual(string_buffer.get_value(), "hello ")
+        self.assertEqual(string_buffer.read(), "hello ")
+        self.assertEqual(string_buffer.eof(), True)
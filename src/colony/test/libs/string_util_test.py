@@ -0,0 +1,91 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import colony.libs.test_util
+import colony.libs.string_util
+
+class XorStringTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the xor string functions.
+    """
+
+    def test_xor_string_value(self):
+        """
+        Tests the xor of two strings with the same length.
+        """
+
+        self.assertEqual(colony.libs.string_util.xor_string_value("", ""), "")
+        self.assertEqual(colony.libs.string_util.xor_string_value("\x00\xff\x0f", "\xff\xff\xf0"), "\xff\x00\xff")
+        self.assertEqual(colony.libs.string_util.xor_string_value("\x00" * 3 + "a", "\x00" * 4), "\x00" * 3 + "a")
+        self.assertRaises(ValueError, colony.libs.string_util.xor_string_value, "ab", "a")
+
+    def test_xor_string_unicode(self):
+        """
+        Tests the xor of unicode strings (latin-1 characters)
+        and the rejection of the characters out of that range.
+        """
+
+        self.assertEqual(colony.libs.string_util.xor_string_value(u"\xe9a", u"\x01\x01"), "\xe8`")
+        self.assertEqual(colony.libs.string_util.xor_string_value(u"\xe9a", "\x01\x01"), "\xe8`")
+        self.assertEqual(colony.libs.string_util.xor_string_key(u"\xe9a", u"\x01"), "\xe8`")
+        self.assertRaises(ValueError, colony.libs.string_util.xor_string_value, u"\u20aca", u"\x01\x01")
+
+    def test_xor_string_key(self):
+        """
+        Tests the xor of a string against a repeating key,
+        including multiple blocks and offsets.
+        """
+
+        # creates the string value (larger than the block size)
+        # and the key to be used in the xor operation
+        string_value = "".join([chr(index % 256) for index in range(colony.libs.string_util.XOR_BLOCK_SIZE + 100)])
+        key = "\x01\x02\x03"
+
+        # runs the xor operation against the key and verifies that
+        # the result is the same as the xor against the repeated key
+        result = colony.libs.string_util.xor_string_key(string_value, key)
+        expected = colony.libs.string_util.xor_string_value(string_value, (key * len(string_value))[:len(string_value)])
+        self.assertEqual(result, expected)
+
+        # verifies that the xor operation may be run in parts
+        # using the offset in the key (streaming)
+        first = colony.libs.string_util.xor_string_key(string_value[:100], key)
+        second = colony.libs.string_util.xor_string_key(string_value[100:], key, 100)
+        self.assertEqual(first + second, result)
+        self.assertRaises(ValueError, colony.libs.string_util.xor_string_key, "ab", "")
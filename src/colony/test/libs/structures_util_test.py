@@ -37,6 +37,8 @@ __copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
 __license__ = "GNU General Public License (GPL), Version 3"
 """ The license for the module """
 
+import sys
+
 import colony.libs.test_util
 import colony.libs.structures_util
 
@@ -189,6 +191,39 @@ class JournaledListTest(colony.libs.test_util.ColonyTestCase):
         # verifies that the journaled list remains unmodified
         self.assertEqual(jounaled_list, [1, 1])
 
+    def test_diff(self):
+        """
+        Tests the diff method of the journaled list.
+        """
+
+        # creates a jounaled list with a small journal and
+        # runs a series of operations over it
+        jounaled_list = colony.libs.structures_util.JournaledList([1, 2, 3], journal_size = 4)
+        jounaled_list.append(4)
+        version, appends, removes = jounaled_list.diff()
+        self.assertEqual((version, appends, removes), (1, [4], []))
+
+        # runs extra operations (some of them cancelling) and
+        # verifies the change set since the previous version
+        jounaled_list.append(5)
+        jounaled_list.remove(1)
+        jounaled_list.remove(5)
+        self.assertEqual(jounaled_list.diff(version), (4, [], [1]))
+        self.assertEqual(jounaled_list.diff(4), (4, [], []))
+
+        # runs more operations than the size of the journal
+        # (the older versions are no longer available)
+        jounaled_list.append(6)
+        jounaled_list.append(7)
+        self.assertEqual(jounaled_list.diff(version), None)
+        self.assertEqual(jounaled_list.diff(2), (6, [6, 7], [1, 5]))
+
+        # verifies the membership (side index) of the values
+        self.assertEqual(4 in jounaled_list, True)
+        self.assertEqual(1 in jounaled_list, False)
+        jounaled_list.insert(0, 1)
+        self.assertEqual(1 in jounaled_list, True)
+
     def test__append(self):
         """
         Tests the _append method of the journaled list.
@@ -254,6 +289,31 @@ class JournaledListTest(colony.libs.test_util.ColonyTestCase):
         appends = jounaled_list.get_appends()
         self.assertEqual(appends, [])
 
+    def test_journal_length(self):
+        """
+        Tests that the cost of the append and remove operations
+        is independent of the length of the journal.
+        """
+
+        # creates a jounaled list and fills its journal with a large
+        # number of appends, that are then removed from the list
+        # without journaling (the journal keeps its length)
+        jounaled_list = colony.libs.structures_util.JournaledList()
+        objects = [ComparedObject() for _index in range(1000)]
+        for object in objects: jounaled_list.append(object)
+        for object in objects: jounaled_list._remove(object)
+        self.assertEqual(len(jounaled_list.get_appends()), 1000)
+
+        # appends and removes a new object counting the number of
+        # comparisons done, no scan of the journal should occur
+        object = ComparedObject()
+        ComparedObject.comparisons = 0
+        jounaled_list.append(object)
+        jounaled_list.remove(object)
+        self.assertEqual(ComparedObject.comparisons, 0)
+        self.assertEqual(len(jounaled_list.get_appends()), 1000)
+        self.assertEqual(jounaled_list.get_removes(), [])
+
 class OrderedMap(colony.libs.test_util.ColonyTestCase):
     """
     Class that tests the ordered map structure.
@@ -291,3 +351,134 @@ class OrderedMap(colony.libs.test_util.ColonyTestCase):
             # increments the index counter
             # (new iteration)
             index += 1
+
+    def test_remove(self):
+        """
+        Tests the removal and overwriting of items in the
+        ordered map structure.
+        """
+
+        # creates an ordered map structure, removes one of the
+        # items and overwrites another one (moved to the end)
+        ordered_map = colony.libs.structures_util.OrderedMap()
+        ordered_map["1"] = 1
+        ordered_map["2"] = 2
+        ordered_map["3"] = 3
+        del ordered_map["2"]
+        ordered_map["1"] = 4
+
+        # verifies that the order of the keys, values and items
+        # is the expected one (after the changes)
+        self.assertEqual(ordered_map.keys(), ["3", "1"])
+        self.assertEqual(ordered_map.values(), [3, 4])
+        self.assertEqual(ordered_map.items(), [("3", 3), ("1", 4)])
+        self.assertEqual(len(ordered_map), 2)
+        self.assertEqual("2" in ordered_map, False)
+
+    def test_iteration(self):
+        """
+        Tests the modification of the ordered map structure
+        during the iteration over it.
+        """
+
+        # creates an ordered map structure and removes items
+        # from it during the iteration (removed items are skipped)
+        ordered_map = colony.libs.structures_util.OrderedMap()
+        ordered_map["1"] = 1
+        ordered_map["2"] = 2
+        ordered_map["3"] = 3
+
+        keys = []
+        for key in ordered_map:
+            keys.append(key)
+            if key == "1": del ordered_map["2"]
+
+        # verifies that the removed item was skipped
+        self.assertEqual(keys, ["1", "3"])
+
+class MultipleValueMapTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the multiple value map structure.
+    """
+
+    def test_values(self):
+        """
+        Tests the setting and unsetting of values in the
+        multiple value map structure.
+        """
+
+        # creates a multiple value map with one single value
+        # key and a multiple value key (including a list value)
+        multiple_value_map = colony.libs.structures_util.MultipleValueMap()
+        multiple_value_map["a"] = 1
+        multiple_value_map["b"] = [1, 2]
+        multiple_value_map["b"] = 3
+
+        # verifies that the first values and the lists of
+        # values are the expected ones
+        self.assertEqual(multiple_value_map["a"], 1)
+        self.assertEqual(multiple_value_map["b"], [1, 2])
+        self.assertEqual(multiple_value_map.get("a"), [1])
+        self.assertEqual(multiple_value_map.get("b"), [[1, 2], 3])
+        self.assertEqual(multiple_value_map.get("c", None), None)
+
+        # unsets the values and verifies that the keys
+        # remain with the expected values
+        multiple_value_map.unset("b", [1, 2])
+        multiple_value_map.unset("a", 1)
+        self.assertEqual(multiple_value_map["b"], 3)
+        self.assertEqual(multiple_value_map["a"], None)
+        self.assertEqual(multiple_value_map.get("a"), [])
+
+    def test_falsy(self):
+        """
+        Tests that the falsy first values are retrieved
+        as they are (and not as an invalid value).
+        """
+
+        # creates a multiple value map with falsy first values
+        # for keys with multiple values
+        multiple_value_map = colony.libs.structures_util.MultipleValueMap()
+        multiple_value_map["a"] = ""
+        multiple_value_map["a"] = "x"
+        multiple_value_map["b"] = 0
+        multiple_value_map["b"] = 1
+
+        # verifies that the first values are the falsy ones
+        self.assertEqual(multiple_value_map["a"], "")
+        self.assertEqual(multiple_value_map["b"], 0)
+        self.assertEqual(multiple_value_map.get("a"), ["", "x"])
+
+    def test_memory(self):
+        """
+        Tests the memory usage of a multiple value map with
+        a large number of (single value) keys.
+        """
+
+        # creates a multiple value map with a large number of
+        # keys (single value) and a small number of multiple values
+        multiple_value_map = colony.libs.structures_util.MultipleValueMap()
+        for index in range(100000): multiple_value_map[index] = index
+        for index in range(10): multiple_value_map[index] = index
+
+        # computes the size of the internal values and compares
+        # it against the size of a list for each of the values
+        size = sum([sys.getsizeof(value) for value in multiple_value_map._map.itervalues()])
+        lists_size = sum([sys.getsizeof([value]) for value in multiple_value_map._map.itervalues()])
+        self.assertEqual(len(multiple_value_map), 100000)
+        self.assertEqual(size * 2 < lists_size, True)
+
+class ComparedObject(object):
+    """
+    Object that counts the (equality) comparisons done with it.
+    """
+
+    comparisons = 0
+    """ The global number of comparisons done """
+
+    def __eq__(self, other):
+        ComparedObject.comparisons += 1
+        return self is other
+
+    def __hash__(self):
+        return id(self)
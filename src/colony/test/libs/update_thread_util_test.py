@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import threading
+
+import colony.libs.test_util
+import colony.libs.update_thread_util
+
+TIMEOUT = 10.0
+""" The maximum amount of time (in seconds) to wait for
+the calls of the timers in the tests """
+
+class TimerWheelTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the timer wheel and the update thread.
+    """
+
+    def setUp(self):
+        self.wheels = []
+
+    def tearDown(self):
+        # stops the wheels created in the test and the process
+        # wide wheel, waiting for their threads to finish
+        wheel = colony.libs.update_thread_util.stop_timer_wheel()
+        if wheel: self.wheels.append(wheel)
+        for wheel in self.wheels:
+            wheel.stop_wheel()
+            wheel.is_alive() and wheel.join(TIMEOUT)
+            wheel.pool and wheel.pool.join(TIMEOUT)
+
+    def test_wheel(self):
+        """
+        Tests the periodic calls and the cancellation of timers.
+        """
+
+        calls = []
+        events = {"a" : threading.Event(), "b" : threading.Event()}
+        def call(name):
+            calls.append(name)
+            if calls.count(name) >= 3 or name == "b": events[name].set()
+
+        wheel = self._create_wheel(tick = 0.01, size = 8, workers = 0)
+        wheel.start_wheel()
+        first = wheel.add_timer(call, 0.05, arguments = ("a",))
+        wheel.add_timer(call, 0.2, arguments = ("b",))
+
+        # waits for the third call of the first timer and cancels
+        # it verifying that only the second timer remains
+        events["a"].wait(TIMEOUT)
+        first.cancel()
+        count = calls.count("a")
+        self.assertEqual(count >= 3, True)
+        self.assertEqual(wheel.count, 1)
+
+        # waits for the call of the second timer and verifies
+        # that there were no more calls of the cancelled one
+        events["b"].wait(TIMEOUT)
+        self.assertEqual(calls.count("b") >= 1, True)
+        self.assertEqual(calls.count("a"), count)
+
+    def test_next_tick(self):
+        """
+        Tests that the wheel waits for the tick of the next
+        deadline instead of the next tick.
+        """
+
+        # adds timers with long intervals to the (stopped) wheel and
+        # verifies that the next tick is the one of the closest deadline
+        wheel = self._create_wheel(tick = 0.05, size = 8, workers = 0)
+        self.assertEqual(wheel._next_tick(), None)
+        second = wheel.add_timer(lambda: None, 30.0)
+        first = wheel.add_timer(lambda: None, 10.0)
+        self.assertEqual(wheel._next_tick(), first.tick)
+        self.assertEqual(first.tick - wheel.current_tick >= 199, True)
+
+        # cancels the first timer and verifies that the next
+        # tick is the one of the second timer (stale entry removed)
+        first.cancel()
+        self.assertEqual(wheel._next_tick(), second.tick)
+        second.cancel()
+        self.assertEqual(wheel._next_tick(), None)
+
+    def test_update_thread(self):
+        """
+        Tests the update thread as a handle of the timer wheel.
+        """
+
+        calls = []
+        event = threading.Event()
+        def call(value):
+            calls.append(value)
+            if len(calls) >= 2: event.set()
+
+        update_thread = colony.libs.update_thread_util.UpdateThread()
+        update_thread.set_timeout(0.05)
+        update_thread.set_call_method(call)
+        update_thread.set_call_arguments([1])
+        update_thread.start()
+        self.assertEqual(update_thread.is_alive(), True)
+        event.wait(TIMEOUT)
+        update_thread.stop()
+
+        self.assertEqual(calls[:2], [1, 1])
+        self.assertEqual(update_thread.is_alive(), False)
+        self.assertEqual(update_thread.timer.cancelled, True)
+
+    def _create_wheel(self, *args, **kwargs):
+        wheel = colony.libs.update_thread_util.TimerWheel(*args, **kwargs)
+        self.wheels.append(wheel)
+        return wheel
@@ -0,0 +1,219 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Hive Colony Framework
+# Copyright (c) 2008-2012 Hive Solutions Lda.
+#
+# This file is part of Hive Colony Framework.
+#
+# Hive Colony Framework is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Hive Colony Framework is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Hive Colony Framework. If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = "João Magalhães <joamag@hive.pt>"
+""" The author(s) of the module """
+
+__version__ = "1.0.0"
+""" The version of the module """
+
+__revision__ = "$LastChangedRevision$"
+""" The revision number of the module """
+
+__date__ = "$LastChangedDate$"
+""" The last change date of the module """
+
+__copyright__ = "Copyright (c) 2008-2012 Hive Solutions Lda."
+""" The copyright for the module """
+
+__license__ = "GNU General Public License (GPL), Version 3"
+""" The license for the module """
+
+import os
+import shutil
+import zipfile
+import tempfile
+
+import colony.libs.zip_util
+import colony.libs.test_util
+
+class ZipTest(colony.libs.test_util.ColonyTestCase):
+    """
+    Class that tests the zip utilities (parallel packer).
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, "source")
+        os.makedirs(os.path.join(self.source, "inner"))
+        self.contents = {
+            "text.txt" : "colony " * 1024,
+            "image.png" : "\x89PNG" + os.urandom(128),
+            "inner/empty.txt" : "",
+            "inner/data.bin" : os.urandom(4096)
+        }
+        for name, data in self.contents.items():
+            file = open(os.path.join(self.source, name), "wb")
+            try: file.write(data)
+            finally: file.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write(self):
+        """
+        Tests the writing of an archive using the parallel
+        packer, both in serial and in parallel mode.
+        """
+
+        for workers in (1, 4):
+            # creates the packer for the current number of workers
+            # and writes the complete source directory into it
+            path = os.path.join(self.directory, "%d.zip" % workers)
+            packer = colony.libs.zip_util.ParallelZip(path, workers = workers)
+            packer.add_directory(self.source)
+            files, bytes_read, _bytes_written = packer.write()
+
+            # verifies that the statistics of the packer
+            # are coherent with the written files
+            self.assertEqual(files, len(self.contents))
+            self.assertEqual(bytes_read, sum(len(value) for value in self.contents.values()))
+
+            # opens the archive and verifies that every entry is
+            # valid and contains the original data
+            zip_file = zipfile.ZipFile(path)
+            try:
+                self.assertEqual(zip_file.testzip(), None)
+                self.assertEqual(sorted(zip_file.namelist()), sorted(self.contents.keys()))
+                for name, data in self.contents.items(): self.assertEqual(zip_file.read(name), data)
+
+                # verifies that the already compressed file is stored
+                # and that the text file is deflated
+                self.assertEqual(zip_file.getinfo("image.png").compress_type, zipfile.ZIP_STORED)
+                self.assertEqual(zip_file.getinfo("text.txt").compress_type, zipfile.ZIP_DEFLATED)
+            finally:
+                zip_file.close()
+
+    def test_order(self):
+        """
+        Tests that the entries are written in the order
+        of addition, independently of the workers.
+        """
+
+        # adds the files to the packer in a specific order
+        # and writes the archive using multiple workers
+        path = os.path.join(self.directory, "order.zip")
+        names = ["inner/data.bin", "text.txt", "inner/empty.txt", "image.png"]
+        packer = colony.libs.zip_util.ParallelZip(path, workers = 3)
+        for name in names: packer.add(os.path.join(self.source, name), name)
+        packer.write()
+
+        # verifies that the order of the entries in the
+        # archive is the same as the order of addition
+        zip_file = zipfile.ZipFile(path)
+        try: self.assertEqual(zip_file.namelist(), names)
+        finally: zip_file.close()
+
+    def test_deterministic(self):
+        """
+        Tests that deterministic archives are sorted and
+        reproducible (same output for the same input).
+        """
+
+        archives = []
+
+        for index in range(2):
+            # changes the modification time of the source files so
+            # that it differs between the two archives
+            for name in self.contents.keys():
+                _path = os.path.join(self.source, name)
+                os.utime(_path, (index * 3600, index * 3600))
+
+            # creates a deterministic archive adding the entries
+            # in reverse order and reads its contents
+            path = os.path.join(self.directory, "%d.zip" % index)
+            packer = colony.libs.zip_util.ParallelZip(path, deterministic = True)
+            for name in sorted(self.contents.keys(), reverse = True):
+                packer.add(os.path.join(self.source, name), name)
+            packer.write()
+            file = open(path, "rb")
+            try: archives.append(file.read())
+            finally: file.close()
+
+            # verifies that the entries are sorted and that the
+            # fixed date time is used in every entry
+            zip_file = zipfile.ZipFile(path)
+            try:
+                self.assertEqual(zip_file.namelist(), sorted(self.contents.keys()))
+                for info in zip_file.infolist():
+                    self.assertEqual(info.date_time, colony.libs.zip_util.DETERMINISTIC_DATE_TIME)
+            finally:
+                zip_file.close()
+
+        # verifies that both archives are exactly the same
+        self.assertEqual(archives[0], archives[1])
+
+    def test_symlink(self):
+        """
+        Tests that the symbolic links to directories are
+        followed when adding a directory.
+        """
+
+        # in case the platform does not support symbolic
+        # links there's nothing to be tested
+        if not hasattr(os, "symlink"): return
+
+        # creates a directory outside of the source one and
+        # links it from inside the source directory
+        linked = os.path.join(self.directory, "linked")
+        os.makedirs(linked)
+        file = open(os.path.join(linked, "linked.txt"), "wb")
+        try: file.write("linked")
+        finally: file.close()
+        os.symlink(linked, os.path.join(self.source, "link"))
+
+        # writes the source directory and verifies that the
+        # file in the linked directory is included
+        path = os.path.join(self.directory, "symlink.zip")
+        packer = colony.libs.zip_util.ParallelZip(path)
+        packer.add_directory(self.source)
+        packer.write()
+        zip_file = zipfile.ZipFile(path)
+        try: self.assertEqual(zip_file.read("link/linked.txt"), "linked")
+        finally: zip_file.close()
+
+    def test_public(self):
+        """
+        Tests the writing of an archive using the public write
+        method of the zip file (no private internals).
+        """
+
+        # disables the raw write (private internals) so that the
+        # public write method is used and writes the archive
+        raw_write = colony.libs.zip_util.RAW_WRITE
+        colony.libs.zip_util.RAW_WRITE = False
+        try:
+            path = os.path.join(self.directory, "public.zip")
+            packer = colony.libs.zip_util.ParallelZip(path)
+            packer.add_directory(self.source)
+            packer.write()
+        finally:
+            colony.libs.zip_util.RAW_WRITE = raw_write
+
+        # opens the archive and verifies that every entry is
+        # valid and contains the original data
+        zip_file = zipfile.ZipFile(path)
+        try:
+            self.assertEqual(zip_file.testzip(), None)
+            for name, data in self.contents.items(): self.assertEqual(zip_file.read(name), data)
+            self.assertEqual(zip_file.getinfo("text.txt").compress_type, zipfile.ZIP_DEFLATED)
+        finally:
+            zip_file.close()
@@ -59,6 +59,8 @@ USAGE = "Help:\n\
 --help[-h] - prints this message\n\
 --remove[-r] - removes the package with the given id\n\
 --flush[-f] - flushes the current deploy directory\n\
+--batch[-b] - deploys (or removes) all the given packages as a single plan\n\
+--dry_run[-d] - prints the batch plan (and estimated io) without executing it\n\
 --info[-i] - prints information about the package\n\
 --verbose[-v] - starts the program in verbose mode\n\
 --manager_dir[-m]=(PLUGIN_DIR) - sets the plugin directory to be used by the deployer"
@@ -118,6 +120,10 @@ def update_system_path():
     # adds the default path to the system path
     sys.path.insert(0, os.path.normpath(os.path.realpath(DEFAULT_PATH_VALUE + "/../lib")))
 
+    # adds the manager path to the system path (for
+    # the colony libraries used by the deployer)
+    sys.path.insert(0, DEFAULT_MANAGER_PATH_VALUE)
+
 def print_information():
     """
     Prints the system information for the command line.
@@ -163,7 +169,7 @@ def main():
         option_arguments = sys.argv[2:]
 
     # processes the arguments options
-    options, _args = getopt.getopt(option_arguments, "hrfisvm:", ["help", "remove", "flush", "info", "silent", "verbose", "manager_dir="])
+    options, args = getopt.getopt(option_arguments, "hrfibdsvm:", ["help", "remove", "flush", "info", "batch", "dry_run", "silent", "verbose", "manager_dir="])
 
     # retrieves the file system encoding
     file_system_encoding = sys.getfilesystemencoding()
@@ -172,6 +178,8 @@ def main():
     remove = False
     flush = False
     info = False
+    batch = False
+    dry_run = False
     silent = False
     verbose = False
 
@@ -189,6 +197,11 @@ def main():
             flush = True
         elif option in ("-i", "--info"):
             info = True
+        elif option in ("-b", "--batch"):
+            batch = True
+        elif option in ("-d", "--dry_run"):
+            batch = True
+            dry_run = True
         elif option in ("-s", "--silent"):
             silent = True
         elif option in ("-v", "--verbose"):
@@ -224,6 +237,27 @@ def main():
         # returns immediately
         return
 
+    # in case the batch flag is set, all the packages are
+    # resolved into a single plan (removals and deploys)
+    if batch:
+        # retrieves the complete set of packages, the first argument
+        # (in case it's not an option) and the remaining arguments
+        packages = args if first_argument_character == "-" else [package_path] + args
+
+        # in case no packages were provided there's nothing
+        # to be resolved, prints the usage and exits
+        if not packages:
+            usage()
+            sys.exit(1)
+
+        # deploys (or removes) the packages in batch mode,
+        # only printing the plan in case it's a dry run
+        if remove: deployer.deploy_batch(package_ids = packages, dry_run = dry_run)
+        else: deployer.deploy_batch(package_paths = packages, dry_run = dry_run)
+
+        # returns immediately
+        return
+
     # in case the flush flag is set, there is
     # a flushing of the deploy directory
     if flush:
@@ -138,6 +138,27 @@ CONFIGURATION_VALUE = "configuration"
 DUPLICATE_FILES_VALUE = "duplicate_files"
 """ The duplicate files """
 
+ACTION_VALUE = "action"
+""" The action value """
+
+DEPLOY_VALUE = "deploy"
+""" The deploy value """
+
+REMOVE_VALUE = "remove"
+""" The remove value """
+
+PATH_VALUE = "path"
+""" The path value """
+
+READ_VALUE = "read"
+""" The read value """
+
+WRITE_VALUE = "write"
+""" The write value """
+
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+""" The units to be used in the printing of sizes """
+
 PACKAGES_FILE_NAME = "packages.json"
 """ The packages file name """
 
@@ -212,6 +233,16 @@ class Deployer:
     manager_path = None
     """ The path to the manager """
 
+    session = None
+    """ The map associating the name of the registry structure
+    files with the structures loaded in the current session, in
+    case it's not set there's no session and every change in the
+    structures is persisted immediately """
+
+    session_dirty = None
+    """ The set of names of the registry structure files that have
+    been changed in the current session (pending persistence) """
+
     def __init__(self, manager_path):
         """
         Constructor of the class.
@@ -307,6 +338,278 @@ class Deployer:
             # removes the deploy file (using the full path)
             os.remove(deploy_full_path)
 
+    def deploy_batch(self, package_paths = (), package_ids = (), dry_run = False):
+        """
+        Deploys the packages in the given paths and removes the
+        packages with the given ids as a single batch operation.
+
+        The packages are resolved into a single ordered plan that
+        is executed in one registry session (the registry structures
+        are loaded and persisted only once).
+
+        @type package_paths: List
+        @param package_paths: The paths to the packages to be deployed.
+        @type package_ids: List
+        @param package_ids: The ids of the packages to be removed.
+        @type dry_run: bool
+        @param dry_run: If the plan should only be printed (with the
+        estimated amount of io) and not executed.
+        @rtype: List
+        @return: The plan (list of steps) for the batch operation.
+        """
+
+        # creates the plan for the batch operation and prints it
+        # so that the user is aware of the changes to be done
+        plan = self.plan_batch(package_paths, package_ids)
+        self.print_plan(plan)
+
+        # in case the dry run flag is not set executes the
+        # plan (otherwise the plan is just printed)
+        if not dry_run: self.execute_plan(plan)
+
+        # returns the plan
+        return plan
+
+    def plan_batch(self, package_paths = (), package_ids = ()):
+        """
+        Resolves the packages to be deployed and removed into a single
+        ordered plan, the removals are placed before the deploys and the
+        bundle membership is respected (packages contained in bundles to
+        be deployed or removed are handled through their bundles).
+
+        @type package_paths: List
+        @param package_paths: The paths to the packages to be deployed.
+        @type package_ids: List
+        @param package_ids: The ids of the packages to be removed.
+        @rtype: List
+        @return: The list of steps (maps) describing the plan.
+        """
+
+        # retrieves the installed packages (the registry is read
+        # only once for the complete planning)
+        packages = self._get_packages()
+        installed_packages = packages.get(INSTALLED_PACKAGES_VALUE, {})
+
+        # creates the map that associates the id of the packages to
+        # be deployed with the deploy step, the map associating the
+        # id of a bundle with the ids of its members and the map
+        # associating the package paths with the package ids
+        deploys = {}
+        members = {}
+        path_ids = {}
+
+        # creates a new zip (manager)
+        zip = colony_zip.Zip()
+
+        # iterates over all the package paths to create the
+        # deploy steps for each of them (last one wins)
+        for package_path in package_paths:
+            # in case the package path does not exist
+            if not os.path.exists(package_path):
+                # raises a deployer exception
+                raise colony_exceptions.DeployerException("the package path '%s' does not exist" % package_path)
+
+            # reads and validates the specification of the package
+            # (directly from the package file)
+            specification_file_contents = zip.read(package_path, SPECIFICATION_FILE_NAME)
+            specification = json.loads(specification_file_contents)
+            self.validate_specification(specification)
+
+            # retrieves the type and the id of the package and in
+            # case it's a bundle registers its members
+            type = specification[TYPE_VALUE]
+            id = specification[ID_VALUE]
+            if type == BUNDLE_VALUE: members[id] = self.__get_members(specification)
+            path_ids[package_path] = id
+
+            # creates the deploy step for the package estimating the
+            # io as the package file read and the contents written
+            # (temporary) plus the registry copy of the package
+            package_size = os.path.getsize(package_path)
+            deploys[id] = {
+                ACTION_VALUE : DEPLOY_VALUE,
+                TYPE_VALUE : type,
+                ID_VALUE : id,
+                VERSION_VALUE : specification[VERSION_VALUE],
+                PATH_VALUE : package_path,
+                READ_VALUE : package_size,
+                WRITE_VALUE : zip.size(package_path) + package_size
+            }
+
+        # removes the deploys of packages that are members of bundles
+        # being deployed (they're deployed by the bundle)
+        bundled_ids = [_id for _members in members.values() for _id in _members]
+        for id in bundled_ids:
+            if not id in deploys or deploys[id][TYPE_VALUE] == BUNDLE_VALUE: continue
+            del deploys[id]
+
+        # creates the list of ids to be removed, these are the
+        # explicit ones, the installed ones that are going to be
+        # re-deployed and the installed members of deployed bundles
+        remove_ids = list(package_ids)
+        remove_ids.extend(id for id in deploys if id in installed_packages)
+        remove_ids.extend(id for id in bundled_ids if id in installed_packages)
+
+        # creates the map associating the id of the packages to be
+        # removed with the remove step and the set of ids covered by
+        # the removal of bundles (removed through the bundle)
+        removes = {}
+        covered_ids = set()
+
+        # iterates over all the ids to be removed to create the
+        # remove steps for each of them
+        for id in remove_ids:
+            # in case the id is already set for removal
+            # skips it (duplicate removal)
+            if id in removes: continue
+
+            # in case the package id is not found in the installed packages
+            if not id in installed_packages:
+                # raises a deployer exception
+                raise colony_exceptions.DeployerException("package '%s' is not installed" % id)
+
+            # retrieves the type and the version of the installed
+            # package and the path to its registry file
+            package = installed_packages[id]
+            type = package[TYPE_VALUE]
+            version = package[VERSION_VALUE]
+            registry_file_path = self.__get_registry_file_path(type, id, version)
+
+            # in case the package is a bundle its members are covered
+            # by its removal (no need to remove them individually)
+            if type == BUNDLE_VALUE:
+                specification_file_contents = zip.read(registry_file_path, SPECIFICATION_FILE_NAME)
+                specification = json.loads(specification_file_contents)
+                covered_ids.update(self.__get_members(specification))
+
+            # creates the remove step for the package estimating the
+            # io as the reading of the registry file
+            removes[id] = {
+                ACTION_VALUE : REMOVE_VALUE,
+                TYPE_VALUE : type,
+                ID_VALUE : id,
+                VERSION_VALUE : version,
+                PATH_VALUE : registry_file_path,
+                READ_VALUE : os.path.exists(registry_file_path) and os.path.getsize(registry_file_path) or 0,
+                WRITE_VALUE : 0
+            }
+
+        # creates the list of removal steps (bundles first) ignoring the
+        # ones covered by bundle removals, then creates the list of deploy
+        # steps with the bundles at the end (after the "single" packages)
+        remove_steps = [removes[id] for id in remove_ids if id in removes and not id in covered_ids]
+        remove_steps = self.__unique(remove_steps)
+        remove_steps.sort(key = lambda step: not step[TYPE_VALUE] == BUNDLE_VALUE)
+        deploy_ids = [path_ids[package_path] for package_path in package_paths]
+        deploy_steps = [deploys[id] for id in deploy_ids if id in deploys]
+        deploy_steps = self.__unique(deploy_steps)
+        deploy_steps.sort(key = lambda step: step[TYPE_VALUE] == BUNDLE_VALUE)
+
+        # returns the plan as the concatenation of the
+        # removal and the deploy steps
+        return remove_steps + deploy_steps
+
+    def execute_plan(self, plan):
+        """
+        Executes the given plan (list of steps) in a single registry
+        session, so that the registry structures (including the
+        duplicates structure) are loaded and persisted only once.
+
+        @type plan: List
+        @param plan: The list of steps (maps) to be executed.
+        """
+
+        # starts the registry session, all the changes to the
+        # registry are kept in memory until the end of it
+        self.begin_session()
+
+        try:
+            # iterates over all the steps in the plan to execute
+            # them in order (removals and then deploys)
+            for step in plan:
+                action = step[ACTION_VALUE]
+                if action == REMOVE_VALUE: self.remove_package(step[ID_VALUE])
+                elif action == DEPLOY_VALUE: self.deploy_package(step[PATH_VALUE])
+        finally:
+            # ends the registry session, persisting the structures,
+            # this is done even in case of failure to keep the registry
+            # coherent with the changes already done to the file system
+            self.end_session()
+
+    def print_plan(self, plan):
+        """
+        Prints the given plan to the console, including the estimated
+        amount of io (read and written bytes) for each step.
+
+        @type plan: List
+        @param plan: The list of steps (maps) to be printed.
+        """
+
+        # starts the total counters for the read
+        # and written bytes (estimated)
+        total_read = 0
+        total_write = 0
+
+        # iterates over all the steps in the plan to print them
+        # and to update the total counters
+        for index, step in enumerate(plan):
+            total_read += step[READ_VALUE]
+            total_write += step[WRITE_VALUE]
+            print "%d. %s %s '%s' v'%s' (read %s, write %s)" % (
+                index + 1,
+                step[ACTION_VALUE],
+                step[TYPE_VALUE],
+                step[ID_VALUE],
+                step[VERSION_VALUE],
+                self.__size_string(step[READ_VALUE]),
+                self.__size_string(step[WRITE_VALUE])
+            )
+
+        # prints the totals for the plan
+        print "%d steps (read %s, write %s)" % (
+            len(plan),
+            self.__size_string(total_read),
+            self.__size_string(total_write)
+        )
+
+    def begin_session(self):
+        """
+        Begins a registry session, during the session the registry
+        structures are loaded only once and the changes to them are
+        kept in memory until the end of the session.
+        """
+
+        # in case there's already a session
+        # returns immediately (no nesting)
+        if not self.session == None: return
+
+        # creates the session structures
+        self.session = {}
+        self.session_dirty = set()
+
+    def end_session(self):
+        """
+        Ends the current registry session persisting all the
+        registry structures changed during it.
+        """
+
+        # in case there's no session returns
+        # immediately (nothing to be done)
+        if self.session == None: return
+
+        # retrieves the session structures and unsets them
+        # so that the persistence is done directly
+        session = self.session
+        session_dirty = self.session_dirty
+        self.session = None
+        self.session_dirty = None
+
+        # iterates over all the changed structures (sorted
+        # for determinism) to persist them
+        for structure_file_name in sorted(session_dirty):
+            structure = session[structure_file_name]
+            self.__persist_structure(structure_file_name, structure)
+
     def exists_package(self, package_id):
         """
         Tests if the package with the given id exists in the
@@ -2168,20 +2471,7 @@ class Deployer:
         file system.
         """
 
-        # retrieves the registry path
-        registry_path = os.path.normpath(self.manager_path + "/" + RELATIVE_REGISTRY_PATH)
-
-        # creates the structure file path
-        structure_file_path = os.path.normpath(registry_path + "/" + DUPLICATES_FILE_NAME)
-
-        # reads the structure file contents
-        structure_file_contents = colony_file.read_file(structure_file_path)
-
-        # loads the structure file contents from json
-        structure = json.loads(structure_file_contents)
-
-        # returns the structure
-        return structure
+        return self.__get_structure(DUPLICATES_FILE_NAME)
 
     def _persist_duplicates_structure(self, duplicates_structure):
         """
@@ -2193,21 +2483,7 @@ class Deployer:
         persisted into the file system.
         """
 
-        # retrieves the registry path
-        registry_path = os.path.normpath(self.manager_path + "/" + RELATIVE_REGISTRY_PATH)
-
-        # creates the structure file path
-        structure_file_path = os.path.normpath(registry_path + "/" + DUPLICATES_FILE_NAME)
-
-        # touches the duplicates structure (internal structure)
-        # updating the dates in it
-        self._touch_structure(duplicates_structure)
-
-        # serializes the structure
-        structure_serialized = json.dumps(duplicates_structure)
-
-        # writes the structure file contents
-        colony_file.write_file(structure_file_path, structure_serialized)
+        self.__persist_structure(DUPLICATES_FILE_NAME, duplicates_structure)
 
     def __get_structure(self, structure_file_name):
         """
@@ -2219,6 +2495,11 @@ class Deployer:
         @return: The structure retrieved from the structure file.
         """
 
+        # in case there's a session and the structure is already
+        # loaded in it returns it immediately (no file access)
+        if not self.session == None and structure_file_name in self.session:
+            return self.session[structure_file_name]
+
         # retrieves the registry path
         registry_path = os.path.normpath(self.manager_path + "/" + RELATIVE_REGISTRY_PATH)
 
@@ -2231,9 +2512,48 @@ class Deployer:
         # loads the structure file contents from json
         structure = json.loads(structure_file_contents)
 
+        # in case there's a session sets the structure in it
+        # so that it's re-used in the next accesses
+        if not self.session == None: self.session[structure_file_name] = structure
+
         # returns the structure
         return structure
 
+    def __persist_structure(self, structure_file_name, structure):
+        """
+        Persists the given structure into the structure file, in
+        case there's a session the structure is only marked as changed
+        and is persisted at the end of the session.
+
+        @type structure_file_name: String
+        @param structure_file_name: The name of the structure file to be used.
+        @type structure: Dictionary
+        @param structure: The structure to be persisted.
+        """
+
+        # in case there's a session sets the structure in it and
+        # marks it as changed (persisted at the end of the session)
+        if not self.session == None:
+            self.session[structure_file_name] = structure
+            self.session_dirty.add(structure_file_name)
+            return
+
+        # retrieves the registry path
+        registry_path = os.path.normpath(self.manager_path + "/" + RELATIVE_REGISTRY_PATH)
+
+        # creates the structure file path
+        structure_file_path = os.path.normpath(registry_path + "/" + structure_file_name)
+
+        # touches the structure (internal structure)
+        # updating the dates in it
+        self._touch_structure(structure)
+
+        # serializes the structure
+        structure_serialized = json.dumps(structure)
+
+        # writes the structure file contents
+        colony_file.write_file(structure_file_path, structure_serialized)
+
     def __add_structure_item(self, item_key, item_value, update_time, structure_file_name, structure_key_name):
         """
         Adds a new structure item to an existing structures file.
@@ -2250,20 +2570,11 @@ class Deployer:
         @param structure_key_name: The key to the structure base item.
         """
 
-        # retrieves the registry path
-        registry_path = os.path.normpath(self.manager_path + "/" + RELATIVE_REGISTRY_PATH)
-
-        # creates the structure file path
-        structure_file_path = os.path.normpath(registry_path + "/" + structure_file_name)
-
-        # reads the structure file contents
-        structure_file_contents = colony_file.read_file(structure_file_path)
-
-        # loads the structure file contents from json
-        structure = json.loads(structure_file_contents)
+        # retrieves the structure for the structure file
+        structure = self.__get_structure(structure_file_name)
 
         # retrieves the installed structure
-        installed_structure = structure.get(structure_key_name, {})
+        installed_structure = structure.setdefault(structure_key_name, {})
 
         # in case the update time flag is set
         if update_time:
@@ -2276,15 +2587,9 @@ class Deployer:
         # sets the installed structure map
         installed_structure[item_key] = item_value
 
-        # touches the structure (internal structure)
-        # updating the dates in it
-        self._touch_structure(structure)
-
-        # serializes the structure
-        structure_serialized = json.dumps(structure)
-
-        # writes the structure file contents
-        colony_file.write_file(structure_file_path, structure_serialized)
+        # persists the structure (at the end of the
+        # session in case there's one)
+        self.__persist_structure(structure_file_name, structure)
 
     def __remove_structure_item(self, item_key, structure_file_name, structure_key_name):
         """
@@ -2298,17 +2603,8 @@ class Deployer:
         @param structure_key_name: The key to the structure base item.
         """
 
-        # retrieves the registry path
-        registry_path = os.path.normpath(self.manager_path + "/" + RELATIVE_REGISTRY_PATH)
-
-        # creates the structure file path
-        structure_file_path = os.path.normpath(registry_path + "/" + structure_file_name)
-
-        # reads the structure file contents
-        structure_file_contents = colony_file.read_file(structure_file_path)
-
-        # loads the structure file contents from json
-        structure = json.loads(structure_file_contents)
+        # retrieves the structure for the structure file
+        structure = self.__get_structure(structure_file_name)
 
         # retrieves the installed structure
         installed_structure = structure.get(structure_key_name, {})
@@ -2322,15 +2618,86 @@ class Deployer:
         # removes the item from the installed structure
         del installed_structure[item_key]
 
-        # touches the structure (internal structure)
-        # updating the dates in it
-        self._touch_structure(structure)
+        # persists the structure (at the end of the
+        # session in case there's one)
+        self.__persist_structure(structure_file_name, structure)
 
-        # serializes the structure
-        structure_serialized = json.dumps(structure)
+    def __get_members(self, specification):
+        """
+        Retrieves the ids of the members (plugins and containers)
+        of the bundle described by the given specification.
 
-        # writes the structure file contents
-        colony_file.write_file(structure_file_path, structure_serialized)
+        @type specification: Dictionary
+        @param specification: The specification of the bundle.
+        @rtype: List
+        @return: The list of ids of the members of the bundle.
+        """
+
+        plugins = specification.get(PLUGINS_VALUE, [])
+        containers = specification.get(CONTAINERS_VALUE, [])
+        return [member[ID_VALUE] for member in plugins + containers]
+
+    def __get_registry_file_path(self, type, id, version):
+        """
+        Retrieves the path to the registry (package) file for
+        the package with the given type, id and version.
+
+        @type type: String
+        @param type: The type of the package.
+        @type id: String
+        @param id: The id of the package.
+        @type version: String
+        @param version: The version of the package.
+        @rtype: String
+        @return: The path to the registry file of the package.
+        """
+
+        # retrieves the registry path and the relative path and the
+        # extension for the type of package, then uses them to create
+        # the complete path to the registry file
+        registry_path = os.path.normpath(self.manager_path + "/" + RELATIVE_REGISTRY_PATH)
+        relative_path, extension = {
+            BUNDLE_VALUE : (RELATIVE_BUNDLES_PATH, COLONY_BUNDLE_FILE_EXTENSION),
+            PLUGIN_VALUE : (RELATIVE_PLUGINS_PATH, COLONY_PLUGIN_FILE_EXTENSION),
+            CONTAINER_VALUE : (RELATIVE_CONTAINERS_PATH, COLONY_CONTAINER_FILE_EXTENSION)
+        }.get(type, (RELATIVE_PLUGINS_PATH, COLONY_PLUGIN_FILE_EXTENSION))
+        file_name = id + "_" + version + extension
+        return os.path.normpath(registry_path + "/" + relative_path + "/" + file_name)
+
+    def __unique(self, steps):
+        """
+        Removes the duplicate steps from the given list of steps
+        maintaining the order of the steps.
+
+        @type steps: List
+        @param steps: The list of steps to be filtered.
+        @rtype: List
+        @return: The list of steps without duplicates.
+        """
+
+        ids = set()
+        unique = []
+        for step in steps:
+            if step[ID_VALUE] in ids: continue
+            ids.add(step[ID_VALUE])
+            unique.append(step)
+        return unique
+
+    def __size_string(self, size):
+        """
+        Converts the given size (in bytes) into a simplified
+        string representation using the appropriate unit.
+
+        @type size: int
+        @param size: The size (in bytes) to be converted.
+        @rtype: String
+        @return: The string representation of the size.
+        """
+
+        for unit in SIZE_UNITS[:-1]:
+            if size < 1024: return "%d %s" % (size, unit)
+            size /= 1024
+        return "%d %s" % (size, SIZE_UNITS[-1])
 
     def __align_path(self, path):
         """
@@ -40,15 +40,27 @@ __license__ = "GNU General Public License (GPL), Version 3"
 import os
 import stat
 import types
+import Queue
 import zipfile
-import cStringIO
+import threading
 
-BUFFER_LENGTH = 4096
-""" The length for the zip operation buffer """
+import colony.libs.zip_util
+
+BUFFER_LENGTH = 65536
+""" The length for the zip operation buffer, this is the
+size of the chunks used in the streaming of the entries """
 
 DEFAULT_ENCODING = "utf-8"
 """ The default encoding """
 
+DEFAULT_LEVEL = 6
+""" The default compression level for the deflate
+of the entries (same as the zlib default) """
+
+DEFAULT_WORKERS = 4
+""" The default number of worker threads to be used
+for the (parallel) compression of the entries """
+
 class Zip:
     """
     Provides functions to interact with zip files.
@@ -276,47 +288,19 @@ class Zip:
         @param root_directory_path: Full path to the place where the files will be extracted to.
         """
 
+        # retrieves the file paths
+        file_paths_list = self.get_file_paths(file_path)
+
         # opens the zip file for the given file path
         zip_file = zipfile.ZipFile(file_path)
 
         try:
-            # retrieves the file paths
-            file_paths_list = self.get_file_paths(file_path)
-
             # iterates over all the file names in the file paths list
             for file_name in file_paths_list:
                 # retrieves the complete file path of the file name
+                # and streams the member into it (in chunks)
                 full_path = os.path.join(root_directory_path, file_name)
-
-                # opens the file in write mode
-                file = open(full_path, "wb")
-
-                try:
-                    # reads the zip file contents
-                    zip_file_contents = zip_file.read(file_name)
-
-                    # creates a new string buffer
-                    string_buffer = cStringIO.StringIO()
-
-                    # writes the zip file contents into the string buffer
-                    string_buffer.write(zip_file_contents)
-
-                    # seeks to the beginning of the buffer
-                    string_buffer.seek(0)
-
-                    # reads the data from the string buffer
-                    data = string_buffer.read(BUFFER_LENGTH)
-
-                    # iterates while there is data available
-                    while data:
-                        # writes the data to the file
-                        file.write(data)
-
-                        # reads the data from the string buffer
-                        data = string_buffer.read(BUFFER_LENGTH)
-                finally:
-                    # closes the file
-                    file.close()
+                self._extract_member(zip_file, file_name, full_path)
         finally:
             # closes the zip file
             zip_file.close()
@@ -348,9 +332,18 @@ class Zip:
         # returns the file contents
         return file_contents
 
-    def zip(self, zip_file_path, input_directory, file_path_list = None):
+    def zip(
+        self,
+        zip_file_path,
+        input_directory,
+        file_path_list = None,
+        level = DEFAULT_LEVEL,
+        workers = DEFAULT_WORKERS
+    ):
         """
         Compresses the contents of the provided directory into a zip file.
+        The compression of the files is done in parallel worker threads and
+        the entries are written in the order of the file paths list.
 
         @type zip_file_path: String
         @param zip_file_path: Full path to the zip file.
@@ -358,6 +351,13 @@ class Zip:
         @param input_directory: Full path to the directory one wants to compress.
         @type file_path_list: List
         @param file_path_list: Optional list of paths to the files one wants to zip.
+        @type level: int
+        @param level: The compression level (zero implies stored mode).
+        @type workers: int
+        @param workers: The number of worker threads used for compression.
+        @rtype: Tuple
+        @return: Tuple containing the number of bytes read, the number of
+        bytes written and the throughput (in bytes per second).
         """
 
         # retrieves the absolute paths for both
@@ -371,47 +371,55 @@ class Zip:
             # returns immediately
             return
 
-        # creates a new zip file for writing in deflated mode
-        zip_file = zipfile.ZipFile(zip_file_path, "w", compression = zipfile.ZIP_DEFLATED)
+        # in case the file paths list does not exit
+        if not file_path_list:
+            # retrieves the fule paths from the input directory
+            # as the file path list
+            file_path_list = get_file_paths(input_directory)
 
-        try:
-            # in case the file paths list does not exit
-            if not file_path_list:
-                # retrieves the fule paths from the input directory
-                # as the file path list
-                file_path_list = get_file_paths(input_directory)
-
-            # iterates over all the file paths
-            # in the file path list
-            for file_path in file_path_list:
-                # retrieves the file path by joining the path
-                file_path = os.path.join(input_directory, file_path)
-
-                # retrieves the output file path
-                output_file_path = file_path[len(input_directory):len(file_path)]
-
-                # retrieves the output file path type
-                output_file_path_type = type(output_file_path)
-
-                # in case the output file path type is unicode
-                if output_file_path_type == types.UnicodeType:
-                    # encodes the output file path with the default encoding
-                    output_file_path_encoded = output_file_path.encode(DEFAULT_ENCODING)
-
-                # writes the file in the path to the zip file
-                zip_file.write(file_path, output_file_path_encoded)
-        finally:
-            # closes the zip file
-            zip_file.close()
+        # creates the parallel zip for the target file (the entries
+        # are compressed in worker threads and written in order)
+        parallel_zip = colony.libs.zip_util.ParallelZip(zip_file_path, level = level, workers = workers)
+
+        # iterates over all the file paths
+        # in the file path list
+        for file_path in file_path_list:
+            # retrieves the file path by joining the path
+            file_path = os.path.join(input_directory, file_path)
+
+            # retrieves the output file path
+            output_file_path = file_path[len(input_directory):len(file_path)]
+
+            # retrieves the output file path type
+            output_file_path_type = type(output_file_path)
+
+            # in case the output file path type is unicode
+            if output_file_path_type == types.UnicodeType:
+                # encodes the output file path with the default encoding
+                output_file_path = output_file_path.encode(DEFAULT_ENCODING)
+
+            # adds the file as an entry of the parallel zip
+            parallel_zip.add(file_path, output_file_path)
+
+        # writes the zip file with all the entries and returns the
+        # statistics tuple with the throughput of the operation
+        _files, bytes_read, bytes_written = parallel_zip.write()
+        throughput = parallel_zip.get_throughput()
+        return (bytes_read, bytes_written, throughput)
 
-    def unzip(self, zip_file_path, output_directory):
+    def unzip(self, zip_file_path, output_directory, workers = DEFAULT_WORKERS):
         """
         Extracts a zip file to the specified directory.
+        The archive is opened only once, the directories are created
+        lazily and the members are streamed to disk in fixed size chunks
+        (optionally in parallel), so that the memory usage is bounded.
 
         @type zip_file_path: String
         @param zip_file_path: Full path to the zip file.
         @type output_directory: String
         @param output_directory: Full path to the directory where one wants to extract the zip file to.
+        @type workers: int
+        @param workers: The number of worker threads used for extraction.
         """
 
         # retrieves the zip file absolute path
@@ -425,11 +433,39 @@ class Zip:
             # returns immediately
             return
 
-        # creates the directories from the zip file to the output directory
-        self.create_directories(zip_file_path, output_directory)
+        # creates the set that holds the directories that are
+        # known to exist and the list of members to be extracted
+        directories = set()
+        members = []
 
-        # creates the files from the zip file to the output directory
-        self.create_files(zip_file_path, output_directory)
+        # opens the zip file (only once) for the given file path
+        zip_file = zipfile.ZipFile(zip_file_path)
+
+        try:
+            # creates the output directory (in case it does not exist)
+            # and then iterates over all the entries in the zip file
+            # creating the (required) directories lazily
+            self._create_directory(output_directory, directories)
+            for zip_info in zip_file.infolist():
+                # retrieves the name of the entry and the complete
+                # path to the target (file or directory) for it
+                name = zip_info.filename
+                path = os.path.normpath(os.path.join(output_directory, name))
+
+                # in case the entry is a directory creates it and
+                # continues, otherwise creates the parent directory
+                # and adds the entry to the members to be extracted
+                if not self.is_file_path(name): self._create_directory(path, directories); continue
+                self._create_directory(os.path.dirname(path), directories)
+                members.append((zip_info, path))
+
+            # in case there's only one worker (or member) the extraction
+            # is done inline, otherwise uses the worker threads
+            if workers > 1 and len(members) > 1: self._extract_parallel(zip_file, members, workers)
+            else: self._extract_serial(zip_file, members)
+        finally:
+            # closes the zip file
+            zip_file.close()
 
     def names(self, zip_file_path):
         """
@@ -459,6 +495,125 @@ class Zip:
         # returns the zip file names
         return zip_file_names
 
+    def size(self, zip_file_path):
+        """
+        Retrieves the total (uncompressed) size of the entries
+        contained in the specified zip file.
+
+        @type zip_file_path: String
+        @param zip_file_path: Full path to the zip file.
+        @rtype: int
+        @return: The total uncompressed size of the entries.
+        """
+
+        # opens the zip file and sums the (uncompressed)
+        # size of the various entries contained in it
+        zip_file = zipfile.ZipFile(zip_file_path)
+        try: return sum(zip_info.file_size for zip_info in zip_file.infolist())
+        finally: zip_file.close()
+
+    def _create_directory(self, path, directories):
+        """
+        Creates the directory in the provided path (and its parents)
+        in case it does not exist, the set of directories is used to
+        avoid the (repeated) checking of the file system.
+
+        @type path: String
+        @param path: The path to the directory to be created.
+        @type directories: Set
+        @param directories: The set of directories known to exist.
+        """
+
+        # in case the directory is already known to
+        # exist returns immediately (nothing to be done)
+        if path in directories: return
+
+        # creates the directory (and the parents) in case
+        # it does not exist and adds it to the set
+        if not os.path.isdir(path): os.makedirs(path)
+        directories.add(path)
+
+    def _extract_member(self, zip_file, member, path):
+        """
+        Extracts the member (name or information) from the zip file
+        into the provided path, streaming the contents in chunks.
+
+        @type zip_file: ZipFile
+        @param zip_file: The zip file to extract the member from.
+        @type member: ZipInfo
+        @param member: The name or information of the member.
+        @type path: String
+        @param path: The path to the file to be written.
+        """
+
+        # opens the member in the zip file (for streaming) and
+        # the target file in write mode and copies the contents
+        # of the member in chunks (bounded memory usage)
+        source = zip_file.open(member)
+        try:
+            file = open(path, "wb")
+            try:
+                while True:
+                    data = source.read(BUFFER_LENGTH)
+                    if not data: break
+                    file.write(data)
+            finally:
+                file.close()
+        finally:
+            source.close()
+
+    def _extract_serial(self, zip_file, members):
+        """
+        Extracts the members from the zip file sequentially
+        (in the current thread).
+
+        @type zip_file: ZipFile
+        @param zip_file: The zip file to extract the members from.
+        @type members: List
+        @param members: The list of tuples with the information of
+        the member and the path to the file to be written.
+        """
+
+        for zip_info, path in members: self._extract_member(zip_file, zip_info, path)
+
+    def _extract_parallel(self, zip_file, members, workers):
+        """
+        Extracts the members from the zip file using a series of
+        worker threads, each member is opened independently (the
+        zip file opens a new handle for each of them).
+
+        @type zip_file: ZipFile
+        @param zip_file: The zip file to extract the members from.
+        @type members: List
+        @param members: The list of tuples with the information of
+        the member and the path to the file to be written.
+        @type workers: int
+        @param workers: The number of worker threads to be used.
+        """
+
+        # creates the queue with the members to be extracted and
+        # the list that holds the exceptions raised by the workers
+        queue = Queue.Queue()
+        exceptions = []
+        for member in members: queue.put(member)
+
+        def work():
+            while not exceptions:
+                try: zip_info, path = queue.get_nowait()
+                except Queue.Empty: break
+                try: self._extract_member(zip_file, zip_info, path)
+                except BaseException, exception: exceptions.append(exception)
+
+        # creates and starts the worker threads and then waits
+        # for all of them to finish the extraction
+        threads = [threading.Thread(target = work) for _index in range(workers)]
+        for thread in threads: thread.daemon = True; thread.start()
+        for thread in threads: thread.join()
+
+        # in case an exception was raised by any of the
+        # workers re-raises it to the caller
+        if exceptions: raise exceptions[0]
+
 def get_file_paths(path, returned_path_list = None):
     """
     Returns a list with full paths to all files contained within the specified directory.